@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+#
+# Replays the forecast corpus from tests/test_forecast.py (three-hour scenarios: a pressure curve, a steady wind, and rain or not) through a Station, timing Station.update_forecast() per observation.
+# The tests check that each ends on the forecast it should; this only prints what each ended on.
+#
+#     python3 benchmarks/forecast.py
+import json
+import os
+import random
+import sys
+import time
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests'))
+
+#
+from synthetic import BASE_PRESSURE_MB, CURVE_MINUTES, obs_st, pressure_at
+from tempest_weather_helper import Forecaster, Station
+from test_forecast import SCENARIOS
+
+# Feeds one scenario through a fresh Station a minute at a time, forecasting after every observation as handle_observation() does. Returns (the last forecast, seconds spent forecasting, forecasts made).
+def replay(curve, scale, wind_direction_degrees, wind_average_meters_per_second, raining, southern_hemisphere, seed):
+
+	#
+	random_generator = random.Random(seed)
+	station = Station('ST-00000512')
+	forecaster = Forecaster(southern_hemisphere)
+	forecast = None
+	elapsed = 0
+
+	#
+	for minute in range(CURVE_MINUTES + 1):
+
+		#
+		pressure_mb = round(BASE_PRESSURE_MB + scale * (pressure_at(curve, minute) - BASE_PRESSURE_MB), 2)
+		obs = json.loads(obs_st(1700000000 + minute * 60, pressure_mb, random_generator, wind_average_meters_per_second = wind_average_meters_per_second, wind_direction_degrees = wind_direction_degrees, raining = raining))['obs'][0]
+
+		#
+		station.cache_observation(station.derive(obs))
+
+		#
+		started = time.perf_counter()
+		forecast = station.update_forecast(forecaster, obs)
+		elapsed += time.perf_counter() - started
+
+	#
+	return (forecast, elapsed, CURVE_MINUTES + 1)
+
+#
+def main():
+
+	#
+	elapsed = 0
+	updates = 0
+
+	#
+	for seed, ((curve, scale, wind_direction_degrees, wind_average_meters_per_second, raining, southern_hemisphere), expected) in enumerate(SCENARIOS):
+
+		#
+		forecast, scenario_elapsed, scenario_updates = replay(curve, scale, wind_direction_degrees, wind_average_meters_per_second, raining, southern_hemisphere, seed)
+		elapsed += scenario_elapsed
+		updates += scenario_updates
+
+		#
+		scenario = '%s x%d, %s %.1f m/s%s%s' % (curve.name, scale, forecast['wind_direction'], wind_average_meters_per_second, ', raining' if raining else '', ', southern' if southern_hemisphere else '')
+		print('%-58s %-26s %s' % (scenario, forecast['pressure_tendency'], forecast['forecast']), file = sys.stdout, flush = True)
+
+	#
+	print('%d scenarios; %.2f µs per forecast update (%d updates)' % (len(SCENARIOS), elapsed / updates * 1e6, updates), file = sys.stdout, flush = True)
+
+if __name__ == '__main__':
+
+	#
+	main()
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+#
+# Load-tests the HTTP server: requests/sec and latency percentiles for full responses, gzipped responses, and conditional polls answered with 304.
+# By default it starts a server in a child process with 12 hours of synthetic history; give --url to test a running server instead.
+#
+#     python3 benchmarks/http_load.py
+#     python3 benchmarks/http_load.py --url http://weather.local:8080 --clients 8 --seconds 10
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+#
+from memory_per_observation import make_packet
+from tempest_weather_helper import TempestWeatherHelper, start_http_server
+
+# (name, path, request headers, whether to poll with If-None-Match)
+SCENARIOS = [
+	('latest, full', '/latest', {}, False),
+	('latest, 304', '/latest', {}, True),
+	('history, full', '/history', {}, False),
+	('history, gzip', '/history', {'Accept-Encoding': 'gzip'}, False),
+	('history, 304', '/history', {'Accept-Encoding': 'gzip'}, True),
+]
+
+# The child process: fill the cache, serve it, and report the port we got.
+def serve(ports):
+
+	#
+	random_generator = random.Random(50222)
+
+	#
+	for minute in range(TempestWeatherHelper.get_station().capacity):
+		TempestWeatherHelper.handle_data(make_packet(minute, random_generator))
+
+	#
+	server = start_http_server('127.0.0.1', 0)
+	ports.put(server.server_address[1])
+
+	#
+	while True:
+		time.sleep(60)
+
+# One keep-alive connection, polling as fast as it can until the deadline. Appends its latencies (in seconds) to latencies.
+def client(host, port, path, headers, conditional, deadline, latencies):
+
+	#
+	connection = http.client.HTTPConnection(host, port)
+	etag = None
+	mine = []
+
+	#
+	while time.perf_counter() < deadline:
+
+		#
+		request_headers = dict(headers)
+		if conditional and etag is not None: request_headers['If-None-Match'] = etag
+
+		#
+		started = time.perf_counter()
+		connection.request('GET', path, headers = request_headers)
+		response = connection.getresponse()
+		response.read()
+		mine.append(time.perf_counter() - started)
+
+		#
+		etag = response.getheader('ETag', etag)
+
+	#
+	connection.close()
+	latencies.extend(mine)
+
+#
+def percentile(ordered, fraction):
+	return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+#
+def main():
+
+	#
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--url', help = 'a running server, e.g. http://127.0.0.1:8080')
+	parser.add_argument('--clients', type = int, default = 4)
+	parser.add_argument('--seconds', type = float, default = 3)
+	arguments = parser.parse_args()
+
+	#
+	child = None
+
+	#
+	if arguments.url is None:
+
+		#
+		ports = multiprocessing.Queue()
+		child = multiprocessing.Process(target = serve, args = (ports,), daemon = True)
+		child.start()
+
+		#
+		host, port = '127.0.0.1', ports.get(timeout = 60)
+
+	else:
+
+		#
+		url = urllib.parse.urlsplit(arguments.url)
+		host, port = url.hostname, url.port or 80
+
+	#
+	print('%-16s %10s %10s %10s' % ('', 'req/s', 'p50 ms', 'p99 ms'))
+
+	#
+	for name, path, headers, conditional in SCENARIOS:
+
+		#
+		latencies = []
+		deadline = time.perf_counter() + arguments.seconds
+
+		#
+		threads = [threading.Thread(target = client, args = (host, port, path, headers, conditional, deadline, latencies)) for _ in range(arguments.clients)]
+		for thread in threads: thread.start()
+		for thread in threads: thread.join()
+
+		#
+		latencies.sort()
+		print('%-16s %10.0f %10.3f %10.3f' % (name, len(latencies) / arguments.seconds, percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000))
+
+	#
+	if child is not None: child.terminate()
+
+if __name__ == '__main__':
+
+	#
+	main()
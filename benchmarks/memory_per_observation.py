@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+#
+# Compares the memory needed to cache 720 observations as a deque of get_for_json() dicts (the old cache) versus a Station's cache: the columnar ObservationRing plus the latest observation's JSON (see Station.nbytes_by_part()). The history response is built from the columns when it's asked for, and reported separately.
+#
+#     python3 benchmarks/memory_per_observation.py
+import json
+import os
+import random
+import sys
+
+#
+from collections import deque
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+#
+from tempest_weather_helper import Station, TempestWeatherHelper
+
+#
+CAPACITY = 720
+
+# A plausible obs_st packet for the given minute.
+def make_packet(minute, random_generator):
+
+	#
+	obs = [1700000000 + minute * 60, 0.5, 1.8, round(random_generator.uniform(0, 12), 2), 180, 3, round(1013 + random_generator.uniform(-3, 3), 2), round(random_generator.uniform(5, 25), 2), round(random_generator.uniform(40, 90), 2), 30000, round(random_generator.uniform(0, 11), 2), 300, 0.0, 0, 0, 0, 2.7, 1]
+
+	#
+	return json.dumps({'serial_number': 'ST-00000512', 'type': 'obs_st', 'hub_sn': 'HB-00013030', 'obs': [obs], 'firmware_revision': 129}).encode('utf-8')
+
+# Size of a container plus every distinct object it holds. Singletons (None, True, False and small ints) and the shared dict keys aren't owned by any one observation, so they don't count.
+def deep_size(dicts):
+
+	#
+	seen = set()
+	total = sys.getsizeof(dicts)
+
+	#
+	for data in dicts:
+
+		#
+		total += sys.getsizeof(data)
+
+		#
+		for value in data.values():
+
+			#
+			if value is None or isinstance(value, bool) or (isinstance(value, int) and -5 <= value <= 256) or id(value) in seen: continue
+
+			#
+			seen.add(id(value))
+			total += sys.getsizeof(value)
+
+	#
+	return total
+
+#
+def main():
+
+	#
+	random_generator = random.Random(50222)
+
+	# Build both caches from the same packets: the old one kept a get_for_json() dict per observation.
+	fifo_queue = deque(maxlen = CAPACITY)
+	station = Station('ST-00000512', capacity = CAPACITY, rollup_tiers = ())
+
+	#
+	for minute in range(CAPACITY):
+
+		#
+		TempestWeatherHelper.handle_data(make_packet(minute, random_generator))
+
+		#
+		fifo_queue.append(TempestWeatherHelper.get_for_json())
+		station.cache_observation(TempestWeatherHelper.get_observation())
+
+	# Only the latest observation's JSON is kept until someone asks for the history.
+	deque_bytes = deep_size(fifo_queue)
+	nbytes = station.nbytes_by_part()
+	station_bytes = nbytes['columns'] + nbytes['json']
+
+	# Once built, the history response is kept until the next observation.
+	history_bytes = sys.getsizeof(station.get_all_json())
+
+	#
+	print('deque of dicts:  {0:>9,} bytes ({1:,.0f} bytes per observation)'.format(deque_bytes, deque_bytes / CAPACITY))
+	print('Station cache:   {0:>9,} bytes ({1:,.0f} bytes per observation)'.format(station_bytes, station_bytes / CAPACITY))
+	print('  columns:       {0:>9,} bytes ({1:,.0f} bytes per observation)'.format(nbytes['columns'], nbytes['columns'] / CAPACITY))
+	print('  JSON:          {0:>9,} bytes ({1:,.0f} bytes per observation)'.format(nbytes['json'], nbytes['json'] / CAPACITY))
+	print('reduction:       {0:.1f}x'.format(deque_bytes / station_bytes))
+	print('history response, once built: {0:,} bytes ({1:,.0f} bytes per observation)'.format(history_bytes, history_bytes / CAPACITY))
+
+if __name__ == '__main__':
+
+	#
+	main()
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+#
+# Per-packet cost of decoding every datagram with json.loads() (the old handle_data() behavior) versus PacketDispatcher, which only decodes packet types that have a handler.
+# By default only obs_st has one; the wind is tracked (and rapid_wind decoded) only once something asks for it, which is measured separately.
+# The mix is roughly one minute of hub traffic: one obs_st, twenty rapid_wind, six hub_status, one device_status, and the occasional lightning or rain event.
+#
+#     python3 benchmarks/packet_dispatch.py
+import json
+import os
+import sys
+import timeit
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+#
+from tempest_weather_helper import PacketDispatcher
+
+# See: https://weatherflow.github.io/Tempest/api/udp/v143/
+OBS_ST = b'{"serial_number":"ST-00000512","type":"obs_st","hub_sn":"HB-00013030","obs":[[1588948614,0.18,0.22,0.27,144,6,1017.57,22.37,50.26,328,0.03,3,0.000000,0,0,0,2.410,1]],"firmware_revision":129}'
+RAPID_WIND = b'{"serial_number":"ST-00000512","type":"rapid_wind","hub_sn":"HB-00013030","ob":[1588948614,0.27,144]}'
+HUB_STATUS = b'{"serial_number":"HB-00013030","type":"hub_status","firmware_revision":"171","uptime":86271,"rssi":-29,"timestamp":1588948614,"reset_flags":"BOR,PIN,POR","seq":8601,"radio_stats":[25,1,0,3,16895],"mqtt_stats":[1,0]}'
+DEVICE_STATUS = b'{"serial_number":"ST-00000512","type":"device_status","hub_sn":"HB-00013030","timestamp":1588948614,"uptime":86271,"voltage":2.410,"firmware_revision":129,"rssi":-73,"hub_rssi":-70,"sensor_status":0,"debug":0}'
+EVT_STRIKE = b'{"serial_number":"ST-00000512","type":"evt_strike","hub_sn":"HB-00013030","evt":[1588948614,27,3848]}'
+EVT_PRECIP = b'{"serial_number":"ST-00000512","type":"evt_precip","hub_sn":"HB-00013030","evt":[1588948614]}'
+
+#
+PACKETS = [OBS_ST] + [RAPID_WIND] * 20 + [HUB_STATUS] * 6 + [DEVICE_STATUS, EVT_STRIKE, EVT_PRECIP]
+
+#
+def main():
+
+	#
+	handled = []
+
+	# The old way: decode everything, then look at the type.
+	def decode_everything():
+
+		#
+		for bytes_from_tempest_hub in PACKETS:
+
+			#
+			data = json.loads(bytes_from_tempest_hub.decode('utf-8'))
+			if data['type'] is None or data['type'] != 'obs_st': continue
+
+			#
+			handled.append(data)
+
+	# The new way: only obs_st has a handler, so nothing else is decoded.
+	dispatcher = PacketDispatcher()
+	dispatcher.register('obs_st', handled.append)
+
+	#
+	def dispatch():
+
+		#
+		for bytes_from_tempest_hub in PACKETS:
+			dispatcher.dispatch(bytes_from_tempest_hub)
+
+	# What TempestWeatherHelper.track_wind() adds: rapid_wind decoded too.
+	tracking_dispatcher = PacketDispatcher()
+	tracking_dispatcher.register('obs_st', handled.append)
+	tracking_dispatcher.register('rapid_wind', handled.append)
+
+	#
+	def dispatch_tracking_wind():
+
+		#
+		for bytes_from_tempest_hub in PACKETS:
+			tracking_dispatcher.dispatch(bytes_from_tempest_hub)
+
+	#
+	repeat = 2000
+	before = min(timeit.repeat(decode_everything, number = repeat, repeat = 5)) / repeat / len(PACKETS)
+	after = min(timeit.repeat(dispatch, number = repeat, repeat = 5)) / repeat / len(PACKETS)
+	tracking_wind = min(timeit.repeat(dispatch_tracking_wind, number = repeat, repeat = 5)) / repeat / len(PACKETS)
+
+	#
+	print('{0} packets per mix, {1} of them obs_st'.format(len(PACKETS), PACKETS.count(OBS_ST)))
+	print('json.loads every packet: {0:.2f} µs per packet'.format(before * 1e6))
+	print('PacketDispatcher:        {0:.2f} µs per packet'.format(after * 1e6))
+	print('speedup:                 {0:.1f}x'.format(before / after))
+	print('tracking the wind too:   {0:.2f} µs per packet'.format(tracking_wind * 1e6))
+
+if __name__ == '__main__':
+
+	#
+	main()
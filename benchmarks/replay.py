@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+#
+# Replays synthetic hub traffic over UDP, so a listening TempestWeatherHelper (or anything else on port 50222) can be exercised without a hub.
+# --speed 60 plays an hour a minute; --speed 0 sends as fast as the socket allows. The packets are dated so the last one is "now".
+#
+#     python3 benchmarks/replay.py --curve FALLING_THEN_STEADY --speed 60
+#     python3 benchmarks/replay.py --stations 12 --minutes 720 --speed 0
+#
+# With --recording, it replays a capture made by start_recording() instead (a segment file or a directory of them), keeping the original spacing, and streaming it rather than loading it.
+#
+#     python3 benchmarks/replay.py --recording recordings/ --speed 60
+import argparse
+import itertools
+import os
+import socket
+import sys
+import time
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+#
+from synthetic import CURVE_MINUTES, packets
+from tempest_weather_helper import TEMPEST_UDP_PORT, PressureTrendAdvanced, read_packet_recording
+
+#
+def main():
+
+	#
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--host', default = '127.0.0.1', help = 'where to send; a broadcast address such as 255.255.255.255 works too')
+	parser.add_argument('--port', type = int, default = TEMPEST_UDP_PORT)
+	parser.add_argument('--curve', default = 'STEADY', choices = [trend.name for trend in PressureTrendAdvanced])
+	parser.add_argument('--minutes', type = int, default = CURVE_MINUTES + 1)
+	parser.add_argument('--speed', type = float, default = 1, help = 'multiple of real time; 0 for as fast as possible')
+	parser.add_argument('--stations', type = int, default = 1)
+	parser.add_argument('--observations-only', action = 'store_true', help = 'send obs_st packets alone')
+	parser.add_argument('--recording', help = 'replay this packet recording (file or directory) instead of synthetic traffic')
+	arguments = parser.parse_args()
+
+	#
+	if arguments.recording:
+
+		# Timed from the first record, as received.
+		recording = ((received_epoch, datagram) for received_epoch, address, datagram in read_packet_recording(arguments.recording))
+		first = next(recording, None)
+		if first is None: return
+
+		#
+		start_epoch = first[0]
+		merged = itertools.chain([first], recording)
+
+	else:
+
+		#
+		start_epoch = int(time.time()) - (arguments.minutes - 1) * 60
+
+		# Every station's packets for the same second go out together.
+		streams = [packets(PressureTrendAdvanced[arguments.curve], arguments.minutes, start_epoch, seed = station, observations_only = arguments.observations_only, serial_number = 'ST-%08d' % (512 + station), hub_sn = 'HB-%08d' % (13030 + station)) for station in range(arguments.stations)]
+		merged = [(epoch, datagram) for epoch, station, order, datagram in sorted((epoch, station, order, datagram) for station, stream in enumerate(streams) for order, (epoch, datagram) in enumerate(stream))]
+
+	#
+	sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+	sender.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+
+	#
+	started = time.perf_counter()
+	sent = 0
+
+	#
+	for epoch, datagram in merged:
+
+		# Wait until this packet is due.
+		if arguments.speed > 0:
+
+			#
+			delay = started + (epoch - start_epoch) / arguments.speed - time.perf_counter()
+			if delay > 0: time.sleep(delay)
+
+		#
+		sender.sendto(datagram, (arguments.host, arguments.port))
+		sent += 1
+
+	#
+	elapsed = time.perf_counter() - started
+	print('sent %d packets in %.2f s (%.0f packets/s)' % (sent, elapsed, sent / elapsed if elapsed else 0), file = sys.stdout, flush = True)
+
+if __name__ == '__main__':
+
+	#
+	main()
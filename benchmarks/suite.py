@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+#
+# The per-packet path and the read APIs, in one run: packets/sec through handle_data(), latency of the getters against a full 720-observation cache, and memory per cached observation and per station.
+#
+#     python3 benchmarks/suite.py
+import os
+import sys
+import time
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+#
+from synthetic import PRESSURE_CURVES, packets
+from tempest_weather_helper import STANDARD_ROLLUP_TIERS, Station, TempestWeatherHelper
+
+#
+CAPACITY = 720
+
+#
+def throughput(name, datagrams):
+
+	#
+	started = time.perf_counter()
+
+	#
+	for datagram in datagrams:
+		TempestWeatherHelper.handle_data(datagram)
+
+	#
+	elapsed = time.perf_counter() - started
+	print('%-48s %10.0f packets/s %10.2f µs/packet' % (name, len(datagrams) / elapsed, elapsed / len(datagrams) * 1e6), file = sys.stdout, flush = True)
+
+# Median and 99th percentile of single calls, in microseconds.
+def latency(name, call, repeat = 2000):
+
+	#
+	timings = []
+
+	#
+	for _ in range(repeat):
+
+		#
+		started = time.perf_counter()
+		call()
+		timings.append(time.perf_counter() - started)
+
+	#
+	timings.sort()
+	print('%-48s %10.2f µs p50 %10.2f µs p99' % (name, timings[len(timings) // 2] * 1e6, timings[int(len(timings) * 0.99)] * 1e6), file = sys.stdout, flush = True)
+
+#
+def main():
+
+	# Every pressure curve in turn, so each branch of the trend classifier gets its share, and enough of them to fill the cache more than once.
+	observations = []
+	mixed = []
+
+	#
+	for index, curve in enumerate(PRESSURE_CURVES):
+
+		#
+		start_epoch = 1700000000 + index * 181 * 60
+
+		#
+		observations.extend(datagram for epoch, datagram in packets(curve, start_epoch = start_epoch, observations_only = True))
+		mixed.extend(datagram for epoch, datagram in packets(curve, minutes = 10, start_epoch = start_epoch))
+
+	#
+	print('handle_data()', file = sys.stdout, flush = True)
+	throughput('  obs_st', observations)
+	throughput('  hub traffic (obs_st, rapid_wind, hub_status)', mixed)
+
+	#
+	assert len(TempestWeatherHelper.get_all_for_json()) == CAPACITY
+
+	#
+	print('getters, %d cached observations' % CAPACITY, file = sys.stdout, flush = True)
+	latency('  get_observation()', TempestWeatherHelper.get_observation)
+	latency('  get_for_json()', TempestWeatherHelper.get_for_json)
+	latency('  get_json()', TempestWeatherHelper.get_json)
+	latency('  get_all_for_json()', TempestWeatherHelper.get_all_for_json, repeat = 100)
+	latency('  get_all_json()', TempestWeatherHelper.get_all_json)
+	latency('  get_since(one behind)', lambda: TempestWeatherHelper.get_since(TempestWeatherHelper.get_generation() - 1))
+	latency('  get_range(12 hours, 15-minute buckets)', lambda: TempestWeatherHelper.get_range(bucket_seconds = 900), repeat = 100)
+	latency('  get_pressure_trend_advanced_from(180)', lambda: TempestWeatherHelper.get_pressure_trend_advanced_from(180))
+	latency('  get_forecast()', TempestWeatherHelper.get_forecast)
+
+	# The columns hold the values; the JSON is the latest observation's, plus get_all_json()'s response, built above.
+	nbytes = TempestWeatherHelper.get_station().nbytes_by_part()
+	print('memory per cached observation', file = sys.stdout, flush = True)
+	print('  %-46s %10.0f bytes' % ('columns', nbytes['columns'] / CAPACITY), file = sys.stdout, flush = True)
+	print('  %-46s %10.0f bytes' % ('JSON', nbytes['json'] / CAPACITY), file = sys.stdout, flush = True)
+
+	# The rollup tiers and the rapid_wind samples are preallocated, so they cost the same however much is cached. Tiers are opt-in; this is what STANDARD_ROLLUP_TIERS would add.
+	print('memory per station, preallocated', file = sys.stdout, flush = True)
+	print('  %-46s %10.0f bytes' % ('rollup tiers (default: none)', nbytes['rollup_tiers']), file = sys.stdout, flush = True)
+	print('  %-46s %10.0f bytes' % ('rollup tiers (STANDARD_ROLLUP_TIERS)', Station(None, rollup_tiers = STANDARD_ROLLUP_TIERS).nbytes_by_part()['rollup_tiers']), file = sys.stdout, flush = True)
+	print('  %-46s %10.0f bytes' % ('rapid_wind samples', nbytes['rapid_wind']), file = sys.stdout, flush = True)
+
+if __name__ == '__main__':
+
+	#
+	main()
@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+#
+# Realistic Tempest hub datagrams for benchmarks and replays: obs_st once a minute, rapid_wind every 3 seconds, and hub_status every 10 seconds.
+# Pressure follows a scripted three-hour curve, one for each PressureTrendAdvanced, so a replay ends on that trend. Run it to check that every curve does.
+#
+#     python3 benchmarks/synthetic.py
+import json
+import math
+import os
+import random
+import sys
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+#
+from tempest_weather_helper import PressureTrendAdvanced, Station
+
+#
+SERIAL_NUMBER = 'ST-00000512'
+HUB_SN = 'HB-00013030'
+
+# Where the curves start.
+BASE_PRESSURE_MB = 1013.0
+
+# Each curve is a list of (fraction of the three hours, millibars from BASE_PRESSURE_MB) keyframes, joined by straight lines.
+# The classifier treats pressures within 1 millibar as equal, so the shapes are a few millibars tall.
+PRESSURE_CURVES = {
+	PressureTrendAdvanced.CONTINUOUSLY_FALLING: [(0, 0), (1, -4)],
+	PressureTrendAdvanced.CONTINUOUSLY_RISING: [(0, 0), (1, 4)],
+	PressureTrendAdvanced.FALLING_THEN_SLIGHTLY_RISING: [(0, 0), (0.7, -4), (1, -2.5)],
+	PressureTrendAdvanced.FALLING_THEN_STEADY: [(0, 0), (0.6, -4), (1, -4)],
+	PressureTrendAdvanced.RISING_THEN_SLIGHTLY_FALLING: [(0, 0), (0.7, 4), (1, 2.5)],
+	PressureTrendAdvanced.RISING_THEN_STEADY: [(0, 0), (0.6, 4), (1, 4)],
+	PressureTrendAdvanced.SLIGHTLY_FALLING_THEN_RISING: [(0, 0), (0.3, -1.5), (1, 4)],
+	PressureTrendAdvanced.SLIGHTLY_RISING_THEN_FALLING: [(0, 0), (0.3, 1.5), (1, -4)],
+	PressureTrendAdvanced.STEADY: [(0, 0), (1, 0)],
+	PressureTrendAdvanced.STEADY_THEN_FALLING: [(0, 0), (0.4, 0), (1, -4)],
+	PressureTrendAdvanced.STEADY_THEN_RISING: [(0, 0), (0.4, 0), (1, 4)],
+	PressureTrendAdvanced.UNSTEADY_OR_INCONCLUSIVE: [(0, 0), (0.2, 3), (0.4, -3), (0.6, 3), (0.8, -3), (1, 0)],
+}
+
+# The curve spans this many minutes, and a replay of it ends with the newest observation at the end of the curve.
+CURVE_MINUTES = 180
+
+# Pressure on the curve, a given number of minutes into it. Beyond the end, it holds at the last keyframe.
+def pressure_at(curve, minute):
+
+	#
+	fraction = min(max(minute / CURVE_MINUTES, 0), 1)
+	keyframes = PRESSURE_CURVES[curve]
+
+	#
+	for (a_fraction, a_mb), (b_fraction, b_mb) in zip(keyframes, keyframes[1:]):
+
+		#
+		if fraction <= b_fraction: return round(BASE_PRESSURE_MB + a_mb + (b_mb - a_mb) * (fraction - a_fraction) / (b_fraction - a_fraction), 2)
+
+	#
+	return round(BASE_PRESSURE_MB + keyframes[-1][1], 2)
+
+# See: https://weatherflow.github.io/Tempest/api/udp/v143/
+# The wind (average speed in m/s, with the lull and gust either side of it, and direction) and whether it's raining are random unless given.
+def obs_st(epoch, pressure_mb, random_generator, serial_number = SERIAL_NUMBER, hub_sn = HUB_SN, wind_average_meters_per_second = None, wind_direction_degrees = None, raining = None):
+
+	#
+	hour = (epoch // 3600) % 24
+	daylight = max(0, math.sin((hour - 6) / 12 * math.pi))
+	random_raining = random_generator.random() < 0.1
+	if raining is None: raining = random_raining
+
+	#
+	obs = [epoch, round(random_generator.uniform(0, 2), 2), round(random_generator.uniform(1, 4), 2), round(random_generator.uniform(3, 12), 2), random_generator.randrange(360), 3, pressure_mb, round(10 + 10 * daylight + random_generator.uniform(-1, 1), 2), round(random_generator.uniform(40, 90), 2), int(60000 * daylight), round(8 * daylight, 2), int(800 * daylight), round(random_generator.uniform(0.01, 0.2), 3) if raining else 0.0, 1 if raining else 0, 0, 0, 2.62, 1]
+
+	#
+	if wind_average_meters_per_second is not None: obs[1:4] = [round(wind_average_meters_per_second * 0.5, 2), wind_average_meters_per_second, round(wind_average_meters_per_second * 1.5, 2)]
+	if wind_direction_degrees is not None: obs[4] = wind_direction_degrees
+
+	#
+	return json.dumps({'serial_number': serial_number, 'type': 'obs_st', 'hub_sn': hub_sn, 'obs': [obs], 'firmware_revision': 156}, separators = (',', ':')).encode('utf-8')
+
+#
+def rapid_wind(epoch, random_generator, serial_number = SERIAL_NUMBER, hub_sn = HUB_SN):
+	return json.dumps({'serial_number': serial_number, 'type': 'rapid_wind', 'hub_sn': hub_sn, 'ob': [epoch, round(random_generator.uniform(0, 6), 2), random_generator.randrange(360)]}, separators = (',', ':')).encode('utf-8')
+
+#
+def hub_status(epoch, uptime, sequence, serial_number = HUB_SN):
+	return json.dumps({'serial_number': serial_number, 'type': 'hub_status', 'firmware_revision': '171', 'uptime': uptime, 'rssi': -29, 'timestamp': epoch, 'reset_flags': 'BOR,PIN,POR', 'seq': sequence, 'radio_stats': [25, 1, 0, 3, 16895], 'mqtt_stats': [1, 0]}, separators = (',', ':')).encode('utf-8')
+
+# (epoch, datagram) for every packet the hub would send over the given number of minutes, in order. obs_st packets alone if observations_only.
+# The last obs_st lands at the end of the curve, so the newest observation carries the curve's trend.
+def packets(curve = PressureTrendAdvanced.STEADY, minutes = CURVE_MINUTES + 1, start_epoch = 1700000000, seed = 50222, observations_only = False, serial_number = SERIAL_NUMBER, hub_sn = HUB_SN):
+
+	#
+	random_generator = random.Random(seed)
+	first_minute = CURVE_MINUTES + 1 - minutes
+
+	#
+	for minute in range(minutes):
+
+		#
+		epoch = start_epoch + minute * 60
+
+		#
+		yield (epoch, obs_st(epoch, pressure_at(curve, first_minute + minute), random_generator, serial_number, hub_sn))
+
+		#
+		if observations_only: continue
+
+		#
+		for second in range(60):
+
+			#
+			if second % 3 == 0: yield (epoch + second, rapid_wind(epoch + second, random_generator, serial_number, hub_sn))
+
+			#
+			if second % 10 == 0: yield (epoch + second, hub_status(epoch + second, minute * 60 + second, minute * 6 + second // 10, hub_sn))
+
+# Feeds every curve through a fresh Station, and reports the trend it ends on.
+def main():
+
+	#
+	mismatches = 0
+
+	#
+	for curve in PRESSURE_CURVES:
+
+		#
+		station = Station(SERIAL_NUMBER)
+
+		#
+		for epoch, datagram in packets(curve, observations_only = True):
+			station.cache_observation(station.derive(json.loads(datagram)['obs'][0]))
+
+		#
+		trend = station.get_observation().pressure_trend_advanced_three_hours_description
+		if trend != curve: mismatches += 1
+
+		#
+		print('%-30s %s' % (curve.name, 'ok' if trend == curve else 'got ' + (trend.name if trend else str(trend))), file = sys.stdout, flush = True)
+
+	#
+	sys.exit(1 if mismatches else 0)
+
+if __name__ == '__main__':
+
+	#
+	main()
@@ -13,20 +13,83 @@
 #
 #     tempestWeatherHelper.get_all_for_json()
 #
-# ...for the last 12 hours of data.
+# ...for the last 12 hours of data. get_json() and get_all_json() return the same data as strict JSON bytes, ready to send to a client.
+# get_observation() returns the latest values as an immutable Observation, which is safe to read from any thread.
+# start_http_server() serves the same data to the LAN over HTTP, with ETags and gzip.
+# get_metrics() and get_metrics_prometheus() report packet counts, errors and per-stage timings.
+# subscribe() pushes each new observation to a callback or iterator, rather than waiting to be polled.
+# open_shared_memory() publishes the cache for other processes, which read it with SharedObservationReader.
+# start_recording() records every raw datagram to rotated, compressed files, which read_packet_recording() reads back.
+import argparse
+import array
+import asyncio
+import bisect
+import csv
 import datetime
-import decimal
 import enum
+import gzip
+import http.server
+import itertools
 import json
 import math
+import mmap
+import os
+import re
+import select
 import socket
 import statistics
+import struct
+import sys
 import threading
 import traceback
 import time
+import urllib.parse
+import zlib
 
 #
 from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+
+# NumPy is optional. When it's available, batch derivation is vectorized.
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+# zstandard is optional too. Without it, packet recordings are gzipped (or left uncompressed).
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+
+# Classifies a value into one of a set of contiguous ranges with a binary search over precomputed boundaries, rather than a linear scan.
+# boundaries[i] separates members[i] from members[i + 1]. If lower_inclusive, a value equal to a boundary belongs to the upper range; otherwise to the lower one.
+class ThresholdTable:
+
+	#
+	def __init__(self, members, boundaries, lower_inclusive):
+		self.members = tuple(members)
+		self.boundaries = tuple(boundaries)
+		self.lower_inclusive = lower_inclusive
+		self.__bisect = bisect.bisect_right if lower_inclusive else bisect.bisect_left
+
+	#
+	def classify(self, value):
+
+		# NaN never fell into any range with the old comparisons, so it doesn't here either.
+		if value is None or value != value: return None
+
+		#
+		return self.members[self.__bisect(self.boundaries, value)]
+
+	# Classifies a NumPy array of values at once. Returns a list, with None for NaN.
+	def classify_array(self, values):
+
+		#
+		indexes = numpy.searchsorted(self.boundaries, values, side = 'right' if self.lower_inclusive else 'left')
+
+		#
+		return [self.members[index] if value == value else None for index, value in zip(indexes.tolist(), values.tolist())]
 
 #
 @enum.unique
@@ -63,32 +126,16 @@ class PressureTrend(enum.Enum):
 	#
 	@classmethod
 	def fromOneHourObservation(cls, mb_change):
-
-		#
-		if mb_change is None: return None
-
-		#
-		for pressureTrend in PressureTrend:
-
-			#
-			if (pressureTrend.a_mb_change_per_hour is None or pressureTrend.a_mb_change_per_hour < mb_change) and (pressureTrend.b_mb_change_per_hour is None or mb_change <= pressureTrend.b_mb_change_per_hour): return pressureTrend
-
-		return None
+		return PRESSURE_TREND_ONE_HOUR_TABLE.classify(mb_change)
 
 	#
 	@classmethod
 	def fromThreeHourObservation(cls, mb_change):
+		return PRESSURE_TREND_THREE_HOURS_TABLE.classify(mb_change)
 
-		#
-		if mb_change is None: return None
-
-		#
-		for pressureTrend in PressureTrend:
-
-			#
-			if (pressureTrend.a_mb_change_per_three_hours is None or pressureTrend.a_mb_change_per_three_hours < mb_change) and (pressureTrend.b_mb_change_per_three_hours is None or mb_change <= pressureTrend.b_mb_change_per_three_hours): return pressureTrend
-
-		return None
+# The ranges are contiguous, so each one's upper bound is the next one's lower bound.
+PRESSURE_TREND_ONE_HOUR_TABLE = ThresholdTable(PressureTrend, [pressureTrend.b_mb_change_per_hour for pressureTrend in PressureTrend][:-1], lower_inclusive = False)
+PRESSURE_TREND_THREE_HOURS_TABLE = ThresholdTable(PressureTrend, [pressureTrend.b_mb_change_per_three_hours for pressureTrend in PressureTrend][:-1], lower_inclusive = False)
 
 #
 @enum.unique
@@ -129,17 +176,10 @@ class RainfallIntensity(enum.Enum):
 	#
 	@classmethod
 	def fromValue(cls, precipitation_mm_per_minute):
+		return RAINFALL_INTENSITY_TABLE.classify(precipitation_mm_per_minute)
 
-		#
-		if precipitation_mm_per_minute is None: return None
-
-		#
-		for rainfallIntensity in RainfallIntensity:
-
-			#
-			if (rainfallIntensity.a_mm_per_minute is None or rainfallIntensity.a_mm_per_minute < precipitation_mm_per_minute) and (rainfallIntensity.b_mm_per_minute is None or precipitation_mm_per_minute <= rainfallIntensity.b_mm_per_minute): return rainfallIntensity
-
-		return None
+#
+RAINFALL_INTENSITY_TABLE = ThresholdTable(RainfallIntensity, [rainfallIntensity.b_mm_per_minute for rainfallIntensity in RainfallIntensity][:-1], lower_inclusive = False)
 
 # Enum value is a tuple representing a range from a_index to b_index, where a_index is inclusive and b_index is exclusive.
 @enum.unique
@@ -160,17 +200,10 @@ class UltravioletExposureCategory(enum.Enum):
 	#
 	@classmethod
 	def fromValue(cls, uv_index):
+		return ULTRAVIOLET_EXPOSURE_CATEGORY_TABLE.classify(uv_index)
 
-		#
-		if uv_index is None: return None
-
-		#
-		for ultravioletExposureCategory in UltravioletExposureCategory:
-
-			#
-			if (ultravioletExposureCategory.a_index is None or ultravioletExposureCategory.a_index <= uv_index) and (ultravioletExposureCategory.b_index is None or uv_index < ultravioletExposureCategory.b_index): return ultravioletExposureCategory
-
-		return None
+#
+ULTRAVIOLET_EXPOSURE_CATEGORY_TABLE = ThresholdTable(UltravioletExposureCategory, [ultravioletExposureCategory.b_index for ultravioletExposureCategory in UltravioletExposureCategory][:-1], lower_inclusive = True)
 
 # Enum value is a tuple representing a range from a_mph to b_mph, where a_mph is inclusive and b_mph is exclusive.
 @enum.unique
@@ -199,431 +232,5458 @@ class WindGust(enum.Enum):
 	#
 	@classmethod
 	def fromValue(cls, wind_gust_miles_per_hour):
+		return WIND_GUST_TABLE.classify(wind_gust_miles_per_hour)
 
-		#
-		if wind_gust_miles_per_hour is None: return None
+#
+WIND_GUST_TABLE = ThresholdTable(WindGust, [windGust.b_mph for windGust in WindGust][:-1], lower_inclusive = True)
+
+# Square root of n/m as a float, correctly rounded. This mirrors what statistics.pstdev() does internally, so results computed from running sums match it bit-for-bit.
+# See: https://bugs.python.org/msg407078
+def float_sqrt_of_fraction(n, m):
+
+	#
+	q = (n.bit_length() - m.bit_length() - 109) // 2
+
+	# Round-to-odd integer square root, then let the final division do the correct rounding.
+	if q >= 0:
+		m <<= 2 * q
+	else:
+		n <<= -2 * q
+
+	#
+	a = math.isqrt(n // m)
+	a |= a * a * m != n
+
+	#
+	return float(a << q) if q >= 0 else a / (1 << -q)
+
+# A fixed-span sliding window over a stream of values. Minimum and maximum are kept in monotonic deques, and the population standard deviation is kept as exact integer running sums, so every lookup is O(1).
+# None values mark missing slots. They're counted, but otherwise ignored, so the statistics are over the values that are present.
+class RollingWindow:
+
+	#
+	__slots__ = ('span', 'values', 'none_count', '_index', '_minimums', '_maximums', '_scale', '_sum', '_sum_of_squares', '_track_deviation')
+
+	#
+	def __init__(self, span, track_deviation = False):
+		self.span = span
+		self.values = deque(maxlen = span)
+		self.none_count = 0
+		self._index = 0
+		self._minimums = deque()
+		self._maximums = deque()
+		self._scale = 0
+		self._sum = 0
+		self._sum_of_squares = 0
+		self._track_deviation = track_deviation
+
+	#
+	def __len__(self):
+		return len(self.values)
+
+	#
+	def is_full(self):
+		return len(self.values) == self.span
+
+	#
+	# Called for every minute of every window, so attributes are read into locals once.
+	def push(self, value):
 
 		#
-		for windGust in WindGust:
+		values = self.values
+		minimums = self._minimums
+		maximums = self._maximums
+
+		# Evict the oldest value when full.
+		if len(values) == self.span:
 
 			#
-			if (windGust.a_mph is None or windGust.a_mph <= wind_gust_miles_per_hour) and (windGust.b_mph is None or wind_gust_miles_per_hour < windGust.b_mph): return windGust
+			evicted = values[0]
 
-		return None
+			#
+			if evicted is None:
+				self.none_count -= 1
 
-#
-class TempestWeatherHelper(threading.Thread):
+			#
+			elif self._track_deviation:
+				evicted = self.__scaled(evicted)
+				self._sum -= evicted
+				self._sum_of_squares -= evicted * evicted
 
-	# For singleton pattern.
-	__instance = None
+		#
+		values.append(value)
+		index = self._index + 1
+		self._index = index
 
-	# Cache approximately 12 hours of data.
-	__fifo_queue = deque(maxlen=720)
-
-	# Most of these are raw values from the Tempest hub, but some are derivations.
-	last_updated_epoch = None
-	last_updated_iso_8601 = None
-	lightning_detected = None
-	lightning_strike_average_distance_km = None
-	lightning_strike_average_distance_miles = None
-	pressure_inhg = None
-	pressure_mb = None
-	pressure_trend_advanced_three_hours_description = None
-	pressure_trend_one_hour_description = None
-	pressure_trend_one_hour_inhg = None
-	pressure_trend_one_hour_mb = None
-	pressure_trend_three_hours_description = None
-	pressure_trend_three_hours_inhg = None
-	pressure_trend_three_hours_mb = None
-	precipitation_description = None
-	precipitation_detected = None
-	precipitation_inches_per_minute = None
-	precipitation_mm_per_minute = None
-	precipitation_type = None
-	relative_humidity = None
-	solar_radiation = None
-	temperature_c = None
-	temperature_f = None
-	uv_exposure_category = None
-	uv_index = None
-	wind_gust_description = None
-	wind_gust_meters_per_second = None
-	wind_gust_miles_per_hour = None
-
-	#
-	def __new__(cls):
+		# Monotonic deques hold (index, value) pairs. Anything that has slid out of the window is dropped from the front.
+		oldest_index = index - self.span
+		if minimums and minimums[0][0] <= oldest_index: minimums.popleft()
+		if maximums and maximums[0][0] <= oldest_index: maximums.popleft()
 
 		#
-		if cls.__instance is None:
+		if value is None:
+			self.none_count += 1
+			return
 
-			#
-			cls.__instance = threading.Thread.__new__(cls)
+		# A new value makes every larger (or smaller) value behind it irrelevant for the minimum (or maximum).
+		while minimums and minimums[-1][1] >= value: minimums.pop()
+		while maximums and maximums[-1][1] <= value: maximums.pop()
 
-		return cls.__instance
+		#
+		entry = (index, value)
+		minimums.append(entry)
+		maximums.append(entry)
 
-	#
-	def __init__(self):
+		#
+		if self._track_deviation:
+			value = self.__scaled(value)
+			self._sum += value
+			self._sum_of_squares += value * value
 
-		# Super initialize.
-		super(TempestWeatherHelper, self).__init__()
+	# Every float is an integer over a power of two, so the sums are kept exactly as integers over 2 ** _scale (and 2 ** (2 * _scale) for the squares).
+	# If a value needs a finer scale than we've seen so far, the sums are shifted up to it.
+	def __scaled(self, value):
 
-		# Whenever the parent thread dies, we want all child threads to die with it.
-		self.__instance.daemon = True
+		#
+		numerator, denominator = value.as_integer_ratio()
+		scale = denominator.bit_length() - 1
 
-	# Note it's get_for_json()—not get_json(). This isn't really JSON as we're using single quotes, None in lieu of null, True/False in lieu of true/false, etc. But it can easily be converted into strict JSON.
-	@classmethod
-	def get_for_json(cls):
+		#
+		if scale > self._scale:
+			self._sum <<= scale - self._scale
+			self._sum_of_squares <<= 2 * (scale - self._scale)
+			self._scale = scale
 
 		#
-		try:
+		return numerator << (self._scale - scale)
 
-			#
-			data = {}
-			data['last_updated_epoch'] = cls.last_updated_epoch if cls.last_updated_epoch is not None else None
-			data['last_updated_iso_8601'] = cls.last_updated_iso_8601 if cls.last_updated_iso_8601 is not None else None
-			data['lightning_detected'] = cls.lightning_detected if cls.lightning_detected is not None else None
-			data['lightning_strike_average_distance_km'] = cls.lightning_strike_average_distance_km if cls.lightning_strike_average_distance_km is not None else None
-			data['lightning_strike_average_distance_miles'] = cls.lightning_strike_average_distance_miles if cls.lightning_strike_average_distance_miles is not None else None
-			data['pressure_inhg'] = cls.pressure_inhg if cls.pressure_inhg is not None else None
-			data['pressure_mb'] = cls.pressure_mb if cls.pressure_mb is not None else None
-			data['pressure_trend_advanced_three_hours_description'] = cls.pressure_trend_advanced_three_hours_description.name.replace('_', ' ') if cls.pressure_trend_advanced_three_hours_description is not None else None
-			data['pressure_trend_one_hour_description'] = cls.pressure_trend_one_hour_description.name.replace('_', ' ') if cls.pressure_trend_one_hour_description is not None else None
-			data['pressure_trend_three_hours_description'] = cls.pressure_trend_three_hours_description.name.replace('_', ' ') if cls.pressure_trend_three_hours_description is not None else None
-			data['pressure_trend_one_hour_inhg'] = cls.pressure_trend_one_hour_inhg if cls.pressure_trend_one_hour_inhg is not None else None
-			data['pressure_trend_one_hour_mb'] = cls.pressure_trend_one_hour_mb if cls.pressure_trend_one_hour_mb is not None else None
-			data['pressure_trend_three_hours_inhg'] = cls.pressure_trend_three_hours_inhg if cls.pressure_trend_three_hours_inhg is not None else None
-			data['pressure_trend_three_hours_mb'] = cls.pressure_trend_three_hours_mb if cls.pressure_trend_three_hours_mb is not None else None
-			data['precipitation_inches_per_minute'] = '{0:.6f}'.format(cls.precipitation_inches_per_minute) if (cls.precipitation_inches_per_minute is not None and cls.precipitation_inches_per_minute != 0) else cls.precipitation_inches_per_minute if cls.precipitation_inches_per_minute is not None else None
-			data['precipitation_mm_per_minute'] = cls.precipitation_mm_per_minute if cls.precipitation_mm_per_minute is not None else None
-			data['precipitation_description'] = cls.precipitation_description.name.replace('_', ' ') if cls.precipitation_description is not None else None
-			data['precipitation_detected'] = cls.precipitation_detected if cls.precipitation_detected is not None else None
-			data['precipitation_type'] = cls.precipitation_type.name.replace('_', ' ') if cls.precipitation_type is not None else None
-			data['relative_humidity'] = cls.relative_humidity if cls.relative_humidity is not None else None
-			data['solar_radiation'] = cls.solar_radiation if cls.solar_radiation is not None else None
-			data['temperature_c'] = cls.temperature_c if cls.temperature_c is not None else None
-			data['temperature_f'] = cls.temperature_f if cls.temperature_f is not None else None
-			data['uv_exposure_category'] = cls.uv_exposure_category.name.replace('_', ' ') if cls.uv_exposure_category is not None else None
-			data['uv_index'] = cls.uv_index if cls.uv_index is not None else None
-			data['wind_gust_description'] = cls.wind_gust_description.name.replace('_', ' ') if cls.wind_gust_description is not None else None
-			data['wind_gust_meters_per_second'] = cls.wind_gust_meters_per_second if cls.wind_gust_meters_per_second is not None else None
-			data['wind_gust_miles_per_hour'] = cls.wind_gust_miles_per_hour if cls.wind_gust_miles_per_hour is not None else None
+	# The oldest value present.
+	def oldest(self):
+		return next((value for value in self.values if value is not None), None)
 
-			#
-			return data
+	# How many values (not missing slots) the window holds.
+	def present(self):
+		return len(self.values) - self.none_count
+
+	#
+	def minimum(self):
+		return self._minimums[0][1] if self._minimums else None
+
+	#
+	def maximum(self):
+		return self._maximums[0][1] if self._maximums else None
+
+	# Same result as statistics.pstdev(self.values).
+	def pstdev(self):
 
 		#
-		except Exception as e:
+		count = len(self.values) - self.none_count
+		if count < 1 or not self._track_deviation: return None
 
-			#
-			print(traceback.format_exc(), file = sys.stderr, flush = True)
+		# Exact mean square deviation, just as statistics._ss() computes it, as a fraction over count² · 2 ** (2 * _scale).
+		return float_sqrt_of_fraction(count * self._sum_of_squares - self._sum * self._sum, (count * count) << (2 * self._scale))
 
-	# Note it's get_for_json()—not get_json(). This isn't really JSON as we're using single quotes, None in lieu of null, True/False in lieu of true/false, etc. But it can easily be converted into strict JSON.
-	@classmethod
-	def get_all_for_json(cls):
-		return cls.list(__fifo_queue)
+# The share of the readings expected in a window (one per report interval) that must be there before trends are computed over it. A few dropped packets don't blank the trends, but a window that's mostly gaps gives none.
+# It only forgives gaps: a window reaching back before a station's first reading gives no trend at all, so the one-hour trend first appears an hour after the first reading, and the three-hour trends three hours after.
+DEFAULT_MINIMUM_COVERAGE = 0.9
 
-	@classmethod
-	def run(cls):
+# Whether present values out of a span of minutes meet a minimum coverage: a fraction of the readings a hub reporting every report_interval_minutes would have sent in it.
+def is_covered(present, span, minimum_coverage, report_interval_minutes = 1):
+	return present > 0 and present / max(span / report_interval_minutes, 1) >= minimum_coverage
+
+# One value per minute (epoch // 60), in a ring of slots indexed by minute % capacity, so the slots for any range of minutes are found without a search.
+# Each slot remembers which minute it holds, so a slot left over from an earlier lap, or never written, reads as missing. Only the first value put in a minute is kept.
+class MinuteSlots:
+
+	#
+	def __init__(self, capacity = 720):
 
 		#
-		while True:
+		self.capacity = capacity
+		self.newest_minute = None
 
-			# Try to create and bind the socket.
-			try:
+		# Missing values are NaN; slots never written hold minute -1.
+		self.__minutes = array.array('q', [-1]) * capacity
+		self.__values = array.array('d', [math.nan]) * capacity
 
-				# We're interested in UDP.
-				cls.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-				
-				# This allows us to rebind if needed and avoid a potential "Address already in use" error.
-				cls.__socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-				
-				# 50222 is the UDP port used by the Tempest hub to broadcast weather data.
-				cls.__socket.bind(('0.0.0.0', 50222))
+	# Returns False, keeping what's there, if the minute already has a value or is too old for the ring.
+	def put(self, minute, value):
 
-				# Start listening loop.
-				while True:
+		#
+		if self.newest_minute is not None and minute <= self.newest_minute - self.capacity: return False
 
-					#
-					try:
+		#
+		slot = minute % self.capacity
+		if self.__minutes[slot] == minute: return False
 
-						# This blocks until something is received.
-						bytes_from_tempest_hub, address = cls.__socket.recvfrom(4096)
+		#
+		self.__minutes[slot] = minute
+		self.__values[slot] = value if value is not None else math.nan
+		if self.newest_minute is None or minute > self.newest_minute: self.newest_minute = minute
 
-						#
-						cls.handle_data(bytes_from_tempest_hub)
+		#
+		return True
 
-					# 
-					except socket.error as e:
+	# The value for a minute, or None if it's missing.
+	def get(self, minute):
 
-						# Break out to reinitialize the socket.
-						break
+		#
+		slot = minute % self.capacity
+		if self.__minutes[slot] != minute: return None
 
-			#
-			except Exception as e:
+		#
+		value = self.__values[slot]
 
-				#
-				print(traceback.format_exc(), file = sys.stderr, flush = True)
+		#
+		return value if value == value else None
 
-			# Cleanup.
-			if cls.__socket:
+	# The values for first_minute through last_minute (inclusive), oldest first, with None for each missing minute.
+	def values(self, first_minute, last_minute):
+		return [self.get(minute) for minute in range(first_minute, last_minute + 1)]
 
-				# Try to close the socket before we dereference it.
-				try:
+# Incremental pressure statistics for the windows used by the pressure trend calculations. Every window is over minutes rather than observations: it's fed one slot per minute, with None for any minute nothing arrived in.
+# For every span we keep the whole window; for the advanced spans we also keep the first and last quarters of the window, where the first quarter is fed by values falling out of a delay line.
+# Behind them, the pressure for each of the last capacity minutes is kept in MinuteSlots, for spans that aren't kept incrementally.
+class PressureWindows:
 
-					# 
-					cls.__socket.close()
+	#
+	def __init__(self, change_spans = (60, 180), advanced_spans = (180,), capacity = 720):
 
-				#
-				except Exception:
-					pass
+		#
+		for span in advanced_spans:
+			if span < 4: raise ValueError('advanced spans must be at least 4 minutes')
 
-				# Dereference from memory.
-				cls.__socket = None
+		#
+		self.__windows = {span: RollingWindow(span, track_deviation = span in advanced_spans) for span in set(change_spans) | set(advanced_spans)}
+		self.__quarters = {}
+		self.__longest = max(self.__windows)
 
-			# Pause a bit before attempting to regain the lost connection.
-			time.sleep(5)
+		#
+		for span in advanced_spans:
+
+			# Mirrors the slices history[-span:-((span // 4) * 3)] and history[-(span // 4):].
+			lag = (span // 4) * 3
+			self.__quarters[span] = (deque(maxlen = lag), RollingWindow(span - lag, track_deviation = True), RollingWindow(span // 4, track_deviation = True))
+
+		#
+		self.slots = MinuteSlots(capacity)
+
+		# The newest minute the windows have a slot for, and the oldest minute anything was appended for, or None before the first.
+		self.minute = None
+		self.first_minute = None
 
 	#
-	@classmethod
-	def handle_data(cls, bytes_from_tempest_hub):
+	def has_change_span(self, span):
+		return span in self.__windows
+
+	#
+	def has_advanced_span(self, span):
+		return span in self.__quarters
+
+	# Adds the pressure for a minute, after marking every minute since the last one as missing. Returns False, adding nothing, if that minute already has a pressure or is too old for the minute slots.
+	# A minute that arrives late goes into its slot, and if it's inside the windows, they're rebuilt from the slots. That's O(longest span), but late packets are rare.
+	def append(self, minute, pressure_mb):
 
 		#
-		try:
+		if self.first_minute is None or minute < self.first_minute: self.first_minute = minute
 
-			#
-			data = json.loads(bytes_from_tempest_hub.decode('utf-8'))
+		#
+		if self.minute is not None and minute <= self.minute:
 
-			# Troubleshooting.
-			#print("received message from %s:%s — %s" % (address[0], address[1], bytes_from_tempest_hub))
+			#
+			if not self.slots.put(minute, pressure_mb): return False
 
-			# See: https://weatherflow.github.io/Tempest/api/udp/v143/
-			# We're only interested in general observation packets. Other packets report 'rapid_wind', 'hub_status', etc.
-			if data['type'] is None or data['type'] != 'obs_st': return
+			#
+			if minute > self.minute - self.__longest: self.__rebuild()
 
-			# See: https://weatherflow.github.io/Tempest/api/udp/v143/
 			#
-			# Index    Field                                     Units
-			# -------------------------------------------------------------------------------
-			#  0       Time Epoch                                Seconds
-			#  1       Wind Lull(minimum 3 second sample)        m / s
-			#  2       Wind Avg(average over report interval)    m / s
-			#  3       Wind Gust(maximum 3 second sample)        m / s
-			#  4       Wind Direction                            Degrees
-			#  5       Wind Sample Interval                      seconds
-			#  6       Station Pressure                          MB
-			#  7       Air Temperature                           C
-			#  8       Relative Humidity                         %
-			#  9       Illuminance                               Lux
-			# 10       UV                                        Index
-			# 11       Solar Radiation                           W / m ^ 2
-			# 12       Precip Accumulated                        mm
-			# 13       Precipitation Type                        0 = none, 1 = rain, 2 = hail
-			# 14       Lightning Strike Avg Distance             km
-			# 15       Lightning Strike Count
-			# 16       Battery                                   Volts
-			# 17       Report Interval                           Minutes
-			cls.last_updated_epoch = data['obs'][0][0] if data['obs'][0][0] is not None else None
-			cls.last_updated_iso_8601 = datetime.datetime.fromtimestamp(data['obs'][0][0]).utcnow().replace(tzinfo=datetime.timezone.utc, microsecond = 0).isoformat() if data['obs'][0][0] is not None else None
-			cls.lightning_detected = data['obs'][0][15] > 0 if data['obs'][0][15] is not None else None
-			cls.lightning_strike_average_distance_km = data['obs'][0][14] if data['obs'][0][14] is not None else None
-			cls.lightning_strike_average_distance_miles = float(round(decimal.Decimal(data['obs'][0][14] * 0.621371), 1)) if data['obs'][0][14] is not None else None
-			cls.pressure_inhg = float(round(decimal.Decimal(data['obs'][0][6] * 0.02953), 2)) if data['obs'][0][6] is not None else None
-			cls.pressure_mb = data['obs'][0][6] if data['obs'][0][6] is not None else None
-			pressure_trend_one_hour_mb = cls.get_pressure_change_mb_from(60)
-			cls.pressure_trend_one_hour_mb = float(round(pressure_trend_one_hour_mb, 2)) if pressure_trend_one_hour_mb is not None else None
-			cls.pressure_trend_one_hour_inhg = float(round(decimal.Decimal(cls.pressure_trend_one_hour_mb * 0.02953), 2)) if cls.pressure_trend_one_hour_mb is not None else None
-			cls.pressure_trend_one_hour_description = PressureTrend.fromOneHourObservation(cls.pressure_trend_one_hour_mb) if cls.pressure_trend_one_hour_mb is not None else None
-			pressure_trend_three_hours_mb = cls.get_pressure_change_mb_from(180)
-			cls.pressure_trend_three_hours_mb = float(round(pressure_trend_three_hours_mb, 2)) if pressure_trend_three_hours_mb is not None else None
-			cls.pressure_trend_three_hours_inhg = float(round(decimal.Decimal(cls.pressure_trend_three_hours_mb * 0.02953), 2)) if cls.pressure_trend_three_hours_mb is not None else None
-			cls.pressure_trend_three_hours_description = PressureTrend.fromThreeHourObservation(cls.pressure_trend_three_hours_mb) if cls.pressure_trend_three_hours_mb is not None else None
-			cls.pressure_trend_advanced_three_hours_description = cls.get_pressure_trend_advanced_from(180)
-			cls.precipitation_mm_per_minute = data['obs'][0][12] if data['obs'][0][12] is not None else None
-			cls.precipitation_inches_per_minute = float(round(decimal.Decimal(data['obs'][0][12] * 0.03937), 6)) if data['obs'][0][12] is not None else None
-			cls.precipitation_description = RainfallIntensity.fromValue(data['obs'][0][12]) if data['obs'][0][12] is not None else None
-			cls.precipitation_detected = data['obs'][0][12] > 0 if data['obs'][0][12] is not None else None
-			cls.precipitation_type = PrecipitationType(data['obs'][0][13]) if data['obs'][0][13] is not None else None
-			cls.relative_humidity = float(round(decimal.Decimal(data['obs'][0][8]), 1)) if data['obs'][0][8] is not None else None
-			cls.solar_radiation = data['obs'][0][11] if data['obs'][0][11] is not None else None
-			cls.temperature_c = data['obs'][0][7] if data['obs'][0][7] is not None else None
-			cls.temperature_f = float(round(decimal.Decimal(data['obs'][0][7] * 1.8 + 32), 1)) if data['obs'][0][7] is not None else None
-			cls.uv_index = data['obs'][0][10] if data['obs'][0][10] is not None else None
-			cls.uv_exposure_category = UltravioletExposureCategory.fromValue(data['obs'][0][10]) if data['obs'][0][10] is not None else None
-			cls.wind_gust_meters_per_second = data['obs'][0][3] if data['obs'][0][3] is not None else None
-			cls.wind_gust_miles_per_hour = float(round(decimal.Decimal(data['obs'][0][3] * 2.237), 1)) if data['obs'][0][3] is not None else None
-			cls.wind_gust_description = WindGust.fromValue(cls.wind_gust_miles_per_hour) if cls.wind_gust_miles_per_hour is not None else None
-
-			# Add to cache.
-			cls.__fifo_queue.append(cls.get_for_json())
+			return True
 
 		#
-		except Exception as e:
+		self.advance_to(minute - 1)
+		self.__push(pressure_mb)
+		self.minute = minute
 
-			#
-			print(traceback.format_exc(), file = sys.stderr, flush = True)
+		#
+		self.slots.put(minute, pressure_mb)
+
+		#
+		return True
+
+	# Marks every minute after the newest one up to (and including) minute as missing, so the windows end at minute. Used before deriving an observation, so its trends cover the minutes leading up to it.
+	def advance_to(self, minute):
+
+		#
+		if self.minute is None or minute <= self.minute: return
+
+		# Nothing in any window would survive, which is the same as starting over.
+		if minute - self.minute >= self.__longest:
+			self.__clear_windows()
+		else:
+			for _ in range(minute - self.minute): self.__push(None)
+
+		#
+		self.minute = minute
 
 	#
-	@classmethod
-	def get_pressure_change_mb_from(cls, minutes_ago):
+	def __push(self, pressure_mb):
 
 		#
-		try:
+		for window in self.__windows.values():
+			window.push(pressure_mb)
 
-			#
-			if cls.pressure_mb is None: return None
+		#
+		for delay_line, first_quarter, last_quarter in self.__quarters.values():
 
-			# This works because the Tempest hub sends updates once per minute. So we use the index of the updates themselves to get the correct entries; no need to mess around with timestamps.
-			# Slice notation negative indexes allow us to take n-last elements from a list.
-			history_from_minutes_ago = list(cls.__fifo_queue)[-minutes_ago:]
+			# Values leaving the delay line are the ones entering the first quarter.
+			if len(delay_line) == delay_line.maxlen: first_quarter.push(delay_line[0])
+			delay_line.append(pressure_mb)
+			last_quarter.push(pressure_mb)
 
-			# We're only interested in pressure_mb.
-			# List comprehension allows us to create a list of specific dictionary key values culled from a list of dictionary objects.
-			historical_pressure_mb = [i['pressure_mb'] for i in history_from_minutes_ago]
+	# Refills the windows from the minute slots, ending at the newest minute.
+	def __rebuild(self):
 
-			# Validate that we have enough data.
-			if len(historical_pressure_mb) < minutes_ago: return None
+		#
+		self.__clear_windows()
 
-			# Using min/max lets us better handle cases where the pressure fell after slightly rising, or rose after slightly falling.
-			# In such cases, the change is potentially greater than if we merely used the initial starting point.
-			min_pressure_mb = min(historical_pressure_mb)
-			max_pressure_mb = max(historical_pressure_mb)
+		#
+		for value in self.values(self.__longest):
+			self.__push(value)
 
-			# Rise has a positive value; fall has a negative value.
-			change_from_min = cls.pressure_mb - min_pressure_mb
-			change_from_max = cls.pressure_mb - max_pressure_mb
+	#
+	def __clear_windows(self):
 
-			# Return the largest magnitude of change.
-			if (max(abs(change_from_min), abs(change_from_max)) == abs(change_from_min)):
-				return change_from_min
-			else:
-				return change_from_max
+		#
+		for span, window in self.__windows.items():
+			self.__windows[span] = RollingWindow(span, track_deviation = window._track_deviation)
 
 		#
-		except Exception as e:
+		for span, (delay_line, first_quarter, last_quarter) in self.__quarters.items():
+			self.__quarters[span] = (deque(maxlen = delay_line.maxlen), RollingWindow(first_quarter.span, track_deviation = True), RollingWindow(last_quarter.span, track_deviation = True))
 
-			#
-			print(traceback.format_exc(), file = sys.stderr, flush = True)
+	#
+	def clear(self):
+		self.__init__(tuple(self.__windows), tuple(self.__quarters), self.slots.capacity)
 
-	# Here we attempt to analyze curves with some very simplistic rules, and without importing big gun packages like NumPy and SciPy.
-	# It works because pressure curves generally fall into a finite number of patterns for the time range we're using. Zoom out and all bets are off!
-	@classmethod
-	def get_pressure_trend_advanced_from(cls, minutes_ago):
+	# Whether every one of the span minutes ending with last_minute (by default the newest) comes after the first minute anything was appended for. Until then there's no telling gaps from minutes before we started.
+	def is_full(self, span, last_minute = None):
 
 		#
-		try:
+		if last_minute is None: last_minute = self.minute
+
+		#
+		return self.first_minute is not None and last_minute is not None and last_minute - span + 1 >= self.first_minute
 
-			# This works because the Tempest hub sends updates once per minute. So we use the index of the updates themselves to get the correct entries; no need to mess around with timestamps.
-			# Slice notation negative indexes allow us to take n-last elements from a list.
-			history_from_minutes_ago = list(cls.__fifo_queue)[-minutes_ago:]
-
-			# We're only interested in pressure_mb.
-			# List comprehension allows us to create an aggregated list of specific dictionary key values culled from a list of dictionary objects.
-			historical_pressure_mb = [i['pressure_mb'] for i in history_from_minutes_ago]
-
-			# Validate that we have enough data.
-			if len(historical_pressure_mb) < minutes_ago: return None
-
-			# We also want to examine the first and last quarters of data to detect areas of flatness.
-			# Slice notation negative indexes allow us to take n-last elements from a list.
-			first_quarter_historical_pressure_mb = historical_pressure_mb[-minutes_ago:-((minutes_ago // 4) * 3)]
-			last_quarter_historical_pressure_mb = historical_pressure_mb[-(minutes_ago // 4):]
-
-			# Critical values that will help us to characterize the pressure curve.
-			min_pressure_mb = min(historical_pressure_mb)
-			max_pressure_mb = max(historical_pressure_mb)
-			variance_mb = statistics.pstdev(historical_pressure_mb)
-			variance_of_first_quarter_mb = statistics.pstdev(first_quarter_historical_pressure_mb)
-			variance_of_last_quarter_mb = statistics.pstdev(last_quarter_historical_pressure_mb)
-			equals_tolerance_mb = (PressureTrend.STEADY.b_mb_change_per_three_hours - PressureTrend.STEADY.a_mb_change_per_three_hours) / 2
-
-			# Simplify booleans for clarity.
-			# Here we set our scale/sensitivity thresholds and make use of math.isclose() to add some fuzziness.
-			# Zoomed in, even a relatively flat curve may appear highly variable. But zoom out too much and everything looks flat.
-			# The scale we're interested in is approximately a 6-millibar range (based on the values we use in our PressureTrend enum)
-			all_steady = math.isclose(variance_mb, 0, abs_tol = equals_tolerance_mb / 4)
-			current_pressure_equals_max = math.isclose(cls.pressure_mb, max_pressure_mb, abs_tol = equals_tolerance_mb)
-			current_pressure_equals_min = math.isclose(cls.pressure_mb, min_pressure_mb, abs_tol = equals_tolerance_mb)
-			current_pressure_greater_than_min = cls.pressure_mb > min_pressure_mb and math.isclose(cls.pressure_mb, min_pressure_mb, abs_tol = equals_tolerance_mb) is False
-			current_pressure_less_than_max = cls.pressure_mb < max_pressure_mb and math.isclose(cls.pressure_mb, max_pressure_mb, abs_tol = equals_tolerance_mb) is False
-			ends_steady = math.isclose(variance_of_last_quarter_mb, 0, abs_tol = equals_tolerance_mb / 8)
-			ends_unsteady = ends_steady is False
-			past_pressure_equals_max = math.isclose(historical_pressure_mb[0], max_pressure_mb, abs_tol = equals_tolerance_mb)
-			past_pressure_equals_min = math.isclose(historical_pressure_mb[0], min_pressure_mb, abs_tol = equals_tolerance_mb)
-			past_pressure_greater_than_current = historical_pressure_mb[0] > cls.pressure_mb and math.isclose(historical_pressure_mb[0], cls.pressure_mb, abs_tol = equals_tolerance_mb) is False
-			past_pressure_greater_than_min = historical_pressure_mb[0] > min_pressure_mb and math.isclose(historical_pressure_mb[0], min_pressure_mb, abs_tol = equals_tolerance_mb) is False
-			past_pressure_less_than_current = historical_pressure_mb[0] < cls.pressure_mb and math.isclose(historical_pressure_mb[0], cls.pressure_mb, abs_tol = equals_tolerance_mb) is False
-			past_pressure_less_than_max = historical_pressure_mb[0] < max_pressure_mb and math.isclose(historical_pressure_mb[0], max_pressure_mb, abs_tol = equals_tolerance_mb) is False
-			starts_steady = math.isclose(variance_of_first_quarter_mb, 0, abs_tol = equals_tolerance_mb / 8)
-			starts_unsteady = starts_steady is False
-
-			# CONTINUOUSLY_FALLING
-			if starts_unsteady and past_pressure_greater_than_current and past_pressure_equals_max and current_pressure_equals_min and ends_unsteady:
-				return PressureTrendAdvanced.CONTINUOUSLY_FALLING
-
-			# CONTINUOUSLY_RISING
-			elif starts_unsteady and past_pressure_less_than_current and past_pressure_equals_min and current_pressure_equals_max and ends_unsteady:
-				return PressureTrendAdvanced.CONTINUOUSLY_RISING
-
-			# FALLING_THEN_SLIGHTLY_RISING
-			elif starts_unsteady and past_pressure_greater_than_current and current_pressure_greater_than_min and ends_unsteady:
-				return PressureTrendAdvanced.FALLING_THEN_SLIGHTLY_RISING
-
-			# FALLING_THEN_STEADY
-			elif starts_unsteady and past_pressure_greater_than_current and current_pressure_equals_min and ends_steady:
-				return PressureTrendAdvanced.FALLING_THEN_STEADY
-
-			# RISING_THEN_SLIGHTLY_FALLING
-			elif starts_unsteady and past_pressure_less_than_current and current_pressure_less_than_max and ends_unsteady:
-				return PressureTrendAdvanced.RISING_THEN_SLIGHTLY_FALLING
-
-			# RISING_THEN_STEADY
-			elif starts_unsteady and past_pressure_less_than_current and current_pressure_equals_max and ends_steady:
-				return PressureTrendAdvanced.RISING_THEN_STEADY
-
-			# SLIGHTLY_FALLING_THEN_RISING
-			elif starts_unsteady and past_pressure_greater_than_min and past_pressure_less_than_current and current_pressure_equals_max and ends_unsteady:
-				return PressureTrendAdvanced.SLIGHTLY_FALLING_THEN_RISING
-
-			# SLIGHTLY_RISING_THEN_FALLING
-			elif starts_unsteady and past_pressure_less_than_max and past_pressure_greater_than_current and current_pressure_equals_min and ends_unsteady:
-				return PressureTrendAdvanced.SLIGHTLY_RISING_THEN_FALLING
-
-			# STEADY
-			elif all_steady:
-				return PressureTrendAdvanced.STEADY
-
-			# STEADY_THEN_FALLING
-			elif starts_steady and past_pressure_greater_than_current and current_pressure_equals_min and ends_unsteady:
-				return PressureTrendAdvanced.STEADY_THEN_FALLING
-
-			# STEADY_THEN_RISING
-			elif starts_steady and past_pressure_less_than_current and current_pressure_equals_max and ends_unsteady:
-				return PressureTrendAdvanced.STEADY_THEN_RISING
-
-			# UNSTEADY_OR_INCONCLUSIVE
-			else: return PressureTrendAdvanced.UNSTEADY_OR_INCONCLUSIVE
+	# Returns (minimum, maximum) over the window, or None if it reaches back before the first minute, or too few of its minutes have a value, for a hub reporting every report_interval_minutes.
+	def extremes(self, span, minimum_coverage = DEFAULT_MINIMUM_COVERAGE, report_interval_minutes = 1):
 
 		#
-		except Exception as e:
+		window = self.__windows[span]
+		if not self.is_full(span) or not is_covered(window.present(), span, minimum_coverage, report_interval_minutes): return None
 
-			#
-			print(traceback.format_exc(), file = sys.stderr, flush = True)
+		#
+		return window.minimum(), window.maximum()
 
-# Main function is executed only when run as a Python program, not when imported as a module.
-def main():
+	# Returns (oldest, minimum, maximum, deviation, deviation_of_first_quarter, deviation_of_last_quarter), or None if the window reaches back before the first minute, or too few of the minutes in it, or in either quarter of it, have a value, for a hub reporting every report_interval_minutes.
+	def statistics(self, span, minimum_coverage = DEFAULT_MINIMUM_COVERAGE, report_interval_minutes = 1):
+
+		#
+		if not self.is_full(span): return None
+
+		#
+		window = self.__windows[span]
+		delay_line, first_quarter, last_quarter = self.__quarters[span]
+
+		#
+		for part in (window, first_quarter, last_quarter):
+			if not is_covered(part.present(), part.span, minimum_coverage, report_interval_minutes): return None
+
+		#
+		return window.oldest(), window.minimum(), window.maximum(), window.pstdev(), first_quarter.pstdev(), last_quarter.pstdev()
+
+	# The pressure for each of the span minutes ending with last_minute (by default the newest), oldest first, with None for missing minutes. For spans that aren't kept incrementally, or windows that end earlier.
+	def values(self, span, last_minute = None):
+
+		#
+		if last_minute is None: last_minute = self.minute
+		if last_minute is None: return []
+
+		#
+		return self.slots.values(last_minute - span + 1, last_minute)
+
+# Wind from rapid_wind packets (one every 3 seconds), as a compact ring of (epoch, speed, direction) samples with rolling aggregates over the last few minutes of it.
+# Each span keeps running sums of speed and of the wind vector's components, and a monotonic deque of sample numbers for the peak gust, so a sample costs O(1) (amortized) and allocates nothing but its deque entry.
+# Direction is averaged as a vector weighted by speed, so 350° and 10° average to 0° rather than 180°, and calm samples don't pull the average toward north.
+# Spans are measured back from the newest sample's epoch. Samples must arrive in time order; any that don't are counted and ignored.
+class RapidWindRing:
 
 	#
-	tempestWeatherHelper = TempestWeatherHelper()
-	tempestWeatherHelper.start()
+	def __init__(self, capacity = 512, spans = (120, 600)):
+
+		#
+		self.capacity = capacity
+		self.spans = tuple(spans)
+		self.out_of_order = 0
+
+		# Sample number n (counting from 0 since we started) lives in slot n % capacity.
+		self.__count = 0
+		self.__epochs = array.array('q', [0]) * capacity
+		self.__speeds = array.array('d', [0.0]) * capacity
+		self.__directions = array.array('d', [0.0]) * capacity
+		self.__easts = array.array('d', [0.0]) * capacity
+		self.__norths = array.array('d', [0.0]) * capacity
+
+		# Per span: the number of the oldest sample in it, the running sums, and the sample numbers that could still be its peak, largest speed first.
+		self.__firsts = [0] * len(self.spans)
+		self.__speed_sums = [0.0] * len(self.spans)
+		self.__east_sums = [0.0] * len(self.spans)
+		self.__north_sums = [0.0] * len(self.spans)
+		self.__peaks = [deque() for span in self.spans]
+
+		# Samples arrive on the processing thread and are read from any other.
+		self.__lock = threading.Lock()
 
 	#
-	while True:
+	def __len__(self):
+		return min(self.__count, self.capacity)
+
+	# Bytes used by the sample storage itself.
+	def nbytes(self):
+		return sum(column.itemsize * len(column) for column in (self.__epochs, self.__speeds, self.__directions, self.__easts, self.__norths))
+
+	# Adds a sample. Returns False (and counts it) if it isn't newer than the last one.
+	def append(self, epoch, speed_meters_per_second, direction_degrees):
+
+		#
+		with self.__lock:
+
+			#
+			number = self.__count
+			capacity = self.capacity
+
+			#
+			if number and epoch <= self.__epochs[(number - 1) % capacity]:
+				self.out_of_order += 1
+				return False
+
+			# Any span still holding the sample we're about to overwrite lets it go first.
+			if number >= capacity:
+				for index in range(len(self.spans)):
+					if self.__firsts[index] <= number - capacity: self.__evict(index, number - capacity + 1)
+
+			#
+			radians = math.radians(direction_degrees)
+			east = speed_meters_per_second * math.sin(radians)
+			north = speed_meters_per_second * math.cos(radians)
+
+			#
+			slot = number % capacity
+			self.__epochs[slot] = epoch
+			self.__speeds[slot] = speed_meters_per_second
+			self.__directions[slot] = direction_degrees
+			self.__easts[slot] = east
+			self.__norths[slot] = north
+			self.__count = number + 1
+
+			#
+			for index, span in enumerate(self.spans):
+
+				#
+				self.__speed_sums[index] += speed_meters_per_second
+				self.__east_sums[index] += east
+				self.__north_sums[index] += north
+
+				# A new sample makes every slower one before it irrelevant for the peak.
+				peaks = self.__peaks[index]
+				while peaks and self.__speeds[peaks[-1] % capacity] <= speed_meters_per_second: peaks.pop()
+				peaks.append(number)
+
+				# Let go of whatever has slid out of the span.
+				first = self.__firsts[index]
+				while self.__epochs[first % capacity] <= epoch - span: first += 1
+				if first != self.__firsts[index]: self.__evict(index, first)
+
+				# Once a lap, re-sum from the samples themselves, so rounding error from all the adding and subtracting can't build up.
+				if slot == 0: self.__resum(index)
+
+			#
+			return True
+
+	# Drops samples from the front of a span, up to (not including) sample number first.
+	def __evict(self, index, first):
+
+		#
+		capacity = self.capacity
 
 		#
-		print(tempestWeatherHelper.get_for_json(), file = sys.stdout, flush = True)
+		for number in range(self.__firsts[index], first):
+			slot = number % capacity
+			self.__speed_sums[index] -= self.__speeds[slot]
+			self.__east_sums[index] -= self.__easts[slot]
+			self.__north_sums[index] -= self.__norths[slot]
 
 		#
-		time.sleep(55)
+		self.__firsts[index] = first
+
+		#
+		peaks = self.__peaks[index]
+		while peaks and peaks[0] < first: peaks.popleft()
+
+		#
+		if first == self.__count: self.__resum(index)
+
+	#
+	def __resum(self, index):
+
+		#
+		slots = [number % self.capacity for number in range(self.__firsts[index], self.__count)]
+
+		#
+		self.__speed_sums[index] = math.fsum(self.__speeds[slot] for slot in slots)
+		self.__east_sums[index] = math.fsum(self.__easts[slot] for slot in slots)
+		self.__north_sums[index] = math.fsum(self.__norths[slot] for slot in slots)
+
+	# (epoch of the newest sample, average speed in m/s, vector-averaged direction in degrees or None if there's no wind) over span (by default the longest), or None before the first sample.
+	def average(self, span = None):
+
+		#
+		index = self.spans.index(max(self.spans) if span is None else span)
+
+		#
+		with self.__lock:
+
+			#
+			samples = self.__count - self.__firsts[index]
+			if samples == 0: return None
+
+			#
+			east, north = self.__east_sums[index], self.__north_sums[index]
+			direction = math.degrees(math.atan2(east, north)) % 360 if math.hypot(east, north) > 1e-9 * samples else None
+
+			#
+			return (self.__epochs[(self.__count - 1) % self.capacity], self.__speed_sums[index] / samples, direction)
+
+	# The newest sample and every span's aggregates, in get_for_json() form. Speeds are in m/s as the hub sends them, and in mph, rounded the same way obs_st values are; the peak gust is classified with the same WindGust table.
+	def for_json(self):
+
+		#
+		with self.__lock:
+
+			#
+			data = {'last_updated_epoch': None, 'wind_speed_meters_per_second': None, 'wind_direction_degrees': None, 'out_of_order': self.out_of_order}
+
+			#
+			if self.__count:
+				slot = (self.__count - 1) % self.capacity
+				data.update(last_updated_epoch = self.__epochs[slot], wind_speed_meters_per_second = self.__speeds[slot], wind_direction_degrees = round(self.__directions[slot]))
+
+			#
+			for index, span in enumerate(self.spans):
+				data['last_' + self.__span_name(span)] = self.__span_for_json(index)
+
+			#
+			return data
+
+	#
+	@staticmethod
+	def __span_name(span):
+		return '%d_minutes' % (span // 60) if span % 60 == 0 else '%d_seconds' % span
+
+	#
+	def __span_for_json(self, index):
+
+		#
+		samples = self.__count - self.__firsts[index]
+		if samples == 0: return {'samples': 0, 'wind_average_meters_per_second': None, 'wind_average_miles_per_hour': None, 'wind_direction_degrees': None, 'wind_gust_meters_per_second': None, 'wind_gust_miles_per_hour': None, 'wind_gust_description': None}
+
+		#
+		average = self.__speed_sums[index] / samples
+		gust = self.__speeds[self.__peaks[index][0] % self.capacity]
+		gust_miles_per_hour = round(gust * DerivedFieldEngine.MPH_PER_METERS_PER_SECOND, 1)
+		wind_gust_description = WIND_GUST_TABLE.classify(gust_miles_per_hour)
+
+		# With no wind at all, there's no direction to speak of.
+		east, north = self.__east_sums[index], self.__north_sums[index]
+		direction = round(math.degrees(math.atan2(east, north))) % 360 if math.hypot(east, north) > 1e-9 * samples else None
+
+		#
+		return {'samples': samples, 'wind_average_meters_per_second': round(average, 2), 'wind_average_miles_per_hour': round(average * DerivedFieldEngine.MPH_PER_METERS_PER_SECOND, 1), 'wind_direction_degrees': direction, 'wind_gust_meters_per_second': gust, 'wind_gust_miles_per_hour': gust_miles_per_hour, 'wind_gust_description': wind_gust_description.name.replace('_', ' ') if wind_gust_description is not None else None}
+
+# ISO 8601 (UTC, whole seconds) for a Unix epoch.
+def iso_8601_from_epoch(epoch):
+	return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).replace(microsecond = 0).isoformat() if epoch is not None else None
+
+# The fields of a cached observation, in get_for_json() order: (key, array typecode, kind).
+# Kind is 'number', 'integer' (stored as a double but reported as an int), 'boolean', 'epoch', 'iso_8601' (derived from the epoch, not stored), or an enum class (stored as the member's ordinal).
+OBSERVATION_FIELDS = (
+	('last_updated_epoch', 'q', 'epoch'),
+	('last_updated_iso_8601', None, 'iso_8601'),
+	('lightning_detected', 'b', 'boolean'),
+	('lightning_strike_average_distance_km', 'd', 'integer'),
+	('lightning_strike_average_distance_miles', 'd', 'number'),
+	('pressure_inhg', 'd', 'number'),
+	('pressure_mb', 'd', 'number'),
+	('pressure_trend_advanced_three_hours_description', 'b', PressureTrendAdvanced),
+	('pressure_trend_one_hour_description', 'b', PressureTrend),
+	('pressure_trend_three_hours_description', 'b', PressureTrend),
+	('pressure_trend_one_hour_inhg', 'd', 'number'),
+	('pressure_trend_one_hour_mb', 'd', 'number'),
+	('pressure_trend_three_hours_inhg', 'd', 'number'),
+	('pressure_trend_three_hours_mb', 'd', 'number'),
+	('precipitation_inches_per_minute', 'd', 'number'),
+	('precipitation_mm_per_minute', 'd', 'number'),
+	('precipitation_description', 'b', RainfallIntensity),
+	('precipitation_detected', 'b', 'boolean'),
+	('precipitation_type', 'b', PrecipitationType),
+	('relative_humidity', 'd', 'number'),
+	('solar_radiation', 'd', 'integer'),
+	('temperature_c', 'd', 'number'),
+	('temperature_f', 'd', 'number'),
+	('uv_exposure_category', 'b', UltravioletExposureCategory),
+	('uv_index', 'd', 'number'),
+	('wind_gust_description', 'b', WindGust),
+	('wind_gust_meters_per_second', 'd', 'number'),
+	('wind_gust_miles_per_hour', 'd', 'number'),
+)
+
+# A single observation: the raw hub values plus everything we derive from them. Instances are immutable, so a reference to one is always a consistent record.
+# handle_data() builds a new Observation off to the side and then publishes it with a single reference swap; readers never see a half-written record.
+class Observation:
+
+	#
+	__slots__ = tuple(key for key, typecode, kind in OBSERVATION_FIELDS)
+
+	#
+	def __init__(self, **values):
+
+		#
+		for key in self.__slots__:
+			object.__setattr__(self, key, values.pop(key, None))
+
+		#
+		if values: raise TypeError('unknown observation fields: ' + ', '.join(sorted(values)))
+
+	#
+	def __setattr__(self, key, value):
+		raise AttributeError('Observation is immutable')
+
+	#
+	def __delattr__(self, key):
+		raise AttributeError('Observation is immutable')
+
+	#
+	def __eq__(self, other):
+		return isinstance(other, Observation) and all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+	#
+	def __hash__(self):
+		return hash(tuple(getattr(self, key) for key in self.__slots__))
+
+	#
+	def __repr__(self):
+		return 'Observation(' + ', '.join('{0}={1!r}'.format(key, getattr(self, key)) for key in self.__slots__) + ')'
+
+	# Note it's for_json()—not json(). Enums become their descriptions, but values are otherwise left as Python objects.
+	def for_json(self):
+
+		#
+		data = {}
+		data['last_updated_epoch'] = self.last_updated_epoch if self.last_updated_epoch is not None else None
+		data['last_updated_iso_8601'] = self.last_updated_iso_8601 if self.last_updated_iso_8601 is not None else None
+		data['lightning_detected'] = self.lightning_detected if self.lightning_detected is not None else None
+		data['lightning_strike_average_distance_km'] = self.lightning_strike_average_distance_km if self.lightning_strike_average_distance_km is not None else None
+		data['lightning_strike_average_distance_miles'] = self.lightning_strike_average_distance_miles if self.lightning_strike_average_distance_miles is not None else None
+		data['pressure_inhg'] = self.pressure_inhg if self.pressure_inhg is not None else None
+		data['pressure_mb'] = self.pressure_mb if self.pressure_mb is not None else None
+		data['pressure_trend_advanced_three_hours_description'] = self.pressure_trend_advanced_three_hours_description.name.replace('_', ' ') if self.pressure_trend_advanced_three_hours_description is not None else None
+		data['pressure_trend_one_hour_description'] = self.pressure_trend_one_hour_description.name.replace('_', ' ') if self.pressure_trend_one_hour_description is not None else None
+		data['pressure_trend_three_hours_description'] = self.pressure_trend_three_hours_description.name.replace('_', ' ') if self.pressure_trend_three_hours_description is not None else None
+		data['pressure_trend_one_hour_inhg'] = self.pressure_trend_one_hour_inhg if self.pressure_trend_one_hour_inhg is not None else None
+		data['pressure_trend_one_hour_mb'] = self.pressure_trend_one_hour_mb if self.pressure_trend_one_hour_mb is not None else None
+		data['pressure_trend_three_hours_inhg'] = self.pressure_trend_three_hours_inhg if self.pressure_trend_three_hours_inhg is not None else None
+		data['pressure_trend_three_hours_mb'] = self.pressure_trend_three_hours_mb if self.pressure_trend_three_hours_mb is not None else None
+		data['precipitation_inches_per_minute'] = '{0:.6f}'.format(self.precipitation_inches_per_minute) if (self.precipitation_inches_per_minute is not None and self.precipitation_inches_per_minute != 0) else self.precipitation_inches_per_minute if self.precipitation_inches_per_minute is not None else None
+		data['precipitation_mm_per_minute'] = self.precipitation_mm_per_minute if self.precipitation_mm_per_minute is not None else None
+		data['precipitation_description'] = self.precipitation_description.name.replace('_', ' ') if self.precipitation_description is not None else None
+		data['precipitation_detected'] = self.precipitation_detected if self.precipitation_detected is not None else None
+		data['precipitation_type'] = self.precipitation_type.name.replace('_', ' ') if self.precipitation_type is not None else None
+		data['relative_humidity'] = self.relative_humidity if self.relative_humidity is not None else None
+		data['solar_radiation'] = self.solar_radiation if self.solar_radiation is not None else None
+		data['temperature_c'] = self.temperature_c if self.temperature_c is not None else None
+		data['temperature_f'] = self.temperature_f if self.temperature_f is not None else None
+		data['uv_exposure_category'] = self.uv_exposure_category.name.replace('_', ' ') if self.uv_exposure_category is not None else None
+		data['uv_index'] = self.uv_index if self.uv_index is not None else None
+		data['wind_gust_description'] = self.wind_gust_description.name.replace('_', ' ') if self.wind_gust_description is not None else None
+		data['wind_gust_meters_per_second'] = self.wind_gust_meters_per_second if self.wind_gust_meters_per_second is not None else None
+		data['wind_gust_miles_per_hour'] = self.wind_gust_miles_per_hour if self.wind_gust_miles_per_hour is not None else None
+
+		#
+		return data
+
+# The observation published before any hub data arrives.
+EMPTY_OBSERVATION = Observation()
+
+# Turns raw obs_st rows into the fields of an Observation.
+# Classification uses the precomputed threshold tables, and rounding uses round(), which rounds the float's exact binary value half-to-even—the same result decimal.Decimal gave us, without the Decimal.
+class DerivedFieldEngine:
+
+	# Unit conversion factors.
+	MILES_PER_KM = 0.621371
+	INHG_PER_MB = 0.02953
+	INCHES_PER_MM = 0.03937
+	MPH_PER_METERS_PER_SECOND = 2.237
+
+	# Everything that can be derived from a single obs row, i.e. all but the pressure trends, which need history.
+	# See: https://weatherflow.github.io/Tempest/api/udp/v143/
+	#
+	# Index    Field                                     Units
+	# -------------------------------------------------------------------------------
+	#  0       Time Epoch                                Seconds
+	#  1       Wind Lull(minimum 3 second sample)        m / s
+	#  2       Wind Avg(average over report interval)    m / s
+	#  3       Wind Gust(maximum 3 second sample)        m / s
+	#  4       Wind Direction                            Degrees
+	#  5       Wind Sample Interval                      seconds
+	#  6       Station Pressure                          MB
+	#  7       Air Temperature                           C
+	#  8       Relative Humidity                         %
+	#  9       Illuminance                               Lux
+	# 10       UV                                        Index
+	# 11       Solar Radiation                           W / m ^ 2
+	# 12       Precip Accumulated                        mm
+	# 13       Precipitation Type                        0 = none, 1 = rain, 2 = hail
+	# 14       Lightning Strike Avg Distance             km
+	# 15       Lightning Strike Count
+	# 16       Battery                                   Volts
+	# 17       Report Interval                           Minutes
+	@classmethod
+	def derive(cls, obs):
+
+		#
+		values = {}
+		values['last_updated_epoch'] = obs[0]
+		values['last_updated_iso_8601'] = iso_8601_from_epoch(obs[0])
+		values['lightning_detected'] = obs[15] > 0 if obs[15] is not None else None
+		values['lightning_strike_average_distance_km'] = obs[14]
+		values['lightning_strike_average_distance_miles'] = round(obs[14] * cls.MILES_PER_KM, 1) if obs[14] is not None else None
+		values['pressure_inhg'] = round(obs[6] * cls.INHG_PER_MB, 2) if obs[6] is not None else None
+		values['pressure_mb'] = obs[6]
+		values['precipitation_mm_per_minute'] = obs[12]
+		values['precipitation_inches_per_minute'] = round(obs[12] * cls.INCHES_PER_MM, 6) if obs[12] is not None else None
+		values['precipitation_description'] = RAINFALL_INTENSITY_TABLE.classify(obs[12])
+		values['precipitation_detected'] = obs[12] > 0 if obs[12] is not None else None
+		values['precipitation_type'] = PrecipitationType(obs[13]) if obs[13] is not None else None
+		values['relative_humidity'] = round(float(obs[8]), 1) if obs[8] is not None else None
+		values['solar_radiation'] = obs[11]
+		values['temperature_c'] = obs[7]
+		values['temperature_f'] = round(obs[7] * 1.8 + 32, 1) if obs[7] is not None else None
+		values['uv_index'] = obs[10]
+		values['uv_exposure_category'] = ULTRAVIOLET_EXPOSURE_CATEGORY_TABLE.classify(obs[10])
+		values['wind_gust_meters_per_second'] = obs[3]
+		values['wind_gust_miles_per_hour'] = round(obs[3] * cls.MPH_PER_METERS_PER_SECOND, 1) if obs[3] is not None else None
+		values['wind_gust_description'] = WIND_GUST_TABLE.classify(values['wind_gust_miles_per_hour'])
+
+		#
+		return values
+
+	# The pressure trend fields, from the one- and three-hour changes and the advanced trend.
+	@classmethod
+	def derive_pressure_trends(cls, one_hour_mb, three_hours_mb, advanced):
+
+		#
+		one_hour_mb = float(round(one_hour_mb, 2)) if one_hour_mb is not None else None
+		three_hours_mb = float(round(three_hours_mb, 2)) if three_hours_mb is not None else None
+
+		#
+		values = {}
+		values['pressure_trend_one_hour_mb'] = one_hour_mb
+		values['pressure_trend_one_hour_inhg'] = round(one_hour_mb * cls.INHG_PER_MB, 2) if one_hour_mb is not None else None
+		values['pressure_trend_one_hour_description'] = PRESSURE_TREND_ONE_HOUR_TABLE.classify(one_hour_mb)
+		values['pressure_trend_three_hours_mb'] = three_hours_mb
+		values['pressure_trend_three_hours_inhg'] = round(three_hours_mb * cls.INHG_PER_MB, 2) if three_hours_mb is not None else None
+		values['pressure_trend_three_hours_description'] = PRESSURE_TREND_THREE_HOURS_TABLE.classify(three_hours_mb)
+		values['pressure_trend_advanced_three_hours_description'] = advanced
+
+		#
+		return values
+
+	# derive_pressure_trends() for a batch of rows, a column at a time. Returns a dict of columns keyed like it.
+	@classmethod
+	def derive_pressure_trends_batch(cls, one_hour_mb, three_hours_mb, advanced):
+
+		#
+		one_hour_mb = [float(round(value, 2)) if value is not None else None for value in one_hour_mb]
+		three_hours_mb = [float(round(value, 2)) if value is not None else None for value in three_hours_mb]
+
+		#
+		columns = {}
+		columns['pressure_trend_one_hour_mb'] = one_hour_mb
+		columns['pressure_trend_one_hour_inhg'] = [round(value * cls.INHG_PER_MB, 2) if value is not None else None for value in one_hour_mb]
+		columns['pressure_trend_one_hour_description'] = [PRESSURE_TREND_ONE_HOUR_TABLE.classify(value) for value in one_hour_mb]
+		columns['pressure_trend_three_hours_mb'] = three_hours_mb
+		columns['pressure_trend_three_hours_inhg'] = [round(value * cls.INHG_PER_MB, 2) if value is not None else None for value in three_hours_mb]
+		columns['pressure_trend_three_hours_description'] = [PRESSURE_TREND_THREE_HOURS_TABLE.classify(value) for value in three_hours_mb]
+		columns['pressure_trend_advanced_three_hours_description'] = list(advanced)
+
+		#
+		return columns
+
+	# Derives N obs rows in one pass. Returns a dict of columns (lists, with None for missing values) keyed like derive(), or, with stored_only, without the fields that are derived again when read (the ISO 8601 time).
+	# Everything is computed a column at a time: with NumPy when it's installed, otherwise in pure Python. Both give the same results as derive() row by row.
+	@classmethod
+	def derive_batch(cls, obs_rows, stored_only = False):
+
+		#
+		obs_rows = list(obs_rows)
+
+		# Raw values pass straight through, so they keep the types the hub sent.
+		def raw(index):
+			return [obs[index] for obs in obs_rows]
+
+		#
+		epochs, wind_gusts_meters_per_second, pressures_mb, temperatures_c, relative_humidities, uv_indexes, precipitations_mm, lightning_distances_km, lightning_counts = (raw(index) for index in (0, 3, 6, 7, 8, 10, 12, 14, 15))
+
+		#
+		columns = {}
+		columns['last_updated_epoch'] = epochs
+		if not stored_only: columns['last_updated_iso_8601'] = [iso_8601_from_epoch(epoch) for epoch in epochs]
+
+		# Everything derived. With NumPy, None becomes NaN and back.
+		if numpy is not None and obs_rows:
+
+			#
+			matrix = numpy.array([obs[:18] for obs in obs_rows], dtype = float)
+
+			#
+			def to_list(values):
+				return [None if value != value else value for value in values.tolist()]
+
+			#
+			def to_booleans(values):
+				return [None if value != value else value > 0 for value in values.tolist()]
+
+			#
+			wind_gust_miles_per_hour = cls.round_array(matrix[:, 3] * cls.MPH_PER_METERS_PER_SECOND, 1)
+
+			#
+			lightning_detected = to_booleans(matrix[:, 15])
+			lightning_strike_average_distance_miles = to_list(cls.round_array(matrix[:, 14] * cls.MILES_PER_KM, 1))
+			pressure_inhg = to_list(cls.round_array(matrix[:, 6] * cls.INHG_PER_MB, 2))
+			precipitation_inches_per_minute = to_list(cls.round_array(matrix[:, 12] * cls.INCHES_PER_MM, 6))
+			precipitation_description = RAINFALL_INTENSITY_TABLE.classify_array(matrix[:, 12])
+			precipitation_detected = to_booleans(matrix[:, 12])
+			relative_humidity = to_list(cls.round_array(matrix[:, 8], 1))
+			temperature_f = to_list(cls.round_array(matrix[:, 7] * 1.8 + 32, 1))
+			uv_exposure_category = ULTRAVIOLET_EXPOSURE_CATEGORY_TABLE.classify_array(matrix[:, 10])
+			wind_gust_description = WIND_GUST_TABLE.classify_array(wind_gust_miles_per_hour)
+			wind_gust_miles_per_hour = to_list(wind_gust_miles_per_hour)
+
+		# Without it, the same expressions as derive(), a column at a time.
+		else:
+
+			#
+			def scaled(values, factor, digits):
+				return [round(value * factor, digits) if value is not None else None for value in values]
+
+			#
+			wind_gust_miles_per_hour = scaled(wind_gusts_meters_per_second, cls.MPH_PER_METERS_PER_SECOND, 1)
+
+			#
+			lightning_detected = [count > 0 if count is not None else None for count in lightning_counts]
+			lightning_strike_average_distance_miles = scaled(lightning_distances_km, cls.MILES_PER_KM, 1)
+			pressure_inhg = scaled(pressures_mb, cls.INHG_PER_MB, 2)
+			precipitation_inches_per_minute = scaled(precipitations_mm, cls.INCHES_PER_MM, 6)
+			precipitation_description = [RAINFALL_INTENSITY_TABLE.classify(value) for value in precipitations_mm]
+			precipitation_detected = [value > 0 if value is not None else None for value in precipitations_mm]
+			relative_humidity = [round(float(value), 1) if value is not None else None for value in relative_humidities]
+			temperature_f = [round(value * 1.8 + 32, 1) if value is not None else None for value in temperatures_c]
+			uv_exposure_category = [ULTRAVIOLET_EXPOSURE_CATEGORY_TABLE.classify(value) for value in uv_indexes]
+			wind_gust_description = [WIND_GUST_TABLE.classify(value) for value in wind_gust_miles_per_hour]
+
+		#
+		columns['lightning_detected'] = lightning_detected
+		columns['lightning_strike_average_distance_km'] = lightning_distances_km
+		columns['lightning_strike_average_distance_miles'] = lightning_strike_average_distance_miles
+		columns['pressure_inhg'] = pressure_inhg
+		columns['pressure_mb'] = pressures_mb
+		columns['precipitation_mm_per_minute'] = precipitations_mm
+		columns['precipitation_inches_per_minute'] = precipitation_inches_per_minute
+		columns['precipitation_description'] = precipitation_description
+		columns['precipitation_detected'] = precipitation_detected
+		columns['precipitation_type'] = [PrecipitationType(value) if value is not None else None for value in raw(13)]
+		columns['relative_humidity'] = relative_humidity
+		columns['solar_radiation'] = raw(11)
+		columns['temperature_c'] = temperatures_c
+		columns['temperature_f'] = temperature_f
+		columns['uv_index'] = uv_indexes
+		columns['uv_exposure_category'] = uv_exposure_category
+		columns['wind_gust_meters_per_second'] = wind_gusts_meters_per_second
+		columns['wind_gust_miles_per_hour'] = wind_gust_miles_per_hour
+		columns['wind_gust_description'] = wind_gust_description
+
+		#
+		return columns
+
+	# The NumPy equivalent of round(value, digits) for every element.
+	# numpy.round() scales, rounds, and unscales, so a value sitting right at a tie can land on the wrong side. Those few are redone with round(), which is exact.
+	@staticmethod
+	def round_array(values, digits):
+
+		#
+		scale = 10.0 ** digits
+		scaled = values * scale
+		rounded = numpy.rint(scaled) / scale
+
+		#
+		near_tie = numpy.abs(numpy.abs(scaled - numpy.trunc(scaled)) - 0.5) < 1e-9 * (1 + numpy.abs(scaled))
+
+		#
+		for index in numpy.flatnonzero(near_tie).tolist():
+			rounded[index] = round(float(values[index]), digits)
+
+		#
+		return rounded
+
+# The fields that are actually stored (everything but those derived at read time), and the enums' members in ordinal order.
+STORED_OBSERVATION_FIELDS = tuple((key, typecode, kind) for key, typecode, kind in OBSERVATION_FIELDS if typecode is not None)
+ENUM_MEMBERS = {kind: tuple(kind) for key, typecode, kind in OBSERVATION_FIELDS if isinstance(kind, type)}
+ENUM_ORDINALS = {kind: {member: ordinal for ordinal, member in enumerate(kind)} for kind in ENUM_MEMBERS}
+
+# The numbers passed straight through from the hub, which keep whatever type it sent: 22 stays 22, not 22.0. Their doubles can't tell, so a bit per field (see integral_mask()) records which were ints.
+INTEGRAL_FIELDS = ('pressure_mb', 'precipitation_mm_per_minute', 'temperature_c', 'uv_index', 'wind_gust_meters_per_second')
+INTEGRAL_BITS = {key: 1 << bit for bit, key in enumerate(INTEGRAL_FIELDS)}
+
+# Encodes a field value for a typed column or binary record. Missing values become NaN in doubles and -1 in integers.
+def encode_field(typecode, kind, value):
+
+	#
+	if value is None:
+		return math.nan if typecode == 'd' else -1
+	elif typecode == 'd':
+		return value
+	elif isinstance(kind, type):
+		return ENUM_ORDINALS[kind][value]
+
+	#
+	return int(value)
+
+# The reverse of encode_field().
+def decode_field(kind, raw):
+
+	#
+	if kind == 'number':
+		return raw if raw == raw else None
+	elif kind == 'integer':
+		return int(raw) if raw == raw else None
+	elif kind == 'boolean':
+		return bool(raw) if raw >= 0 else None
+	elif kind == 'epoch':
+		return raw if raw >= 0 else None
+
+	#
+	return ENUM_MEMBERS[kind][raw] if raw >= 0 else None
+
+# Enum members' descriptions, by ordinal, as get_for_json() reports them.
+ENUM_DESCRIPTIONS = {kind: tuple(member.name.replace('_', ' ') for member in members) for kind, members in ENUM_MEMBERS.items()}
+
+# decode_field() for a list of raw values of one kind, a comprehension per kind rather than a call per value. Values flagged with bit in masks go back to being ints; enums are their descriptions if described.
+def decode_values(kind, raws, masks = None, bit = 0, described = False):
+
+	#
+	if kind == 'number':
+		if bit and masks is not None: return [(int(raw) if mask & bit else raw) if raw == raw else None for raw, mask in zip(raws, masks)]
+		return [raw if raw == raw else None for raw in raws]
+	elif kind == 'integer':
+		return [int(raw) if raw == raw else None for raw in raws]
+	elif kind == 'boolean':
+		return [bool(raw) if raw >= 0 else None for raw in raws]
+	elif kind == 'epoch':
+		return [raw if raw >= 0 else None for raw in raws]
+
+	#
+	members = ENUM_DESCRIPTIONS[kind] if described else ENUM_MEMBERS[kind]
+
+	#
+	return [members[raw] if raw >= 0 else None for raw in raws]
+
+# The stored fields of an observation, encoded, in STORED_OBSERVATION_FIELDS order.
+def encode_observation(observation):
+	return tuple(encode_field(typecode, kind, getattr(observation, key)) for key, typecode, kind in STORED_OBSERVATION_FIELDS)
+
+# Which of the INTEGRAL_FIELDS of source (normally an Observation) hold ints, as a bitmask.
+def integral_mask(source):
+
+	#
+	mask = 0
+	for key, bit in INTEGRAL_BITS.items():
+		if type(getattr(source, key)) is int: mask |= bit
+
+	#
+	return mask
+
+# The stored fields of a batch of observations, given as columns keyed like an Observation's fields (see DerivedFieldEngine.derive_batch()), encoded a column at a time: a list per field, in STORED_OBSERVATION_FIELDS order, holding what encode_observation() gives for each row.
+def encode_columns(columns):
+
+	#
+	encoded = []
+
+	#
+	for key, typecode, kind in STORED_OBSERVATION_FIELDS:
+
+		#
+		values = columns[key]
+
+		#
+		if typecode == 'd':
+			encoded.append([math.nan if value is None else value for value in values])
+		elif isinstance(kind, type):
+			ordinals = ENUM_ORDINALS[kind]
+			encoded.append([-1 if value is None else ordinals[value] for value in values])
+		else:
+			encoded.append([-1 if value is None else int(value) for value in values])
+
+	#
+	return encoded
+
+# integral_mask() for each row of a batch of observations given as columns, as for encode_columns().
+def integral_masks(columns):
+
+	#
+	masks = [0] * len(columns['last_updated_epoch'])
+
+	#
+	for key, bit in INTEGRAL_BITS.items():
+		masks = [mask | bit if type(value) is int else mask for mask, value in zip(masks, columns[key])]
+
+	#
+	return masks
+
+# Rebuilds an Observation from encode_observation() output, turning the fields flagged in integral_mask back into ints.
+def decode_observation(raw_values, integral_mask = 0):
+
+	#
+	values = {key: decode_field(kind, raw) for (key, typecode, kind), raw in zip(STORED_OBSERVATION_FIELDS, raw_values)}
+	values['last_updated_iso_8601'] = iso_8601_from_epoch(values['last_updated_epoch'])
+
+	#
+	if integral_mask:
+		for key, bit in INTEGRAL_BITS.items():
+			if integral_mask & bit and values[key] is not None: values[key] = int(values[key])
+
+	#
+	return Observation(**values)
+
+# Every field's kind, by key.
+OBSERVATION_KINDS = {key: kind for key, typecode, kind in OBSERVATION_FIELDS}
+
+# Every field's key, in get_for_json() order.
+OBSERVATION_KEYS = tuple(key for key, typecode, kind in OBSERVATION_FIELDS)
+
+# Checks the arguments common to range queries, and returns the fields to report (all of them by default).
+def query_fields(fields, bucket_seconds):
+
+	#
+	if fields is None: fields = [key for key, typecode, kind in OBSERVATION_FIELDS]
+
+	#
+	unknown = [key for key in fields if key not in OBSERVATION_KINDS]
+	if unknown: raise ValueError('unknown fields: ' + ', '.join(unknown))
+
+	#
+	if bucket_seconds is not None and bucket_seconds <= 0: raise ValueError('bucket_seconds must be positive')
+
+	#
+	return fields
+
+# A fixed-capacity, columnar ring of observations. Each field is a typed array; a write cursor wraps around once the ring is full.
+# Missing values are stored as NaN in double columns and -1 in integer columns. Rows only become dicts when someone asks for them.
+# There's one writer. Readers on other threads go through consistent(), which retries a read that overlapped a write, as the shared memory readers do.
+class ObservationRing:
+
+	#
+	def __init__(self, capacity = 720):
+
+		#
+		self.capacity = capacity
+		self.__cursor = 0
+		self.__count = 0
+		self.__columns = {key: array.array(typecode, [encode_field(typecode, kind, None)]) * capacity for key, typecode, kind in STORED_OBSERVATION_FIELDS}
+		self.__ordered_columns = [self.__columns[key] for key, typecode, kind in STORED_OBSERVATION_FIELDS]
+
+		# The integral_mask() of each observation, so numbers the hub sent as ints come back as ints.
+		self.__integral = array.array('B', [0]) * capacity
+
+		# The sequence number of the newest observation. It goes up by one per append and never goes back, even across clear().
+		self.sequence = 0
+
+		# The sequence number of the last insert() behind the newest observation. Anyone who read up to an earlier sequence has missed it.
+		self.reordered_sequence = 0
+
+		# Odd while a write is in progress; see consistent().
+		self.__writes = 0
+
+	#
+	def __len__(self):
+		return self.__count
+
+	#
+	def clear(self):
+		self.__writes += 1
+		self.__cursor = 0
+		self.__count = 0
+		self.__writes += 1
+
+	# Calls read() until it runs without a write starting or finishing meanwhile, and returns what it returned.
+	def consistent(self, read):
+
+		#
+		while True:
+
+			#
+			writes = self.__writes
+
+			# The writer is mid-observation; it'll be done in a moment.
+			if writes & 1:
+				time.sleep(0)
+				continue
+
+			#
+			result = read()
+			if self.__writes == writes: return result
+
+	# Bytes used by the column storage itself.
+	def nbytes(self):
+		return sum(column.itemsize * len(column) for column in self.__columns.values()) + self.__integral.itemsize * len(self.__integral)
+
+	# Appends an observation, reading each field as an attribute of source (normally an Observation). Pass raw_values if the caller already has encode_observation(source).
+	def append(self, source, raw_values = None):
+
+		#
+		if raw_values is None: raw_values = encode_observation(source)
+
+		#
+		self.__writes += 1
+		self.__append(source, raw_values)
+		self.__writes += 1
+
+	#
+	def __append(self, source, raw_values):
+
+		#
+		cursor = self.__cursor
+
+		#
+		for column, raw in zip(self.__ordered_columns, raw_values):
+			column[cursor] = raw
+
+		#
+		self.__integral[cursor] = integral_mask(source)
+
+		#
+		self.__cursor = (cursor + 1) % self.capacity
+		self.__count = min(self.__count + 1, self.capacity)
+		self.sequence += 1
+
+	# Appends a batch of observations, given as encoded columns with their integral masks (see encode_columns() and integral_masks()), as if by append() for each row. Only the rows that will still be in the ring are written.
+	def extend(self, raw_columns, masks):
+
+		#
+		count = len(masks)
+		kept = min(count, self.capacity)
+
+		# The kept rows start at this slot, and may wrap around to the start of the columns.
+		start = (self.__cursor + count - kept) % self.capacity
+		first = min(kept, self.capacity - start)
+
+		#
+		self.__writes += 1
+
+		#
+		for column, values in zip(self.__ordered_columns + [self.__integral], list(raw_columns) + [masks]):
+
+			#
+			values = values[count - kept:]
+
+			#
+			column[start:start + first] = array.array(column.typecode, values[:first])
+			column[:kept - first] = array.array(column.typecode, values[first:])
+
+		#
+		self.__cursor = (self.__cursor + count) % self.capacity
+		self.__count = min(self.__count + count, self.capacity)
+		self.sequence += count
+		self.__writes += 1
+
+	# Adds an observation that arrived late, depth places behind the newest, so the ring stays in epoch order. Once full, the oldest is still the one that's dropped.
+	# Costs O(depth) per column, but late observations are rare and rarely more than a few places late.
+	def insert(self, source, depth, raw_values = None):
+
+		#
+		if raw_values is None: raw_values = encode_observation(source)
+
+		#
+		self.__writes += 1
+		self.__append(source, raw_values)
+		if depth > 0: self.__move_newest_back(depth)
+		self.__writes += 1
+
+	# Moves the newest observation depth places back, moving those after its new place up one.
+	def __move_newest_back(self, depth):
+
+		# The slots from where it belongs to the newest; everything after its place moves up one.
+		slots = [self.__slot(index) for index in range(self.__count - 1 - depth, self.__count)]
+
+		#
+		for column in self.__ordered_columns + [self.__integral]:
+
+			#
+			raw = column[slots[-1]]
+
+			#
+			for slot, next_slot in zip(reversed(slots[:-1]), reversed(slots[1:])):
+				column[next_slot] = column[slot]
+
+			#
+			column[slots[0]] = raw
+
+		#
+		self.reordered_sequence = self.sequence
+
+	# Physical slot for the logical index (0 is the oldest, -1 the newest).
+	def __slot(self, index):
+
+		#
+		if index < 0: index += self.__count
+		if not 0 <= index < self.__count: raise IndexError('observation index out of range')
+
+		#
+		return (self.__cursor - self.__count + index) % self.capacity
+
+	# The observation at the logical index (0 is the oldest, -1 the newest).
+	def observation(self, index):
+
+		#
+		slot = self.__slot(index)
+
+		#
+		return decode_observation([column[slot] for column in self.__ordered_columns], self.__integral[slot])
+
+	# The observation at the logical index, as a dict in get_for_json() form.
+	def row(self, index):
+		return self.observation(index).for_json()
+
+	# The observations at logical indexes start (inclusive) to end (exclusive, by default all of them), oldest first, as get_for_json() dicts.
+	# They're decoded a column at a time rather than an Observation per row, and come out the same as Observation.for_json().
+	def rows(self, start = 0, end = None):
+
+		#
+		if end is None: end = self.__count
+
+		#
+		masks = self.__raw_range(self.__integral, start, end)
+		columns = []
+
+		#
+		for key, typecode, kind in OBSERVATION_FIELDS:
+
+			#
+			if kind == 'iso_8601':
+				columns.append([iso_8601_from_epoch(epoch) for epoch in columns[0]])
+			elif key == 'precipitation_inches_per_minute':
+				columns.append(['{0:.6f}'.format(value) if value else value for value in decode_values(kind, self.__raw_range(self.__columns[key], start, end))])
+			else:
+				columns.append(decode_values(kind, self.__raw_range(self.__columns[key], start, end), masks, INTEGRAL_BITS.get(key, 0), described = True))
+
+		#
+		return [dict(zip(OBSERVATION_KEYS, row)) for row in zip(*columns)]
+
+	# The observations after the given sequence number, oldest first, or None if some of them have already been overwritten (or the sequence number is from the future).
+	def rows_since(self, sequence):
+
+		#
+		count = self.__count
+		newer = self.sequence - sequence
+
+		# Something has been inserted behind what the caller already has, so it needs everything again.
+		if not 0 <= newer <= count or sequence < self.reordered_sequence: return None
+
+		#
+		return self.rows(count - newer, count)
+
+	# The last n values (or all values) of a single field, oldest first.
+	def column(self, key, last = None):
+
+		#
+		count = self.__count if last is None else min(last, self.__count)
+
+		#
+		return self.column_range(key, self.__count - count, self.__count)
+
+	# The values of a single field for logical indexes start (inclusive) to end (exclusive), oldest first.
+	def column_range(self, key, start, end):
+
+		# Numbers the hub sent as ints go back to being ints.
+		bit = INTEGRAL_BITS.get(key, 0)
+
+		#
+		return decode_values(OBSERVATION_KINDS[key], self.__raw_range(self.__columns[key], start, end), self.__raw_range(self.__integral, start, end) if bit else None, bit)
+
+	# The raw values of a column (or the integral masks) for logical indexes start (inclusive) to end (exclusive), oldest first: at most two slices of the array, with nothing decoded.
+	def __raw_range(self, column, start, end):
+
+		#
+		count = end - start
+		if count <= 0: return []
+
+		#
+		first = (self.__cursor - self.__count + start) % self.capacity
+		if first + count <= self.capacity: return column[first:first + count].tolist()
+
+		#
+		return column[first:].tolist() + column[:first + count - self.capacity].tolist()
+
+	# The epoch of the observation at the logical index (0 is the oldest, -1 the newest), or None if it doesn't have one.
+	def epoch(self, index):
+		return decode_field('epoch', self.__columns['last_updated_epoch'][self.__slot(index)])
+
+	# The logical index of the first observation at or after epoch (or, if side is 'right', strictly after it). Observations are kept in epoch order, so this is a binary search.
+	def bisect_epoch(self, epoch, side = 'left'):
+
+		#
+		column = self.__columns['last_updated_epoch']
+		low, high = 0, self.__count
+
+		#
+		while low < high:
+
+			#
+			middle = (low + high) // 2
+			middle_epoch = column[self.__slot(middle)]
+
+			#
+			if middle_epoch < epoch or (side == 'right' and middle_epoch == epoch):
+				low = middle + 1
+			else:
+				high = middle
+
+		#
+		return low
+
+	# Observations with start_epoch <= epoch <= end_epoch (either may be None for unbounded), limited to the given fields (all of them by default).
+	# Without bucket_seconds, returns one dict per observation. With it, observations are grouped into buckets aligned to multiples of bucket_seconds, and each numeric field is reduced to its min, max, mean and last value; other fields report only the last value.
+	# Values are plain numbers, and enums are descriptions, as in get_for_json().
+	# The window is found by binary search, and buckets are reduced on the raw column slices, so only what's reported is decoded.
+	def query(self, start_epoch = None, end_epoch = None, fields = None, bucket_seconds = None):
+
+		#
+		fields = query_fields(fields, bucket_seconds)
+		kinds = OBSERVATION_KINDS
+
+		#
+		start = self.bisect_epoch(start_epoch) if start_epoch is not None else 0
+		end = self.bisect_epoch(end_epoch, side = 'right') if end_epoch is not None else self.__count
+
+		#
+		epochs = self.__raw_range(self.__columns['last_updated_epoch'], start, end)
+		masks = self.__raw_range(self.__integral, start, end) if any(key in INTEGRAL_BITS for key in fields) else None
+
+		#
+		if bucket_seconds is None:
+
+			#
+			columns = []
+			for key in fields:
+
+				#
+				if kinds[key] == 'iso_8601':
+					columns.append([iso_8601_from_epoch(epoch) if epoch >= 0 else None for epoch in epochs])
+				else:
+					columns.append(decode_values(kinds[key], self.__raw_range(self.__columns[key], start, end), masks, INTEGRAL_BITS.get(key, 0), described = True))
+
+			#
+			return [dict(zip(fields, row)) for row in zip(*columns)] if fields else [{} for epoch in epochs]
+
+		# Observations are in epoch order, so each bucket is a contiguous run: (start epoch, first index, end index).
+		runs = []
+		index = 0
+
+		#
+		while index < len(epochs):
+
+			#
+			bucket_start_epoch = epochs[index] // bucket_seconds * bucket_seconds
+			bucket_end = bisect.bisect_left(epochs, bucket_start_epoch + bucket_seconds, index)
+
+			#
+			runs.append((bucket_start_epoch, index, bucket_end))
+			index = bucket_end
+
+		#
+		buckets = [{'bucket_start_epoch': bucket_start_epoch, 'count': bucket_end - index} for bucket_start_epoch, index, bucket_end in runs]
+
+		#
+		for key in fields:
+
+			#
+			kind = kinds[key]
+			raws = epochs if kind == 'iso_8601' else self.__raw_range(self.__columns[key], start, end)
+
+			#
+			if kind in ('number', 'integer'):
+
+				#
+				bit = INTEGRAL_BITS.get(key, 0) if kind == 'number' else 0
+
+				# Decodes one of a run's raw values, found at index; ints the hub sent stay ints.
+				def decode(raw, index):
+					return int(raw) if kind == 'integer' or (bit and masks[index] & bit) else raw
+
+				#
+				for bucket, (bucket_start_epoch, index, bucket_end) in zip(buckets, runs):
+
+					#
+					values = raws[index:bucket_end]
+					present = [value for value in values if value == value]
+
+					#
+					if not present:
+						bucket[key] = {'min': None, 'max': None, 'mean': None, 'last': None}
+						continue
+
+					# min() and max() keep the first of equal values, so that's the one whose type is reported.
+					minimum = min(present)
+					maximum = max(present)
+					last = len(values) - 1
+					while values[last] != values[last]: last -= 1
+
+					#
+					bucket[key] = {'min': decode(minimum, index + values.index(minimum)), 'max': decode(maximum, index + values.index(maximum)), 'mean': math.fsum(present) / len(present), 'last': decode(values[last], index + last)}
+
+			#
+			elif kind == 'iso_8601':
+				for bucket, (bucket_start_epoch, index, bucket_end) in zip(buckets, runs): bucket[key] = {'last': iso_8601_from_epoch(raws[bucket_end - 1]) if raws[bucket_end - 1] >= 0 else None}
+
+			#
+			else:
+				for bucket, (bucket_start_epoch, index, bucket_end) in zip(buckets, runs): bucket[key] = {'last': decode_values(kind, raws[bucket_end - 1:bucket_end], described = True)[0]}
+
+		#
+		return buckets
+
+# Rollup tiers a station can keep beyond its one-minute cache, as (bucket_seconds, capacity): 10-minute buckets for a week, and hourly buckets for a year.
+# Every bucket is preallocated, at about 650 bytes each, so these cost about 6.3 MB per station (about 400 MB for 64 stations) against about 110 KB for the cache itself.
+STANDARD_ROLLUP_TIERS = ((600, 7 * 24 * 6), (3600, 365 * 24))
+
+# The rollup tiers a station keeps unless asked for some: none. Pass STANDARD_ROLLUP_TIERS (or fewer, smaller tiers) to opt in.
+DEFAULT_ROLLUP_TIERS = ()
+
+# Observations rolled up into fixed-width, epoch-aligned buckets, for history far longer than the one-minute cache could hold.
+# Each bucket keeps the min, max, sum, count and last value of every numeric field, and the last value of everything else, so a bucket is updated in place as observations arrive.
+# Like ObservationRing, storage is a set of preallocated typed arrays that wrap around once full, so memory is fixed up front.
+class RollupTier:
+
+	#
+	NUMERIC_FIELDS = tuple((key, typecode, kind) for key, typecode, kind in STORED_OBSERVATION_FIELDS if kind in ('number', 'integer'))
+	OTHER_FIELDS = tuple((key, typecode, kind) for key, typecode, kind in STORED_OBSERVATION_FIELDS if kind not in ('number', 'integer'))
+
+	# Where each of those sits in encode_observation() output.
+	NUMERIC_INDEXES = tuple(index for index, (key, typecode, kind) in enumerate(STORED_OBSERVATION_FIELDS) if kind in ('number', 'integer'))
+	OTHER_INDEXES = tuple(index for index, (key, typecode, kind) in enumerate(STORED_OBSERVATION_FIELDS) if kind not in ('number', 'integer'))
+
+	#
+	def __init__(self, bucket_seconds, capacity):
+
+		#
+		self.bucket_seconds = bucket_seconds
+		self.capacity = capacity
+		self.__cursor = 0
+		self.__count = 0
+
+		# Per bucket: its start, how many observations went into it, and the newest epoch among them (so one that arrives late doesn't replace the last values).
+		self.__starts = array.array('q', [0]) * capacity
+		self.__observations = array.array('I', [0]) * capacity
+		self.__newest_epochs = array.array('q', [0]) * capacity
+
+		# Per numeric field: (minimums, maximums, sums, lasts, how many values were present).
+		self.__numbers = {key: (array.array('d', [math.nan]) * capacity, array.array('d', [math.nan]) * capacity, array.array('d', [0.0]) * capacity, array.array('d', [math.nan]) * capacity, array.array('I', [0]) * capacity) for key, typecode, kind in self.NUMERIC_FIELDS}
+
+		# Per other field: the last value, encoded as in ObservationRing.
+		self.__lasts = {key: array.array(typecode, [encode_field(typecode, kind, None)]) * capacity for key, typecode, kind in self.OTHER_FIELDS}
+
+	#
+	def __len__(self):
+		return self.__count
+
+	# Bytes used by the bucket storage itself.
+	def nbytes(self):
+
+		#
+		columns = [self.__starts, self.__observations, self.__newest_epochs] + [column for columns in self.__numbers.values() for column in columns] + list(self.__lasts.values())
+
+		#
+		return sum(column.itemsize * len(column) for column in columns)
+
+	# The start of the oldest bucket still held, or None if there are none.
+	def oldest_epoch(self):
+
+		#
+		if self.__count == 0: return None
+
+		#
+		return self.__starts[(self.__cursor - self.__count + 1) % self.capacity]
+
+	# Folds an observation (read by attribute, as with ObservationRing, or from raw_values if given) into its bucket.
+	# An observation that arrives late is folded into the min, max and mean of its bucket, and only becomes the bucket's last value if it's the newest in it. If its bucket was never opened, or has been overwritten, it's ignored.
+	def add(self, source, raw_values = None):
+
+		#
+		epoch = source.last_updated_epoch
+		if epoch is None: return
+
+		#
+		self.__add(epoch, source, raw_values)
+
+	#
+	def __add(self, epoch, source, raw_values):
+
+		#
+		start = epoch // self.bucket_seconds * self.bucket_seconds
+
+		# Late observations almost always belong in the newest bucket or the one before it, so search back from the newest.
+		if self.__count and start < self.__starts[self.__cursor]:
+
+			#
+			slot = next((slot for slot in ((self.__cursor - back) % self.capacity for back in range(1, self.__count)) if self.__starts[slot] <= start), None)
+			if slot is None or self.__starts[slot] != start: return
+
+			#
+			self.__fold(slot, epoch, source, raw_values)
+			return
+
+		#
+		if self.__count == 0 or start > self.__starts[self.__cursor]: self.__open(start, epoch)
+
+		#
+		self.__fold(self.__cursor, epoch, source, raw_values)
+
+	# Opens a new, empty bucket as the newest, overwriting the oldest once we're full.
+	def __open(self, start, epoch):
+
+		#
+		slot = (self.__cursor + 1) % self.capacity if self.__count else 0
+		self.__cursor = slot
+		self.__count = min(self.__count + 1, self.capacity)
+
+		#
+		self.__starts[slot] = start
+		self.__observations[slot] = 0
+		self.__newest_epochs[slot] = epoch
+
+		#
+		for minimums, maximums, sums, lasts, present in self.__numbers.values():
+			minimums[slot] = maximums[slot] = lasts[slot] = math.nan
+			sums[slot] = 0.0
+			present[slot] = 0
+
+	# Folds a batch of observations, given as encoded columns (see encode_columns()), with the same result as add() for each row in turn.
+	# Each run of rows in the newest bucket is folded a column at a time; rows for an older bucket, or out of order, are folded one by one.
+	def add_columns(self, raw_columns):
+
+		#
+		epochs = raw_columns[0]
+		index = 0
+
+		#
+		while index < len(epochs):
+
+			# Missing epochs are encoded as -1, and never folded.
+			epoch = epochs[index]
+			if epoch < 0:
+				index += 1
+				continue
+
+			# The run of rows in this row's bucket, in epoch order.
+			start = epoch // self.bucket_seconds * self.bucket_seconds
+			end = index + 1
+			while end < len(epochs) and epochs[end - 1] <= epochs[end] < start + self.bucket_seconds: end += 1
+
+			#
+			if self.__count and (start < self.__starts[self.__cursor] or (start == self.__starts[self.__cursor] and epoch < self.__newest_epochs[self.__cursor])):
+
+				#
+				for row in range(index, end):
+					self.__add(epochs[row], None, [column[row] for column in raw_columns])
+
+				#
+				index = end
+				continue
+
+			#
+			if self.__count == 0 or start > self.__starts[self.__cursor]: self.__open(start, epoch)
+
+			#
+			slot = self.__cursor
+			self.__observations[slot] += end - index
+			self.__newest_epochs[slot] = epochs[end - 1]
+
+			# Missing values are NaN. min() and max() keep the first of equal values, as add() does, and the sum is taken in the same order.
+			for column_index, (minimums, maximums, sums, lasts, present) in zip(self.NUMERIC_INDEXES, self.__numbers.values()):
+
+				#
+				values = [value for value in raw_columns[column_index][index:end] if value == value]
+				if not values: continue
+
+				#
+				minimum, maximum = min(values), max(values)
+
+				#
+				if present[slot] == 0:
+					minimums[slot], maximums[slot] = minimum, maximum
+				else:
+					if minimum < minimums[slot]: minimums[slot] = minimum
+					if maximum > maximums[slot]: maximums[slot] = maximum
+
+				#
+				total = sums[slot]
+				for value in values: total += value
+
+				#
+				sums[slot] = total
+				lasts[slot] = values[-1]
+				present[slot] += len(values)
+
+			#
+			for column_index, lasts in zip(self.OTHER_INDEXES, self.__lasts.values()):
+				lasts[slot] = raw_columns[column_index][end - 1]
+
+			#
+			index = end
+
+	#
+	def __fold(self, slot, epoch, source, raw_values):
+
+		#
+		self.__observations[slot] += 1
+		if raw_values is None: raw_values = encode_observation(source)
+
+		#
+		late = epoch < self.__newest_epochs[slot]
+		if not late: self.__newest_epochs[slot] = epoch
+
+		# Numeric fields are all doubles, so missing is NaN (which is the one value not equal to itself).
+		for index, (minimums, maximums, sums, lasts, present) in zip(self.NUMERIC_INDEXES, self.__numbers.values()):
+
+			#
+			value = raw_values[index]
+			if value != value: continue
+
+			#
+			if present[slot] == 0:
+				minimums[slot] = maximums[slot] = value
+			elif value < minimums[slot]:
+				minimums[slot] = value
+			elif value > maximums[slot]:
+				maximums[slot] = value
+
+			#
+			sums[slot] += value
+			if not late: lasts[slot] = value
+			present[slot] += 1
+
+		#
+		if late: return
+
+		#
+		for index, lasts in zip(self.OTHER_INDEXES, self.__lasts.values()):
+			lasts[slot] = raw_values[index]
+
+	# Buckets overlapping start_epoch to end_epoch (inclusive), merged into buckets of bucket_seconds, which must be a multiple of this tier's. The result has the same form as ObservationRing.query(), with the range widened to whole buckets of this tier.
+	def query(self, start_epoch = None, end_epoch = None, fields = None, bucket_seconds = None):
+
+		#
+		fields = query_fields(fields, bucket_seconds)
+		if bucket_seconds is None: bucket_seconds = self.bucket_seconds
+		if bucket_seconds % self.bucket_seconds: raise ValueError('bucket_seconds must be a multiple of %d' % self.bucket_seconds)
+
+		#
+		buckets = []
+		merged = None
+
+		#
+		for index in range(self.__count):
+
+			#
+			slot = (self.__cursor - self.__count + 1 + index) % self.capacity
+			start = self.__starts[slot]
+
+			#
+			if start_epoch is not None and start + self.bucket_seconds <= start_epoch: continue
+			if end_epoch is not None and start > end_epoch: break
+
+			# Buckets are in order, so each merged bucket is a contiguous run of ours.
+			merged_start_epoch = start // bucket_seconds * bucket_seconds
+
+			#
+			if merged is None or merged[0] != merged_start_epoch:
+				merged = [merged_start_epoch, []]
+				buckets.append(merged)
+
+			#
+			merged[1].append(slot)
+
+		#
+		return [self.__merge(merged_start_epoch, slots, fields) for merged_start_epoch, slots in buckets]
+
+	#
+	def __merge(self, merged_start_epoch, slots, fields):
+
+		#
+		bucket = {'bucket_start_epoch': merged_start_epoch, 'count': sum(self.__observations[slot] for slot in slots)}
+
+		#
+		for key in fields:
+
+			#
+			kind = OBSERVATION_KINDS[key]
+
+			#
+			if key in self.__numbers:
+
+				#
+				minimums, maximums, sums, lasts, present = self.__numbers[key]
+				filled = [slot for slot in slots if present[slot]]
+
+				#
+				if filled:
+					bucket[key] = {'min': decode_field(kind, min(minimums[slot] for slot in filled)), 'max': decode_field(kind, max(maximums[slot] for slot in filled)), 'mean': math.fsum(sums[slot] for slot in filled) / sum(present[slot] for slot in filled), 'last': decode_field(kind, lasts[filled[-1]])}
+				else:
+					bucket[key] = {'min': None, 'max': None, 'mean': None, 'last': None}
+
+			#
+			elif kind == 'iso_8601':
+				bucket[key] = {'last': iso_8601_from_epoch(decode_field('epoch', self.__lasts['last_updated_epoch'][slots[-1]]))}
+
+			#
+			else:
+				value = decode_field(kind, self.__lasts[key][slots[-1]])
+				bucket[key] = {'last': value.name.replace('_', ' ') if isinstance(value, enum.Enum) else value}
+
+		#
+		return bucket
+
+# A persistent, memory-mapped log of observations, so that after a restart the cache (and with it the pressure trends) comes back immediately rather than hours later.
+# The file is a header followed by a fixed number of fixed-size binary records. Records are appended in sequence and wrap around once the file is full, so it never grows past capacity.
+# Each record carries its sequence number, the stored fields, their integral_mask() (so ints come back as ints), and a CRC-32. A record torn by a crash fails its checksum and is skipped on load.
+# Writes are plain memory stores into the mapping; the kernel writes dirty pages back in its own time, so appending never waits on the disk.
+class ObservationLog:
+
+	#
+	MAGIC = b'TWHLOG01'
+	HEADER = struct.Struct('<8sII')
+	RECORD = struct.Struct('<Q' + ''.join(typecode for key, typecode, kind in STORED_OBSERVATION_FIELDS) + 'B')
+	CHECKSUM = struct.Struct('<I')
+
+	# With capacity None, the file must already exist, and its own capacity is used.
+	# Only a new (or empty) file is laid out afresh. Anything else must be a log with the same layout and capacity, or this raises ValueError: a log is never started over, so opening an archive with the wrong capacity can't wipe it.
+	def __init__(self, path, capacity = 720):
+
+		#
+		self.__record_size = self.RECORD.size + self.CHECKSUM.size
+
+		#
+		self.__file = open(path, 'r+b' if capacity is None else 'a+b')
+		file_size = os.fstat(self.__file.fileno()).st_size
+
+		#
+		try:
+
+			#
+			if file_size == 0 and capacity is not None:
+				self.__file.truncate(self.HEADER.size + capacity * self.__record_size)
+
+			#
+			else:
+
+				#
+				self.__file.seek(0)
+				magic, record_size, file_capacity = self.HEADER.unpack(self.__file.read(self.HEADER.size).ljust(self.HEADER.size, b'\0'))
+
+				#
+				if magic != self.MAGIC: raise ValueError('%s is not an observation log' % path)
+				if record_size != self.__record_size: raise ValueError('%s was written with a different record layout (%d-byte records, not %d)' % (path, record_size, self.__record_size))
+				if capacity is not None and file_capacity != capacity: raise ValueError('%s holds %d observations, not %d; open it with that capacity (or None) to keep it, or move it aside to start a new log' % (path, file_capacity, capacity))
+				if file_size != self.HEADER.size + file_capacity * self.__record_size: raise ValueError('%s is %d bytes, not the %d its header calls for' % (path, file_size, self.HEADER.size + file_capacity * self.__record_size))
+
+				#
+				capacity = file_capacity
+
+		#
+		except Exception:
+			self.__file.close()
+			raise
+
+		#
+		self.path = path
+		self.capacity = capacity
+		size = self.HEADER.size + capacity * self.__record_size
+
+		#
+		self.__map = mmap.mmap(self.__file.fileno(), size)
+		self.__map[:self.HEADER.size] = self.HEADER.pack(self.MAGIC, self.__record_size, capacity)
+
+		# Carry on from the newest valid record.
+		self.__sequence = max((record[0] for record in self.__records()), default = 0)
+
+	# The capacity of the existing log at path, from its header. Raises ValueError if it isn't an observation log.
+	@classmethod
+	def capacity_of(cls, path):
+
+		#
+		with open(path, 'rb') as file:
+			magic, record_size, capacity = cls.HEADER.unpack(file.read(cls.HEADER.size).ljust(cls.HEADER.size, b'\0'))
+
+		#
+		if magic != cls.MAGIC: raise ValueError('%s is not an observation log' % path)
+
+		#
+		return capacity
+
+	# Every valid (sequence, raw_values, integral_mask) record, in file order.
+	def __records(self):
+
+		#
+		for slot in range(self.capacity):
+
+			#
+			offset = self.HEADER.size + slot * self.__record_size
+			record = self.__map[offset:offset + self.RECORD.size]
+
+			# Sequence 0 is a slot that has never been written.
+			if record[:8] == b'\0' * 8: continue
+
+			#
+			if zlib.crc32(record) != self.CHECKSUM.unpack_from(self.__map, offset + self.RECORD.size)[0]: continue
+
+			#
+			raw_values = self.RECORD.unpack(record)
+			yield raw_values[0], raw_values[1:-1], raw_values[-1]
+
+	#
+	def append(self, observation, raw_values = None):
+
+		#
+		self.__sequence += 1
+		if raw_values is None: raw_values = encode_observation(observation)
+
+		#
+		record = self.RECORD.pack(self.__sequence, *raw_values, integral_mask(observation))
+		offset = self.HEADER.size + (self.__sequence % self.capacity) * self.__record_size
+
+		# One slice assignment, record and checksum together.
+		self.__map[offset:offset + self.__record_size] = record + self.CHECKSUM.pack(zlib.crc32(record))
+
+	# Appends a batch of encoded observations (encode_observation() tuples) with their integral masks, as append() would each, with one slice assignment per run of consecutive slots.
+	def extend(self, raw_rows, masks):
+
+		#
+		records = []
+		first_slot = (self.__sequence + 1) % self.capacity
+
+		#
+		for raw_values, mask in zip(raw_rows, masks):
+
+			#
+			self.__sequence += 1
+			record = self.RECORD.pack(self.__sequence, *raw_values, mask)
+			records.append(record + self.CHECKSUM.pack(zlib.crc32(record)))
+
+			# The run ends with the last slot in the file.
+			if self.__sequence % self.capacity == self.capacity - 1:
+				self.__write(first_slot, records)
+				records = []
+				first_slot = 0
+
+		#
+		if records: self.__write(first_slot, records)
+
+	# Writes records to consecutive slots, starting at slot.
+	def __write(self, slot, records):
+
+		#
+		offset = self.HEADER.size + slot * self.__record_size
+
+		#
+		self.__map[offset:offset + len(records) * self.__record_size] = b''.join(records)
+
+	# The logged observations (or only the newest last of them), oldest first, skipping any from before oldest_epoch.
+	# Records are logged as they arrive, so one that arrived late is put back in epoch order here.
+	def read(self, oldest_epoch = None, last = None):
+
+		#
+		records = sorted(self.__records())
+		if last is not None: records = records[-last:] if last > 0 else []
+
+		#
+		observations = sorted((decode_observation(raw_values, mask) for sequence, raw_values, mask in records), key = lambda observation: observation.last_updated_epoch if observation.last_updated_epoch is not None else -1)
+
+		#
+		return [observation for observation in observations if oldest_epoch is None or (observation.last_updated_epoch is not None and observation.last_updated_epoch >= oldest_epoch)]
+
+	# The sequence number of the newest record.
+	@property
+	def sequence(self):
+		return self.__sequence
+
+	# Numbers records on from sequence, if that's ahead of the log's own, so the log can keep step with a cache that has numbered more observations than it has.
+	def skip_to(self, sequence):
+		self.__sequence = max(self.__sequence, sequence)
+
+	# Asks the kernel to write everything out now.
+	def flush(self):
+		self.__map.flush()
+
+	#
+	def close(self):
+
+		#
+		self.__map.flush()
+		self.__map.close()
+		self.__file.close()
+
+# Default prefix for shared memory segments. Each station gets its own: <prefix>-<serial number>.
+SHARED_MEMORY_PREFIX = 'tempest_weather_helper'
+
+# The shared memory segment name for a station.
+def shared_memory_name(serial_number, prefix = SHARED_MEMORY_PREFIX):
+	return '%s-%s' % (prefix, re.sub(r'[^A-Za-z0-9_.-]', '_', str(serial_number)))
+
+# Publishes a station's cache into a shared memory segment, so other processes can read it without a socket, a round trip, or any decoding beyond struct.unpack().
+# The layout is fixed: a header, then a ring of ObservationLog records (sequence number, the stored fields, then their integral_mask()). The newest record is the latest observation.
+# Writes are guarded by a seqlock: the counter in the header is odd while a write is in progress, and readers retry if it was odd or changed while they copied.
+class SharedObservationExport:
+
+	#
+	MAGIC = b'TWHSHM01'
+
+	# Magic, seqlock counter, record size, capacity, and how many records have ever been written.
+	HEADER = struct.Struct('<8sQIIQ')
+	COUNTER = struct.Struct('<Q')
+	LOCK_OFFSET = 8
+	WRITTEN_OFFSET = 24
+	RECORD = ObservationLog.RECORD
+
+	#
+	def __init__(self, name, capacity = 720):
+
+		#
+		self.name = name
+		self.capacity = capacity
+		size = self.HEADER.size + capacity * self.RECORD.size
+
+		# A segment left behind by a writer that didn't shut down cleanly is reused if it's the right size, or replaced.
+		try:
+			self.__memory = shared_memory.SharedMemory(name, create = True, size = size)
+		except FileExistsError:
+
+			#
+			self.__memory = shared_memory.SharedMemory(name)
+
+			#
+			if self.__memory.size < size:
+				self.__memory.close()
+				self.__memory.unlink()
+				self.__memory = shared_memory.SharedMemory(name, create = True, size = size)
+
+		#
+		self.__buffer = self.__memory.buf
+		self.__lock = 0
+		self.__written = 0
+		self.HEADER.pack_into(self.__buffer, 0, self.MAGIC, self.__lock, self.RECORD.size, capacity, self.__written)
+
+	# Writes the observation with its sequence number, as the newest record.
+	def append(self, observation, sequence, raw_values = None):
+
+		#
+		if raw_values is None: raw_values = encode_observation(observation)
+		record = self.RECORD.pack(sequence, *raw_values, integral_mask(observation))
+		offset = self.HEADER.size + (self.__written % self.capacity) * self.RECORD.size
+
+		# Odd: a write is in progress.
+		self.__lock += 1
+		self.COUNTER.pack_into(self.__buffer, self.LOCK_OFFSET, self.__lock)
+
+		#
+		self.__buffer[offset:offset + self.RECORD.size] = record
+		self.__written += 1
+		self.COUNTER.pack_into(self.__buffer, self.WRITTEN_OFFSET, self.__written)
+
+		# Even again: done.
+		self.__lock += 1
+		self.COUNTER.pack_into(self.__buffer, self.LOCK_OFFSET, self.__lock)
+
+	# Writes a batch of encoded observations (encode_observation() tuples) with their integral masks as the newest records, numbered on from first_sequence, as append() would each. Only those that will still be held are written, all under one hold of the seqlock.
+	def extend(self, raw_rows, masks, first_sequence):
+
+		#
+		skipped = max(len(raw_rows) - self.capacity, 0)
+
+		#
+		self.__lock += 1
+		self.COUNTER.pack_into(self.__buffer, self.LOCK_OFFSET, self.__lock)
+
+		#
+		for number in range(skipped, len(raw_rows)):
+			offset = self.HEADER.size + ((self.__written + number) % self.capacity) * self.RECORD.size
+			self.__buffer[offset:offset + self.RECORD.size] = self.RECORD.pack(first_sequence + number, *raw_rows[number], masks[number])
+
+		#
+		self.__written += len(raw_rows)
+		self.COUNTER.pack_into(self.__buffer, self.WRITTEN_OFFSET, self.__written)
+
+		#
+		self.__lock += 1
+		self.COUNTER.pack_into(self.__buffer, self.LOCK_OFFSET, self.__lock)
+
+	# Writes an observation that arrived late, depth records behind the newest, moving those up a slot, as ObservationRing.insert() does. The newest record is re-stamped with sequence, so the generation readers see still moves.
+	def insert(self, observation, depth, sequence, raw_values = None):
+
+		#
+		if raw_values is None: raw_values = encode_observation(observation)
+		depth = min(depth, self.__written, self.capacity - 1)
+
+		#
+		def offset(index):
+			return self.HEADER.size + (index % self.capacity) * self.RECORD.size
+
+		#
+		self.__lock += 1
+		self.COUNTER.pack_into(self.__buffer, self.LOCK_OFFSET, self.__lock)
+
+		# Newest first, so nothing is overwritten before it's moved.
+		for index in range(self.__written - 1, self.__written - 1 - depth, -1):
+			self.__buffer[offset(index + 1):offset(index + 1) + self.RECORD.size] = self.__buffer[offset(index):offset(index) + self.RECORD.size]
+
+		#
+		self.__buffer[offset(self.__written - depth):offset(self.__written - depth) + self.RECORD.size] = self.RECORD.pack(sequence, *raw_values, integral_mask(observation))
+		self.COUNTER.pack_into(self.__buffer, offset(self.__written), sequence)
+		self.__written += 1
+		self.COUNTER.pack_into(self.__buffer, self.WRITTEN_OFFSET, self.__written)
+
+		#
+		self.__lock += 1
+		self.COUNTER.pack_into(self.__buffer, self.LOCK_OFFSET, self.__lock)
+
+	# Detaches, and (unless unlink is False) removes the segment, so readers see it disappear.
+	def close(self, unlink = True):
+
+		#
+		self.__buffer.release()
+		self.__memory.close()
+
+		#
+		if unlink: self.__memory.unlink()
+
+# Reads a station's cache from the shared memory segment a SharedObservationExport writes, from any process on the machine.
+#
+#     reader = SharedObservationReader('ST-00000512')
+#     reader.get_for_json()
+#
+# Reads are lock-free for the writer: the reader copies what it needs and retries if the seqlock says the writer was busy.
+class SharedObservationReader:
+
+	#
+	def __init__(self, serial_number = None, prefix = SHARED_MEMORY_PREFIX, name = None):
+
+		#
+		self.name = name if name is not None else shared_memory_name(serial_number, prefix)
+
+		# Attaching mustn't make this process responsible for the segment; otherwise Python's resource tracker removes it when we exit.
+		try:
+			self.__memory = shared_memory.SharedMemory(self.name, track = False)
+		except TypeError:
+			self.__memory = shared_memory.SharedMemory(self.name)
+			resource_tracker.unregister(self.__memory._name, 'shared_memory')
+
+		#
+		self.__buffer = self.__memory.buf
+		magic, lock, record_size, self.capacity, written = SharedObservationExport.HEADER.unpack_from(self.__buffer, 0)
+
+		#
+		if magic != SharedObservationExport.MAGIC or record_size != SharedObservationExport.RECORD.size:
+			self.close()
+			raise ValueError('%s is not a compatible shared memory segment' % self.name)
+
+	# (written, [raw records, oldest first]) for the newest last records (or all of them), copied under the seqlock.
+	def __snapshot(self, last = None):
+
+		#
+		header_size = SharedObservationExport.HEADER.size
+		record_size = SharedObservationExport.RECORD.size
+
+		#
+		while True:
+
+			#
+			lock = SharedObservationExport.COUNTER.unpack_from(self.__buffer, SharedObservationExport.LOCK_OFFSET)[0]
+
+			# The writer is mid-record; it'll be done in a moment.
+			if lock & 1:
+				time.sleep(0)
+				continue
+
+			#
+			written = SharedObservationExport.COUNTER.unpack_from(self.__buffer, SharedObservationExport.WRITTEN_OFFSET)[0]
+			count = min(written, self.capacity) if last is None else min(written, self.capacity, last)
+
+			#
+			records = [bytes(self.__buffer[header_size + slot * record_size:header_size + (slot + 1) * record_size]) for slot in ((written - count + index) % self.capacity for index in range(count))]
+
+			#
+			if SharedObservationExport.COUNTER.unpack_from(self.__buffer, SharedObservationExport.LOCK_OFFSET)[0] == lock: return (written, records)
+
+	#
+	def __decode(self, record):
+
+		#
+		raw_values = SharedObservationExport.RECORD.unpack(record)
+
+		#
+		return (raw_values[0], decode_observation(raw_values[1:-1], raw_values[-1]))
+
+	# The latest observation, or EMPTY_OBSERVATION if nothing has been published yet.
+	def get_observation(self):
+
+		#
+		written, records = self.__snapshot(1)
+
+		#
+		return self.__decode(records[0])[1] if records else EMPTY_OBSERVATION
+
+	#
+	def get_for_json(self):
+		return self.get_observation().for_json()
+
+	#
+	def get_all_for_json(self):
+		return [self.__decode(record)[1].for_json() for record in self.__snapshot()[1]]
+
+	# The sequence number (generation) of the latest observation, or 0 if there isn't one. Cheap enough to poll.
+	def get_generation(self):
+
+		#
+		written, records = self.__snapshot(1)
+
+		#
+		return self.__decode(records[0])[0] if records else 0
+
+	#
+	def close(self):
+
+		#
+		self.__buffer.release()
+		self.__memory.close()
+
+# Column names accepted for each obs_st field (by index, as in DerivedFieldEngine.derive()) when reading CSV exports. Names are matched case-insensitively; a field with no column is missing.
+OBS_ST_CSV_COLUMNS = (
+	('timestamp', 'epoch', 'time_epoch'),
+	('wind_lull',),
+	('wind_avg',),
+	('wind_gust',),
+	('wind_direction', 'wind_dir'),
+	('wind_sample_interval', 'wind_interval'),
+	('station_pressure', 'pressure'),
+	('air_temperature', 'temperature'),
+	('relative_humidity', 'humidity'),
+	('illuminance', 'brightness', 'lux'),
+	('uv', 'uv_index'),
+	('solar_radiation',),
+	('precip', 'precip_accumulated', 'rain_accumulated', 'precipitation'),
+	('precip_type', 'precipitation_type'),
+	('lightning_strike_avg_distance', 'lightning_strike_average_distance', 'strike_distance'),
+	('lightning_strike_count', 'strike_count'),
+	('battery',),
+	('report_interval',),
+)
+
+# Opens a text file for reading, decompressing it first if its name ends in .gz.
+def open_archive(path):
+
+	#
+	if path.endswith('.gz'): return gzip.open(path, 'rt', encoding = 'utf-8', newline = '')
+
+	#
+	return open(path, 'r', encoding = 'utf-8', newline = '')
+
+# (serial_number, obs) for every obs row of every obs_st packet in a file of packets, one JSON object per line. Lines that aren't obs_st packets are skipped.
+def read_packet_log(path):
+
+	#
+	with open_archive(path) as file:
+
+		#
+		for line in file:
+
+			# The same cheap scan the dispatcher uses, so other packet types aren't decoded.
+			packet_type = PacketDispatcher.packet_type_of(line.encode('utf-8'))
+			if packet_type is not None and packet_type != 'obs_st': continue
+
+			#
+			try:
+				data = json.loads(line)
+			except ValueError:
+				continue
+
+			#
+			if not isinstance(data, dict) or data.get('type') != 'obs_st': continue
+
+			#
+			for obs in data.get('obs') or []:
+				yield (data.get('serial_number'), obs)
+
+# (serial_number, obs) for every row of a CSV export with a header row; see OBS_ST_CSV_COLUMNS. The serial number comes from a serial_number column if there is one.
+def read_csv_export(path, serial_number = None):
+
+	#
+	with open_archive(path) as file:
+
+		#
+		reader = csv.reader(file)
+		header = [name.strip().lower() for name in next(reader, [])]
+
+		#
+		indexes = [next((header.index(name) for name in names if name in header), None) for names in OBS_ST_CSV_COLUMNS]
+		serial_number_index = header.index('serial_number') if 'serial_number' in header else None
+
+		#
+		if indexes[0] is None: raise ValueError('%s has no timestamp column' % path)
+
+		#
+		def parse(text):
+
+			#
+			text = text.strip()
+			if not text: return None
+
+			#
+			try:
+				return int(text)
+			except ValueError:
+				return float(text)
+
+		#
+		for row in reader:
+
+			#
+			if not row: continue
+
+			#
+			yield (row[serial_number_index] if serial_number_index is not None else serial_number, [parse(row[index]) if index is not None and index < len(row) else None for index in indexes])
+
+# 50222 is the UDP port used by the Tempest hub to broadcast weather data.
+TEMPEST_UDP_PORT = 50222
+
+# Creates the UDP socket the hub broadcasts to. Shared by the threaded and asyncio receivers.
+def bind_tempest_socket(host = '0.0.0.0', port = TEMPEST_UDP_PORT, receive_buffer_bytes = None):
+
+	# We're interested in UDP.
+	tempest_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+	#
+	try:
+
+		# This allows us to rebind if needed and avoid a potential "Address already in use" error.
+		tempest_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+		# A bigger kernel buffer lets us ride out bursts of packets from busy hubs. The kernel may cap (or double) what we ask for.
+		if receive_buffer_bytes: tempest_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer_bytes)
+
+		#
+		tempest_socket.bind((host, port))
+
+	#
+	except Exception:
+
+		#
+		tempest_socket.close()
+		raise
+
+	#
+	return tempest_socket
+
+# A histogram of durations in seconds, with fixed bucket bounds so that observing one is a binary search and an increment.
+class TimingHistogram:
+
+	#
+	BOUNDS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+	#
+	__slots__ = ('bounds', 'counts', 'count', 'sum')
+
+	#
+	def __init__(self, bounds = BOUNDS):
+		self.bounds = tuple(bounds)
+		self.counts = [0] * (len(self.bounds) + 1)
+		self.count = 0
+		self.sum = 0.0
+
+	#
+	def observe(self, seconds):
+		self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+		self.count += 1
+		self.sum += seconds
+
+	# Cumulative (upper bound, count) pairs, as Prometheus expects them. The last bound is infinity.
+	def buckets(self):
+
+		#
+		cumulative = 0
+		buckets = []
+
+		#
+		for bound, count in zip(self.bounds + (math.inf,), list(self.counts)):
+			cumulative += count
+			buckets.append((bound, cumulative))
+
+		#
+		return buckets
+
+# Counters and per-stage timings for the ingest path. Counters are plain integer increments, so they're always on.
+# Timings cost a couple of perf_counter() calls per stage; with timing off, all that's left is a check of the flag.
+class Metrics:
+
+	#
+	STAGES = ('decode', 'derive', 'trend', 'cache_append', 'derived_fields', 'forecast')
+
+	#
+	def __init__(self, timing = True):
+
+		#
+		self.timing = timing
+
+		# Packets by type. Packets whose type we couldn't find are counted under None.
+		self.packets = {}
+
+		#
+		self.decode_errors = 0
+		self.handler_errors = 0
+		self.derivation_errors = 0
+		self.socket_binds = 0
+
+		# obs_st packets that got past the PacketDeduplicator but were already cached, that were too old for the cache, and that arrived late and were put in their place.
+		self.duplicate_observations = 0
+		self.stale_observations = 0
+		self.reordered_observations = 0
+
+		# obs_st and rapid_wind packets, and ingested rows, without a serial number. There's no telling which station they're from, so they're dropped.
+		self.unidentified_packets = 0
+
+		# time.monotonic() of the last obs_st we cached.
+		self.last_observation_monotonic = None
+
+		#
+		self.timings = {stage: TimingHistogram() for stage in self.STAGES}
+
+	#
+	def count_packet(self, packet_type):
+		self.packets[packet_type] = self.packets.get(packet_type, 0) + 1
+
+	#
+	def observe(self, stage, seconds):
+		self.timings[stage].observe(seconds)
+
+	#
+	def seconds_since_last_observation(self):
+
+		#
+		if self.last_observation_monotonic is None: return None
+
+		#
+		return time.monotonic() - self.last_observation_monotonic
+
+# Remembers the (packet type, serial number, epoch) of the last capacity packets, so a packet seen twice (a hub rebroadcast, two network interfaces, bridged listeners) is dropped the second time.
+# The key is scanned straight from the bytes, like the packet type, so a duplicate is dropped before it's decoded. Lookups and evictions are O(1): a set for membership, and a deque for the order keys leave in.
+class PacketDeduplicator:
+
+	# For each packet type we dedupe: what precedes its epoch in the hub's compact JSON, and where the epoch is in the decoded packet.
+	EPOCH_KEYS = {
+		'obs_st': (b'"obs":[[', ('obs', 0, 0)),
+		'rapid_wind': (b'"ob":[', ('ob', 0)),
+		'evt_precip': (b'"evt":[', ('evt', 0)),
+		'evt_strike': (b'"evt":[', ('evt', 0)),
+		'device_status': (b'"timestamp":', ('timestamp',)),
+		'hub_status': (b'"timestamp":', ('timestamp',)),
+	}
+
+	#
+	SERIAL_NUMBER = b'"serial_number":"'
+	EPOCH = re.compile(rb'\d+')
+
+	#
+	def __init__(self, capacity = 4096):
+		self.capacity = capacity
+		self.__keys = set()
+		self.__order = deque()
+
+	# The packet's key, or None if it isn't a type we dedupe or the scan can't find it.
+	def key_of_bytes(self, packet_type, bytes_from_tempest_hub):
+
+		#
+		epoch_key = self.EPOCH_KEYS.get(packet_type)
+		if epoch_key is None: return None
+
+		#
+		start = bytes_from_tempest_hub.find(self.SERIAL_NUMBER)
+		if start < 0: return None
+		start += len(self.SERIAL_NUMBER)
+		end = bytes_from_tempest_hub.find(b'"', start)
+		if end < 0 or bytes_from_tempest_hub.find(b'\\', start, end) >= 0: return None
+
+		#
+		index = bytes_from_tempest_hub.find(epoch_key[0])
+		if index < 0: return None
+		epoch = self.EPOCH.match(bytes_from_tempest_hub, index + len(epoch_key[0]))
+		if epoch is None: return None
+
+		#
+		return (packet_type, bytes_from_tempest_hub[start:end], int(epoch.group()))
+
+	# The same key from a decoded packet, for packets the scan couldn't read.
+	def key_of_data(self, packet_type, data):
+
+		#
+		epoch_key = self.EPOCH_KEYS.get(packet_type)
+		if epoch_key is None or not isinstance(data, dict) or not isinstance(data.get('serial_number'), str): return None
+
+		#
+		try:
+
+			#
+			epoch = data
+			for step in epoch_key[1]: epoch = epoch[step]
+
+		#
+		except (KeyError, IndexError, TypeError):
+			return None
+
+		#
+		if not isinstance(epoch, int): return None
+
+		#
+		return (packet_type, data['serial_number'].encode('utf-8'), epoch)
+
+	# Returns True if the key has been seen recently; otherwise remembers it, forgetting the oldest key if that takes us over capacity.
+	def seen(self, key):
+
+		#
+		if key in self.__keys: return True
+
+		#
+		self.__keys.add(key)
+		self.__order.append(key)
+		if len(self.__order) > self.capacity: self.__keys.discard(self.__order.popleft())
+
+		#
+		return False
+
+# Routes raw hub datagrams to handlers by packet type.
+# The type is read straight from the bytes with a cheap scan, so packets nobody has registered a handler for are dropped without ever being decoded. Only packets with a handler pay for json.loads().
+# With a PacketDeduplicator, packets it has already seen are dropped the same way.
+class PacketDispatcher:
+
+	# If metrics are given, packets are counted by type, decoding and handler failures are counted, and decoding is timed.
+	def __init__(self, metrics = None, deduplicator = None):
+		self.__handlers = {}
+		self.__metrics = metrics
+		self.deduplicator = deduplicator
+		self.skipped = 0
+		self.duplicates = 0
+
+	#
+	def register(self, packet_type, handler):
+		self.__handlers.setdefault(packet_type, []).append(handler)
+
+	#
+	def unregister(self, packet_type, handler):
+
+		#
+		handlers = self.__handlers.get(packet_type, [])
+		if handler in handlers: handlers.remove(handler)
+		if not handlers: self.__handlers.pop(packet_type, None)
+
+	#
+	def is_registered(self, packet_type):
+		return packet_type in self.__handlers
+
+	# Returns the packet's "type" value without decoding it, or None if we can't find it cheaply.
+	@staticmethod
+	def packet_type_of(bytes_from_tempest_hub):
+
+		# The hub sends compact JSON, so this is almost always a hit.
+		index = bytes_from_tempest_hub.find(b'"type":"')
+
+		#
+		if index >= 0:
+
+			#
+			end = bytes_from_tempest_hub.find(b'"', index + 8)
+			if end >= 0 and bytes_from_tempest_hub.find(b'\\', index + 8, end) < 0: return bytes_from_tempest_hub[index + 8:end].decode('ascii', 'replace')
+
+		# Otherwise allow for whitespace around the colon.
+		index = bytes_from_tempest_hub.find(b'"type"')
+
+		#
+		while index >= 0:
+
+			# It's only the key we're after if a colon follows; otherwise "type" was some other value, so keep looking.
+			colon = index + 6
+			while colon < len(bytes_from_tempest_hub) and bytes_from_tempest_hub[colon] in b' \t\r\n': colon += 1
+
+			#
+			if colon < len(bytes_from_tempest_hub) and bytes_from_tempest_hub[colon] == 58:
+
+				#
+				start = bytes_from_tempest_hub.find(b'"', colon + 1)
+				end = bytes_from_tempest_hub.find(b'"', start + 1) if start >= 0 else -1
+
+				# Anything unusual between the colon and the opening quote (null, a number, an escape) and we give up and let json.loads() decide.
+				if start < 0 or end < 0 or bytes_from_tempest_hub[colon + 1:start].strip() or b'\\' in bytes_from_tempest_hub[start + 1:end]: return None
+
+				#
+				return bytes_from_tempest_hub[start + 1:end].decode('ascii', 'replace')
+
+			#
+			index = bytes_from_tempest_hub.find(b'"type"', index + 6)
+
+		#
+		return None
+
+	# Returns True if the packet was handed to at least one handler.
+	def dispatch(self, bytes_from_tempest_hub):
+
+		#
+		metrics = self.__metrics
+		packet_type = self.packet_type_of(bytes_from_tempest_hub)
+
+		# The fast path: nobody wants this type, so don't decode it.
+		if packet_type is not None and packet_type not in self.__handlers:
+			if metrics is not None: metrics.count_packet(packet_type)
+			self.skipped += 1
+			return False
+
+		# The same packet again, caught before decoding.
+		deduplicator = self.deduplicator
+		key = deduplicator.key_of_bytes(packet_type, bytes_from_tempest_hub) if deduplicator is not None and packet_type is not None else None
+
+		#
+		if key is not None and deduplicator.seen(key):
+			if metrics is not None: metrics.count_packet(packet_type)
+			self.duplicates += 1
+			return False
+
+		#
+		try:
+
+			#
+			if metrics is not None and metrics.timing:
+				started = time.perf_counter()
+				data = json.loads(bytes_from_tempest_hub.decode('utf-8'))
+				metrics.observe('decode', time.perf_counter() - started)
+			else:
+				data = json.loads(bytes_from_tempest_hub.decode('utf-8'))
+
+		#
+		except ValueError:
+			if metrics is not None: metrics.decode_errors += 1
+			raise
+
+		# The slow path, for packets we couldn't scan.
+		if packet_type is None:
+
+			#
+			packet_type = data.get('type') if isinstance(data, dict) else None
+
+			#
+			if packet_type not in self.__handlers:
+				if metrics is not None: metrics.count_packet(packet_type)
+				self.skipped += 1
+				return False
+
+		# Packets the scan couldn't key, keyed from what we decoded.
+		if deduplicator is not None and key is None:
+
+			#
+			key = deduplicator.key_of_data(packet_type, data)
+
+			#
+			if key is not None and deduplicator.seen(key):
+				if metrics is not None: metrics.count_packet(packet_type)
+				self.duplicates += 1
+				return False
+
+		#
+		if metrics is not None: metrics.count_packet(packet_type)
+
+		#
+		try:
+
+			#
+			for handler in tuple(self.__handlers[packet_type]):
+				handler(data)
+
+		#
+		except Exception:
+			if metrics is not None: metrics.handler_errors += 1
+			raise
+
+		#
+		return True
+
+# What an IngestQueue does with a new datagram when it's full.
+@enum.unique
+class OverflowPolicy(enum.Enum):
+
+	#
+	DROP_OLDEST = 1
+	DROP_NEWEST = 2
+
+	# Wait for the processing stage to make room. The receiver stops reading the socket meanwhile, so nothing is dropped here, but the kernel may drop datagrams once its buffer fills, uncounted.
+	BLOCK = 3
+
+# A bounded, thread-safe queue between the receiver stage (which only reads the socket) and the processing stage (which parses and derives).
+# Items are (bytes_from_tempest_hub, received_epoch, address) tuples. Counts of everything received and dropped are kept for monitoring.
+class IngestQueue:
+
+	#
+	def __init__(self, capacity = 1024, overflow_policy = OverflowPolicy.DROP_OLDEST):
+		self.capacity = capacity
+		self.overflow_policy = overflow_policy
+		self.received = 0
+		self.dropped = 0
+		self.__items = deque()
+		self.__condition = threading.Condition()
+
+	#
+	def __len__(self):
+		return len(self.__items)
+
+	# Adds a batch of items under a single lock acquisition (released only while blocked), applying the overflow policy one item at a time.
+	def put_many(self, items):
+
+		#
+		with self.__condition:
+
+			#
+			for item in items:
+
+				#
+				self.received += 1
+
+				#
+				if len(self.__items) >= self.capacity and self.overflow_policy is OverflowPolicy.BLOCK:
+					self.__condition.notify_all()
+					self.__condition.wait_for(lambda: len(self.__items) < self.capacity)
+
+				#
+				if len(self.__items) >= self.capacity:
+
+					#
+					self.dropped += 1
+
+					#
+					if self.overflow_policy is OverflowPolicy.DROP_NEWEST: continue
+
+					#
+					self.__items.popleft()
+
+				#
+				self.__items.append(item)
+
+			# Both stages wait on the one condition, so wake them all.
+			self.__condition.notify_all()
+
+	#
+	def put(self, item):
+		self.put_many((item,))
+
+	# Removes and returns up to maximum items, waiting (up to timeout seconds, or forever if None) for at least one to arrive.
+	def get_batch(self, maximum, timeout = None):
+
+		#
+		with self.__condition:
+
+			#
+			self.__condition.wait_for(lambda: self.__items, timeout)
+
+			#
+			batch = [self.__items.popleft() for i in range(min(maximum, len(self.__items)))]
+
+			# There may be a blocked put_many() waiting for the room.
+			if batch: self.__condition.notify_all()
+
+			#
+			return batch
+
+# Reads every datagram that's already waiting on a non-blocking socket, without waiting for more.
+def drain_datagrams(tempest_socket, maximum = 1024):
+
+	#
+	datagrams = []
+	received_epoch = time.time()
+
+	#
+	while len(datagrams) < maximum:
+
+		#
+		try:
+			bytes_from_tempest_hub, address = tempest_socket.recvfrom(4096)
+		except (BlockingIOError, InterruptedError):
+			break
+
+		#
+		datagrams.append((bytes_from_tempest_hub, received_epoch, address))
+
+	#
+	return datagrams
+
+# Records raw datagrams, as received, to a directory of segment files, for troubleshooting derived values and for building replay corpora.
+# record_many() only puts the datagrams on a bounded queue (dropping the newest, and counting them, if the writer falls behind), so the receive loop never waits on the disk. A background thread does the writing.
+# Segments are named <prefix>-<UTC start time>-<number>.twhpackets, with .gz or .zst appended if compressed, and are rotated once they hold segment_bytes of datagrams or have been open for segment_seconds.
+# Each segment is MAGIC followed by one RECORD per datagram (received epoch, source port, source host length, datagram length), then the host and the datagram. read_packet_recording() reads them back.
+class PacketRecorder:
+
+	#
+	MAGIC = b'TWHPKT01'
+	RECORD = struct.Struct('<dHHI')
+	COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+	# compression is 'gzip', 'zstd' (which needs the zstandard package) or None. Buffered records are flushed to disk at least every flush_seconds.
+	def __init__(self, directory, compression = 'gzip', segment_bytes = 64 << 20, segment_seconds = 3600, flush_seconds = 5, queue_size = 65536, prefix = 'packets'):
+
+		#
+		if compression not in self.COMPRESSIONS: raise ValueError('compression must be one of: ' + ', '.join(str(compression) for compression in self.COMPRESSIONS))
+		if compression == 'zstd' and zstandard is None: raise ValueError('zstd compression needs the zstandard package')
+
+		#
+		os.makedirs(directory, exist_ok = True)
+
+		#
+		self.directory = directory
+		self.compression = compression
+		self.segment_bytes = segment_bytes
+		self.segment_seconds = segment_seconds
+		self.flush_seconds = flush_seconds
+		self.prefix = prefix
+
+		#
+		self.recorded = 0
+		self.segments = 0
+		self.bytes_written = 0
+		self.errors = 0
+
+		#
+		self.__queue = IngestQueue(queue_size, OverflowPolicy.DROP_NEWEST)
+		self.__segment = None
+		self.__segment_bytes = 0
+		self.__segment_opened = 0
+		self.__flushed = 0
+		self.__unflushed = False
+		self.__stopping = False
+
+		#
+		self.__thread = threading.Thread(target = self.__write, daemon = True)
+		self.__thread.start()
+
+	# Datagrams dropped because the writer couldn't keep up.
+	@property
+	def dropped(self):
+		return self.__queue.dropped
+
+	# Queues (datagram, received epoch, (host, port)) tuples, as drain_datagrams() returns them, for writing.
+	def record_many(self, datagrams):
+		self.__queue.put_many(datagrams)
+
+	#
+	def record(self, datagram, received_epoch, address):
+		self.__queue.put((datagram, received_epoch, address))
+
+	#
+	def statistics(self):
+		return {'recorded': self.recorded, 'dropped': self.dropped, 'queued': len(self.__queue), 'segments': self.segments, 'bytes_written': self.bytes_written, 'errors': self.errors}
+
+	# Writes whatever is still queued, closes the current segment, and stops the writer.
+	def close(self):
+
+		#
+		self.__stopping = True
+		self.__thread.join()
+
+	# The writer thread.
+	def __write(self):
+
+		#
+		while True:
+
+			# Waking at least once a second lets close() and the flush deadline be noticed while idle.
+			batch = self.__queue.get_batch(1024, timeout = min(self.flush_seconds, 1))
+
+			#
+			try:
+
+				#
+				for datagram, received_epoch, address in batch:
+					self.__write_record(datagram, received_epoch, address)
+
+				#
+				if self.__unflushed and time.monotonic() - self.__flushed >= self.flush_seconds:
+					self.__segment.flush()
+					self.__flushed = time.monotonic()
+					self.__unflushed = False
+
+			#
+			except Exception as e:
+
+				#
+				self.errors += 1
+
+				#
+				print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+				# Start a fresh segment rather than append to one in an unknown state.
+				self.__close_segment()
+
+			#
+			if self.__stopping and not len(self.__queue): break
+
+		#
+		self.__close_segment()
+
+	#
+	def __write_record(self, datagram, received_epoch, address):
+
+		#
+		if self.__segment is not None and (self.__segment_bytes >= self.segment_bytes or time.monotonic() - self.__segment_opened >= self.segment_seconds): self.__close_segment()
+		if self.__segment is None: self.__open_segment()
+
+		#
+		host = str(address[0]).encode('utf-8') if address else b''
+		port = address[1] if address else 0
+
+		#
+		record = self.RECORD.pack(received_epoch, port, len(host), len(datagram)) + host + datagram
+		self.__segment.write(record)
+
+		#
+		self.__segment_bytes += len(record)
+		self.__unflushed = True
+		self.bytes_written += len(record)
+		self.recorded += 1
+
+	#
+	def __open_segment(self):
+
+		#
+		name = '%s-%s-%06d.twhpackets%s' % (self.prefix, time.strftime('%Y%m%dT%H%M%SZ', time.gmtime()), self.segments, self.COMPRESSIONS[self.compression])
+		path = os.path.join(self.directory, name)
+
+		#
+		if self.compression == 'gzip':
+			self.__segment = gzip.open(path, 'wb', compresslevel = 6)
+		elif self.compression == 'zstd':
+			self.__segment = zstandard.ZstdCompressor(level = 3).stream_writer(open(path, 'wb'))
+		else:
+			self.__segment = open(path, 'wb')
+
+		#
+		self.__segment.write(self.MAGIC)
+		self.__segment_bytes = 0
+		self.__segment_opened = self.__flushed = time.monotonic()
+		self.segments += 1
+
+	#
+	def __close_segment(self):
+
+		#
+		if self.__segment is None: return
+
+		#
+		try:
+			self.__segment.close()
+		except Exception as e:
+			self.errors += 1
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+		#
+		self.__segment = None
+		self.__unflushed = False
+
+# (received epoch, (host, port), datagram) for every datagram in a PacketRecorder segment, or in every segment in a directory, oldest segment first.
+# Records are read one at a time, so a capture of any size can be replayed without loading it. A segment that ends part way through a record (the one still being written, or one cut off by a crash) ends there.
+def read_packet_recording(path):
+
+	#
+	if os.path.isdir(path):
+
+		#
+		for name in sorted(os.listdir(path)):
+			if '.twhpackets' in name: yield from read_packet_recording(os.path.join(path, name))
+
+		#
+		return
+
+	#
+	with open(path, 'rb') as raw_file:
+
+		# Compression is told from the content rather than the name.
+		signature = raw_file.read(4)
+		raw_file.seek(0)
+
+		#
+		if signature[:2] == b'\x1f\x8b':
+			file = gzip.GzipFile(fileobj = raw_file)
+		elif signature == b'\x28\xb5\x2f\xfd':
+			if zstandard is None: raise ValueError('%s is zstd-compressed, which needs the zstandard package' % path)
+			file = zstandard.ZstdDecompressor().stream_reader(raw_file)
+		else:
+			file = raw_file
+
+		#
+		try:
+
+			#
+			if file.read(len(PacketRecorder.MAGIC)) != PacketRecorder.MAGIC: raise ValueError('%s is not a packet recording' % path)
+
+			#
+			while True:
+
+				#
+				header = file.read(PacketRecorder.RECORD.size)
+				if len(header) < PacketRecorder.RECORD.size: return
+
+				#
+				received_epoch, port, host_length, datagram_length = PacketRecorder.RECORD.unpack(header)
+				host = file.read(host_length)
+				datagram = file.read(datagram_length)
+				if len(host) < host_length or len(datagram) < datagram_length: return
+
+				#
+				yield (received_epoch, (host.decode('utf-8'), port), datagram)
+
+		# A compressed segment that was never closed.
+		except (EOFError, zlib.error):
+			return
+		except Exception as e:
+			if zstandard is not None and isinstance(e, zstandard.ZstdError): return
+			raise
+
+# A subscriber's view of newly published observations, as (serial_number, observation) pairs. Iterate it with for (blocking) or async for, or call get().
+# Nothing queues up: a subscriber that falls behind holds at most one pending observation per station, the newest, and coalesced counts the ones it never saw.
+# If fields is given, only observations in which one of those fields changed (from the station's previous observation) are delivered. If station is given, only that station's are.
+class Subscription:
+
+	#
+	def __init__(self, fields = None, station = None):
+
+		#
+		unknown = [key for key in fields or () if key not in Observation.__slots__]
+		if unknown: raise ValueError('unknown fields: ' + ', '.join(unknown))
+
+		#
+		self.fields = tuple(fields) if fields is not None else None
+		self.station = station
+		self.coalesced = 0
+		self.closed = False
+
+		# serial_number → the newest observation not yet taken, oldest station first.
+		self.__pending = {}
+		self.__condition = threading.Condition()
+
+		# Set by __anext__(), so offer() can wake an event loop.
+		self.__loop = None
+		self.__event = None
+
+	# Called by the publisher with each new observation and the one it replaces. Never blocks on the subscriber.
+	def offer(self, serial_number, previous, observation):
+
+		#
+		if self.closed: return
+		if self.station is not None and serial_number != self.station: return
+
+		#
+		if self.fields is not None and previous is not None and all(getattr(previous, key) == getattr(observation, key) for key in self.fields): return
+
+		#
+		with self.__condition:
+
+			#
+			if serial_number in self.__pending: self.coalesced += 1
+			self.__pending[serial_number] = observation
+
+			#
+			self.__condition.notify()
+
+		#
+		self.__wake_loop()
+
+	# Stops delivery. Blocked and awaiting readers return (or end their iteration) once anything still pending has been taken.
+	def close(self):
+
+		#
+		with self.__condition:
+			self.closed = True
+			self.__condition.notify_all()
+
+		#
+		self.__wake_loop()
+
+	#
+	def __wake_loop(self):
+
+		#
+		loop, event = self.__loop, self.__event
+		if loop is None: return
+
+		#
+		try:
+			loop.call_soon_threadsafe(event.set)
+		except RuntimeError:
+			pass
+
+	# The oldest pending (serial_number, observation), or None.
+	def __take(self):
+
+		#
+		with self.__condition:
+
+			#
+			if not self.__pending: return None
+
+			#
+			serial_number = next(iter(self.__pending))
+			return (serial_number, self.__pending.pop(serial_number))
+
+	# Blocks until there's something to deliver. Returns None on timeout, or once closed with nothing pending.
+	def get(self, timeout = None):
+
+		#
+		with self.__condition:
+			self.__condition.wait_for(lambda: self.__pending or self.closed, timeout)
+
+		#
+		return self.__take()
+
+	#
+	def __iter__(self):
+		return self
+
+	#
+	def __next__(self):
+
+		#
+		item = self.get()
+		if item is None: raise StopIteration
+
+		#
+		return item
+
+	#
+	def __aiter__(self):
+		return self
+
+	#
+	async def __anext__(self):
+
+		# Register with the event loop before checking, so an offer() between the check and the wait still wakes us.
+		if self.__event is None or self.__loop is not asyncio.get_running_loop():
+			self.__event = asyncio.Event()
+			self.__loop = asyncio.get_running_loop()
+
+		#
+		while True:
+
+			#
+			self.__event.clear()
+
+			#
+			item = self.__take()
+			if item is not None: return item
+			if self.closed: raise StopAsyncIteration
+
+			#
+			await self.__event.wait()
+
+# The raw obs_st values, by index, as inputs to derived fields: obs_wind_avg, obs_air_temperature, and so on.
+OBS_ST_INPUTS = {'obs_' + names[0]: index for index, names in enumerate(OBS_ST_CSV_COLUMNS)}
+
+# One stage of a DerivedFieldGraph: a field computed by calling function with the values of its inputs, in order.
+class DerivedField:
+
+	#
+	__slots__ = ('name', 'inputs', 'function', 'lazy')
+
+	#
+	def __init__(self, name, inputs, function, lazy = False):
+		self.name = name
+		self.inputs = tuple(inputs)
+		self.function = function
+		self.lazy = lazy
+
+# Fields derived on top of each Observation, registered at run time rather than written into DerivedFieldEngine. Each stage declares its inputs: fields of the Observation, raw obs_st values (see OBS_ST_INPUTS), or other stages registered before it.
+# Stages run in registration order, which is always a dependency order, since inputs have to exist first. A stage whose inputs are the same as last time keeps its last value without being called, and a stage with a missing (None) input is None.
+# Lazy stages aren't run as observations arrive, only when someone reads them (or an eager stage needs them).
+# The fields aren't stored with the cache, so they cost nothing per observation unless they're eager, and the on-disk and shared memory layouts don't change when they do.
+# A stage whose function raises is None for that observation; errors counts how many times each stage has raised, for get_metrics().
+class DerivedFieldGraph:
+
+	#
+	def __init__(self, stages = ()):
+
+		# Replaced (never mutated) on register and unregister, so evaluation can iterate it without a lock.
+		self.__stages = {}
+		self.__lock = threading.Lock()
+
+		# Stage name → how many times its function has raised.
+		self.errors = {}
+
+		#
+		for name, inputs, function, lazy in stages:
+			self.register(name, inputs, function, lazy)
+
+	#
+	def names(self):
+		return list(self.__stages)
+
+	#
+	def register(self, name, inputs, function, lazy = False):
+
+		#
+		with self.__lock:
+
+			#
+			if name in Observation.__slots__ or name in OBS_ST_INPUTS or name in self.__stages: raise ValueError('%s is already a field' % name)
+
+			#
+			unknown = [key for key in inputs if key not in Observation.__slots__ and key not in OBS_ST_INPUTS and key not in self.__stages]
+			if unknown: raise ValueError('unknown inputs: ' + ', '.join(unknown))
+
+			#
+			stages = dict(self.__stages)
+			stages[name] = DerivedField(name, inputs, function, lazy)
+			self.__stages = stages
+
+	# Raises ValueError if another stage takes this one as an input.
+	def unregister(self, name):
+
+		#
+		with self.__lock:
+
+			#
+			dependents = [stage.name for stage in self.__stages.values() if name in stage.inputs]
+			if dependents: raise ValueError('%s is an input to: %s' % (name, ', '.join(dependents)))
+
+			#
+			stages = dict(self.__stages)
+			stages.pop(name, None)
+			self.__stages = stages
+
+	# Runs the stages needed for names (every eager stage if names is None) against an observation and the obs row it came from (None if we don't have it), reusing the memo from last time wherever a stage's inputs haven't changed.
+	# memo maps each stage to (its inputs, its value). Returns the new memo, which still holds stages that weren't needed this time, so they can be reused later.
+	def evaluate(self, observation, obs, memo, names = None):
+
+		#
+		stages = self.__stages
+
+		#
+		if names is None:
+			needed = {stage.name for stage in stages.values() if not stage.lazy}
+		else:
+			unknown = [name for name in names if name not in stages]
+			if unknown: raise ValueError('unknown derived fields: ' + ', '.join(unknown))
+			needed = set(names)
+
+		# Everything a needed stage depends on is needed too.
+		for stage in reversed(list(stages.values())):
+			if stage.name in needed: needed.update(key for key in stage.inputs if key in stages)
+
+		#
+		memo = dict(memo)
+
+		#
+		for stage in stages.values():
+
+			#
+			if stage.name not in needed: continue
+
+			#
+			inputs = []
+
+			#
+			for key in stage.inputs:
+
+				#
+				if key in OBSERVATION_KINDS:
+					inputs.append(getattr(observation, key))
+				elif key in OBS_ST_INPUTS:
+					inputs.append(obs[OBS_ST_INPUTS[key]] if obs is not None and OBS_ST_INPUTS[key] < len(obs) else None)
+				else:
+					inputs.append(memo[key][1])
+
+			#
+			inputs = tuple(inputs)
+
+			#
+			previous = memo.get(stage.name)
+			if previous is not None and previous[0] == inputs: continue
+
+			#
+			value = None
+
+			#
+			if None not in inputs:
+
+				#
+				try:
+					value = stage.function(*inputs)
+				except Exception as e:
+					self.errors[stage.name] = self.errors.get(stage.name, 0) + 1
+					print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+			#
+			memo[stage.name] = (inputs, value)
+
+		#
+		return memo
+
+# Dew point by the Magnus formula, with the Alduchov and Eskridge coefficients.
+def dew_point_c(temperature_c, relative_humidity):
+
+	#
+	if relative_humidity <= 0: return None
+
+	#
+	gamma = math.log(relative_humidity / 100) + 17.625 * temperature_c / (243.04 + temperature_c)
+
+	#
+	return round(243.04 * gamma / (17.625 - gamma), 1)
+
+#
+def celsius_to_fahrenheit(temperature_c):
+	return round(temperature_c * 1.8 + 32, 1)
+
+#
+def fahrenheit_to_celsius(temperature_f):
+	return round((temperature_f - 32) / 1.8, 1)
+
+# The US National Weather Service heat index: Steadman's simple formula, or the Rothfusz regression (with its adjustments) once that comes out at 80°F or more.
+# See: https://www.wpc.ncep.noaa.gov/html/heatindex_equation.shtml
+def heat_index_f(temperature_f, relative_humidity):
+
+	#
+	t, rh = temperature_f, relative_humidity
+	simple = 0.5 * (t + 61.0 + (t - 68.0) * 1.2 + rh * 0.094)
+	if (simple + t) / 2 < 80: return round(simple, 1)
+
+	#
+	heat_index = -42.379 + 2.04901523 * t + 10.14333127 * rh - 0.22475541 * t * rh - 0.00683783 * t * t - 0.05481717 * rh * rh + 0.00122874 * t * t * rh + 0.00085282 * t * rh * rh - 0.00000199 * t * t * rh * rh
+
+	#
+	if rh < 13 and 80 <= t <= 112:
+		heat_index -= (13 - rh) / 4 * math.sqrt((17 - abs(t - 95)) / 17)
+	elif rh > 85 and 80 <= t <= 87:
+		heat_index += (rh - 85) / 10 * (87 - t) / 5
+
+	#
+	return round(heat_index, 1)
+
+# The US National Weather Service wind chill, from the average wind over the report interval. It's only defined at 50°F or below with 3 mph or more of wind; otherwise it's the temperature.
+# See: https://www.weather.gov/media/epz/wxcalc/windChill.pdf
+def wind_chill_f(temperature_f, wind_average_meters_per_second):
+
+	#
+	wind_miles_per_hour = wind_average_meters_per_second * DerivedFieldEngine.MPH_PER_METERS_PER_SECOND
+	if temperature_f > 50 or wind_miles_per_hour < 3: return temperature_f
+
+	#
+	power = wind_miles_per_hour ** 0.16
+
+	#
+	return round(35.74 + 0.6215 * temperature_f - 35.75 * power + 0.4275 * temperature_f * power, 1)
+
+# Heat index when it's hot, wind chill when it's cold, and the temperature in between.
+def feels_like_f(temperature_f, heat_index_f, wind_chill_f):
+
+	#
+	if temperature_f >= 80: return heat_index_f
+	if temperature_f <= 50: return wind_chill_f
+
+	#
+	return temperature_f
+
+# Registered with every TempestWeatherHelper, all lazy: (name, inputs, function, lazy).
+STANDARD_DERIVED_FIELDS = (
+	('dew_point_c', ('temperature_c', 'relative_humidity'), dew_point_c, True),
+	('dew_point_f', ('dew_point_c',), celsius_to_fahrenheit, True),
+	('heat_index_f', ('temperature_f', 'relative_humidity'), heat_index_f, True),
+	('wind_chill_f', ('temperature_f', 'obs_wind_avg'), wind_chill_f, True),
+	('feels_like_f', ('temperature_f', 'heat_index_f', 'wind_chill_f'), feels_like_f, True),
+	('feels_like_c', ('feels_like_f',), fahrenheit_to_celsius, True),
+)
+
+# Short-term outlooks, for the next 6 to 12 hours, from most to least settled; see Forecaster.
+@enum.unique
+class Forecast(enum.Enum):
+
+	#
+	SETTLED = 1
+	FAIR = 2
+	CLEARING = 3
+	CLEARING_AND_WINDY = 4
+	BECOMING_UNSETTLED = 5
+	UNSETTLED = 6
+	PRECIPITATION_LIKELY = 7
+	PRECIPITATION_CONTINUING = 8
+	STORMY = 9
+
+# A short-term forecast from the latest observation, in the spirit of the Sager Weathercaster: the barometer's tendency, read against where the wind is coming from and whether it's raining now.
+# The full Sager tables also want the sea-level pressure and the state of the sky, which a Tempest doesn't report, so this is the coarser rule of thumb behind them: falling pressure with the wind from the east or south brings precipitation, rising pressure with the wind from the west or north brings fair weather, and the faster the change, the sooner and stronger.
+# Everything it reads is already kept incrementally (the pressure trends, and the rolling rapid_wind averages), so a forecast is a handful of table lookups.
+class Forecaster:
+
+	# Eight compass points, clockwise from north, each covering 45°.
+	WIND_SECTORS = ('N', 'NE', 'E', 'SE', 'S', 'SW', 'W', 'NW')
+
+	# What the wind tends to bring in the mid-latitudes of the Northern Hemisphere, by where it's coming from. Calm (or no wind reading at all) has a column of its own.
+	WIND_GROUPS = {'N': 'WESTERLY', 'NE': 'EASTERLY', 'E': 'EASTERLY', 'SE': 'EASTERLY', 'S': 'SOUTHERLY', 'SW': 'SOUTHERLY', 'W': 'WESTERLY', 'NW': 'WESTERLY', 'CALM': 'CALM', None: 'CALM'}
+
+	# In the Southern Hemisphere, lows turn the other way, so the roles of north and south swap.
+	SOUTHERN_HEMISPHERE_SECTORS = {'N': 'S', 'NE': 'SE', 'E': 'E', 'SE': 'NE', 'S': 'N', 'SW': 'NW', 'W': 'W', 'NW': 'SW'}
+
+	# The forecast for each pressure tendency and wind group.
+	TABLE = {
+		PressureTrend.RISING_RAPIDLY: {'EASTERLY': Forecast.CLEARING_AND_WINDY, 'SOUTHERLY': Forecast.CLEARING_AND_WINDY, 'WESTERLY': Forecast.CLEARING_AND_WINDY, 'CALM': Forecast.CLEARING},
+		PressureTrend.RISING_SLOWLY: {'EASTERLY': Forecast.CLEARING, 'SOUTHERLY': Forecast.CLEARING, 'WESTERLY': Forecast.FAIR, 'CALM': Forecast.FAIR},
+		PressureTrend.STEADY: {'EASTERLY': Forecast.BECOMING_UNSETTLED, 'SOUTHERLY': Forecast.FAIR, 'WESTERLY': Forecast.SETTLED, 'CALM': Forecast.SETTLED},
+		PressureTrend.FALLING_SLOWLY: {'EASTERLY': Forecast.PRECIPITATION_LIKELY, 'SOUTHERLY': Forecast.UNSETTLED, 'WESTERLY': Forecast.BECOMING_UNSETTLED, 'CALM': Forecast.BECOMING_UNSETTLED},
+		PressureTrend.FALLING_RAPIDLY: {'EASTERLY': Forecast.STORMY, 'SOUTHERLY': Forecast.STORMY, 'WESTERLY': Forecast.PRECIPITATION_LIKELY, 'CALM': Forecast.PRECIPITATION_LIKELY},
+	}
+
+	# The three-hour change says where the pressure has been; the shape of the curve says which way it's going now. A curve that has turned moves the tendency a step that way.
+	# A rise that has levelled off (RISING_THEN_STEADY) counts as turning down: the three-hour change still reads rising, but the pressure no longer is, so it steps down to steady. FALLING_THEN_STEADY steps up the same way.
+	TENDENCIES = tuple(PressureTrend)
+	STEADY_INDEX = TENDENCIES.index(PressureTrend.STEADY)
+	RECENTLY_FALLING = frozenset((PressureTrendAdvanced.RISING_THEN_SLIGHTLY_FALLING, PressureTrendAdvanced.RISING_THEN_STEADY, PressureTrendAdvanced.STEADY_THEN_FALLING, PressureTrendAdvanced.SLIGHTLY_RISING_THEN_FALLING))
+	RECENTLY_RISING = frozenset((PressureTrendAdvanced.FALLING_THEN_SLIGHTLY_RISING, PressureTrendAdvanced.FALLING_THEN_STEADY, PressureTrendAdvanced.STEADY_THEN_RISING, PressureTrendAdvanced.SLIGHTLY_FALLING_THEN_RISING))
+
+	# A fresh breeze on average, or near-gale gusts, with the pressure falling is a storm on its way.
+	STRONG_WIND_MILES_PER_HOUR = WindGust.FRESH_BREEZE.a_mph
+	STRONG_GUST_MILES_PER_HOUR = WindGust.NEAR_GALE.a_mph
+
+	# What get_forecast() returns before there's anything to go on.
+	EMPTY_FORECAST = {'last_updated_epoch': None, 'forecast': None, 'pressure_tendency': None, 'wind_direction': None, 'wind_average_miles_per_hour': None, 'precipitation_detected': None, 'strong_wind': None}
+
+	#
+	def __init__(self, southern_hemisphere = False):
+		self.southern_hemisphere = southern_hemisphere
+
+	# The compass point the wind is coming from, 'CALM', or None if there's no direction.
+	def wind_sector(self, wind_direction_degrees, wind_average_miles_per_hour = None):
+
+		#
+		if wind_average_miles_per_hour is not None and wind_average_miles_per_hour < WindGust.CALM.b_mph: return 'CALM'
+		if wind_direction_degrees is None: return None
+
+		#
+		return self.WIND_SECTORS[int((wind_direction_degrees % 360 + 22.5) // 45) % 8]
+
+	# The forecast for an observation, given the wind's average speed and direction (from rapid_wind, ideally, or the obs row), in get_for_json() form. The forecast is None until there's a pressure trend to go on.
+	def forecast(self, observation, wind_average_miles_per_hour = None, wind_direction_degrees = None):
+
+		#
+		tendency = observation.pressure_trend_three_hours_description or observation.pressure_trend_one_hour_description
+		if tendency is None: return dict(self.EMPTY_FORECAST, last_updated_epoch = observation.last_updated_epoch)
+
+		#
+		index = self.TENDENCIES.index(tendency)
+		steady = self.STEADY_INDEX
+		shape = observation.pressure_trend_advanced_three_hours_description
+
+		#
+		if shape in self.RECENTLY_FALLING and index >= steady:
+			index -= 1
+		elif shape in self.RECENTLY_RISING and index <= steady:
+			index += 1
+
+		#
+		tendency = self.TENDENCIES[index]
+		sector = self.wind_sector(wind_direction_degrees, wind_average_miles_per_hour)
+		group = self.WIND_GROUPS[self.SOUTHERN_HEMISPHERE_SECTORS.get(sector, sector) if self.southern_hemisphere else sector]
+		forecast = self.TABLE[tendency][group]
+
+		#
+		raining = bool(observation.precipitation_detected)
+		strong_wind = (wind_average_miles_per_hour is not None and wind_average_miles_per_hour >= self.STRONG_WIND_MILES_PER_HOUR) or (observation.wind_gust_miles_per_hour is not None and observation.wind_gust_miles_per_hour >= self.STRONG_GUST_MILES_PER_HOUR)
+
+		# Rain with the pressure rising is on its way out; with it steady or falling, it's set in.
+		if raining and index > steady:
+			if forecast is not Forecast.CLEARING_AND_WINDY: forecast = Forecast.CLEARING
+		elif raining and forecast is not Forecast.STORMY:
+			forecast = Forecast.PRECIPITATION_CONTINUING
+
+		#
+		if strong_wind and index < steady:
+			forecast = Forecast.STORMY
+		elif strong_wind and forecast is Forecast.CLEARING:
+			forecast = Forecast.CLEARING_AND_WINDY
+
+		#
+		return {'last_updated_epoch': observation.last_updated_epoch, 'forecast': forecast.name.replace('_', ' '), 'pressure_tendency': tendency.name.replace('_', ' '), 'wind_direction': sector, 'wind_average_miles_per_hour': round(wind_average_miles_per_hour, 1) if wind_average_miles_per_hour is not None else None, 'precipitation_detected': raining, 'strong_wind': strong_wind}
+
+# Where an observation fits in a station's cache, by its epoch; see Station.arrival_of().
+@enum.unique
+class Arrival(enum.Enum):
+
+	# Newer than everything cached: the usual case.
+	NEWEST = 1
+
+	# Older than the newest cached observation, but with a place in the cache.
+	LATE = 2
+
+	# An observation with the same epoch is already cached.
+	DUPLICATE = 3
+
+	# Older than everything in a full cache, so there's no place for it.
+	STALE = 4
+
+# Everything we know about one station: its latest observation, its history, and the incremental state behind its pressure trends.
+# Stations are keyed by serial number, so observations from several Tempest hubs on the same LAN never mix. Memory is bounded per station by the history capacity.
+class Station:
+
+	#
+	def __init__(self, serial_number, hub_sn = None, capacity = 720, rollup_tiers = DEFAULT_ROLLUP_TIERS, minimum_coverage = DEFAULT_MINIMUM_COVERAGE):
+
+		#
+		self.serial_number = serial_number
+		self.hub_sn = hub_sn
+
+		# Cache approximately 12 hours of data.
+		self.__history = ObservationRing(capacity)
+
+		# Coarser and coarser summaries of everything older, finest first.
+		self.__tiers = [RollupTier(bucket_seconds, tier_capacity) for bucket_seconds, tier_capacity in sorted(rollup_tiers)]
+
+		# Incremental pressure statistics over the last few hours, minute by minute, for O(1) trend lookups. Trends need minimum_coverage of the readings expected in a window, at one per report interval (obs[17] of the latest packet), to have a pressure.
+		self.__pressure_windows = PressureWindows(capacity = capacity)
+		self.minimum_coverage = minimum_coverage
+		self.report_interval_minutes = 1
+
+		# The last few minutes of rapid_wind samples, with rolling averages and gusts.
+		self.__wind = RapidWindRing()
+
+		# The observation the forecast (see Forecaster) was last worked out for, and the forecast. Swapped as one tuple.
+		self.__forecast = (EMPTY_OBSERVATION, Forecaster.EMPTY_FORECAST)
+
+		# The observation that derived fields (see DerivedFieldGraph) were last evaluated against, the obs row it came from, and the graph's memo. Swapped as one tuple.
+		self.__derived = (EMPTY_OBSERVATION, None, {})
+		self.__derived_lock = threading.Lock()
+
+		# The latest observation, its strict JSON, and its generation, published together as one immutable tuple. The generation is bumped every time an observation is cached.
+		self.__latest = (EMPTY_OBSERVATION, EMPTY_OBSERVATION_JSON, 0)
+
+		# The history response, built from the columns at most once per generation, when it's asked for.
+		self.__json_history = (0, b'[]')
+
+		# Optional on-disk copy of the cache, so it survives restarts.
+		self.__log = None
+
+		# Optional copy of the cache in shared memory, for other processes.
+		self.__shared_memory = None
+
+	#
+	@property
+	def capacity(self):
+		return self.__history.capacity
+
+	# Bytes used by this station's cache: the columns, plus the latest observation's JSON and the history response (if it's been built this generation), plus the rollup tiers and the rapid_wind samples.
+	def nbytes(self):
+		return sum(self.nbytes_by_part().values())
+
+	# nbytes(), broken down: {'columns': ..., 'json': ..., 'rollup_tiers': ..., 'rapid_wind': ...}. The columns are preallocated with the cache, as are the tiers and the rapid_wind samples; the JSON grows with the cache, but only once someone asks for the history.
+	def nbytes_by_part(self):
+		return {'columns': self.__history.nbytes(), 'json': sys.getsizeof(self.__latest[1]) + sys.getsizeof(self.__json_history[1]), 'rollup_tiers': sum(tier.nbytes() for tier in self.__tiers), 'rapid_wind': self.__wind.nbytes()}
+
+	# A short description for station listings.
+	def summary(self):
+		return {'serial_number': self.serial_number, 'hub_sn': self.hub_sn, 'last_updated_epoch': self.__latest[0].last_updated_epoch, 'generation': self.__latest[2], 'cached': len(self.__history)}
+
+	# Adds the ob row of a 'rapid_wind' packet: [epoch, wind speed (m/s), wind direction (degrees)]. Returns False if it was missing a value or out of order.
+	def add_wind_sample(self, ob):
+
+		#
+		epoch, speed_meters_per_second, direction_degrees = ob[:3]
+		if epoch is None or speed_meters_per_second is None or direction_degrees is None: return False
+
+		#
+		return self.__wind.append(epoch, speed_meters_per_second, direction_degrees)
+
+	# The newest rapid_wind sample, and the average speed, vector-averaged direction and peak gust over the last 2 and 10 minutes of them; see RapidWindRing.
+	def get_wind(self):
+		return self.__wind.for_json()
+
+	# Works out the forecast for the latest observation, which came from the given obs row (if any), and keeps it for get_forecast(). Returns it.
+	# The wind is the rapid_wind average over the last 10 minutes if it's current, or else the obs row's average over its report interval.
+	def update_forecast(self, forecaster, obs = None):
+
+		#
+		observation = self.__latest[0]
+		wind = self.__wind.average()
+
+		#
+		if wind is not None and observation.last_updated_epoch is not None and observation.last_updated_epoch - wind[0] <= max(self.__wind.spans):
+			wind_average_miles_per_hour, wind_direction_degrees = wind[1] * DerivedFieldEngine.MPH_PER_METERS_PER_SECOND, wind[2]
+		elif obs is not None:
+			wind_average_miles_per_hour, wind_direction_degrees = obs[2] * DerivedFieldEngine.MPH_PER_METERS_PER_SECOND if obs[2] is not None else None, obs[4]
+		else:
+			wind_average_miles_per_hour, wind_direction_degrees = None, None
+
+		#
+		forecast = forecaster.forecast(observation, wind_average_miles_per_hour, wind_direction_degrees)
+		self.__forecast = (observation, forecast)
+
+		#
+		return forecast
+
+	# True if what was worked out for the given observation (its forecast or derived fields) is no longer for the latest one.
+	# handle_observation() works both out as each packet is cached. Observations cached without a packet, restored from a log or ingested in bulk, skip that and have no obs row, so the reads below work them out once, from the observation alone.
+	def __behind_latest(self, observation):
+		return observation is not self.__latest[0]
+
+	# The forecast for the latest observation. It's worked out as each observation is cached, so this is usually a read.
+	def get_forecast(self, forecaster):
+
+		#
+		observation, forecast = self.__forecast
+		if self.__behind_latest(observation): forecast = self.update_forecast(forecaster)
+
+		#
+		return dict(forecast)
+
+	# Runs the graph's eager stages against the latest observation, which came from the given obs row.
+	def update_derived_fields(self, graph, obs):
+
+		#
+		observation = self.__latest[0]
+		memo = graph.evaluate(observation, obs, self.__derived[2])
+
+		#
+		with self.__derived_lock:
+			self.__derived = (observation, obs, memo)
+
+	# The graph's fields (or only the named ones) for the latest observation, running any stage that hasn't been run against it yet.
+	def get_derived_fields(self, graph, fields = None):
+
+		#
+		observation, obs, memo = self.__derived
+
+		#
+		if self.__behind_latest(observation): observation, obs = self.__latest[0], None
+
+		#
+		names = graph.names() if fields is None else list(fields)
+		memo = graph.evaluate(observation, obs, memo, names)
+
+		# Keep what we ran, unless a newer observation has been evaluated in the meantime.
+		with self.__derived_lock:
+			if self.__derived[0] is observation or observation is self.__latest[0]: self.__derived = (observation, obs, memo)
+
+		#
+		return {name: memo[name][1] for name in names}
+
+	# (Arrival, depth) for an observation with the given epoch, where depth is how many cached observations are newer than it (None for DUPLICATE and STALE).
+	# The usual case, an observation newer than the last, costs one comparison; anything else is a binary search.
+	def arrival_of(self, epoch):
+
+		#
+		history = self.__history
+		count = len(history)
+		if epoch is None or count == 0: return (Arrival.NEWEST, 0)
+
+		#
+		newest_epoch = history.epoch(-1)
+		if newest_epoch is None or epoch > newest_epoch: return (Arrival.NEWEST, 0)
+
+		#
+		index = history.bisect_epoch(epoch)
+		if index < count and history.epoch(index) == epoch: return (Arrival.DUPLICATE, None)
+		if index == 0 and count == history.capacity: return (Arrival.STALE, None)
+
+		#
+		return (Arrival.LATE, count - index)
+
+	# Derives an Observation from the obs row of an 'obs_st' packet. The trends compare its pressure against this station's cache, but nothing is cached or published yet.
+	def derive(self, obs):
+
+		# Everything but the pressure trends comes from the packet alone.
+		values = DerivedFieldEngine.derive(obs)
+
+		#
+		self.note_report_interval(obs)
+		self.derive_trends(values)
+
+		#
+		return Observation(**values)
+
+	# Keeps the report interval (obs[17], in minutes) of an obs row, which sets how many readings a trend's window should have. Rows without a sensible one leave it as it was.
+	def note_report_interval(self, obs):
+
+		#
+		report_interval_minutes = obs[17] if len(obs) > 17 else None
+		if isinstance(report_interval_minutes, (int, float)) and report_interval_minutes >= 1: self.report_interval_minutes = report_interval_minutes
+
+	# Adds the pressure trends to values derived from a packet, comparing its pressure against this station's cache. A packet without a pressure has no trends.
+	def derive_trends(self, values):
+		values.update(DerivedFieldEngine.derive_pressure_trends(*self.__pressure_changes(values['pressure_mb'], values['last_updated_epoch'])))
+
+	# The one- and three-hour changes and the advanced trend, for derive_pressure_trends(), of a pressure observed at epoch.
+	def __pressure_changes(self, pressure_mb, epoch):
+
+		#
+		if pressure_mb is None: return (None, None, None)
+
+		#
+		minute = epoch // 60 if epoch is not None else None
+
+		# An observation from an earlier minute than the windows have reached arrived late, so its trends are worked out from the minute slots leading up to it.
+		if minute is not None and self.__pressure_windows.minute is not None and minute < self.__pressure_windows.minute:
+			return (self.get_pressure_change_mb_from(60, pressure_mb, until_minute = minute - 1), self.get_pressure_change_mb_from(180, pressure_mb, until_minute = minute - 1), self.get_pressure_trend_advanced_from(180, pressure_mb, until_minute = minute - 1))
+
+		# The windows end with the minute before this observation's, with any minutes since the last observation marked missing.
+		if minute is not None: self.__pressure_windows.advance_to(minute - 1)
+
+		#
+		return (self.get_pressure_change_mb_from(60, pressure_mb), self.get_pressure_change_mb_from(180, pressure_mb), self.get_pressure_trend_advanced_from(180, pressure_mb))
+
+	# Adds a fully derived observation to the cache (and the log, if any) and publishes it as the latest.
+	# One that arrived late goes into its place in the cache instead, and the latest stays as it was. Returns False, caching nothing, if an observation with the same epoch is already cached or there's no place for it (see arrival_of()).
+	def cache_observation(self, observation):
+
+		#
+		arrival, depth = self.arrival_of(observation.last_updated_epoch)
+		if arrival is Arrival.DUPLICATE or arrival is Arrival.STALE: return False
+
+		#
+		raw_values = encode_observation(observation)
+
+		#
+		if arrival is Arrival.LATE:
+			self.__insert(observation, depth, raw_values)
+			return True
+
+		# Only the latest observation's JSON is kept; the history response is built from the columns when it's asked for.
+		encoded = json.dumps(observation.for_json(), allow_nan = False, separators = (',', ':')).encode('utf-8')
+
+		# Add to cache.
+		self.__history.append(observation, raw_values)
+		if observation.last_updated_epoch is not None: self.__pressure_windows.append(observation.last_updated_epoch // 60, observation.pressure_mb)
+
+		#
+		for tier in self.__tiers:
+			tier.add(observation, raw_values)
+
+		# Publish with a single reference swap, so readers see either the previous observation or this one—never a mix.
+		self.__latest = (observation, encoded, self.__latest[2] + 1)
+
+		#
+		if self.__log is not None: self.__log.append(observation, raw_values)
+		if self.__shared_memory is not None: self.__shared_memory.append(observation, self.__latest[2], raw_values)
+
+		#
+		return True
+
+	# Puts a late observation depth places behind the newest in every store, keeping them in epoch order. The generation still goes up, so pollers and ETags see the history change, but the latest observation is unchanged.
+	def __insert(self, observation, depth, raw_values):
+
+		#
+		self.__history.insert(observation, depth, raw_values)
+		if observation.last_updated_epoch is not None: self.__pressure_windows.append(observation.last_updated_epoch // 60, observation.pressure_mb)
+
+		#
+		for tier in self.__tiers:
+			tier.add(observation, raw_values)
+
+		#
+		latest, latest_encoded, generation = self.__latest
+		self.__latest = (latest, latest_encoded, generation + 1)
+
+		# The log is put back in epoch order when it's read.
+		if self.__log is not None: self.__log.append(observation, raw_values)
+		if self.__shared_memory is not None: self.__shared_memory.insert(observation, depth, generation + 1, raw_values)
+
+	# Caches already-derived observations in bulk, as if by cache_observation() for each, except that only the last is encoded as JSON and published. Subscribers aren't told.
+	# Returns how many observations were cached.
+	def cache_observations(self, observations):
+
+		#
+		generation = self.__latest[2]
+		count = 0
+
+		#
+		for observation in observations:
+
+			# Encoded once, for every store.
+			raw_values = encode_observation(observation)
+
+			#
+			self.__history.append(observation, raw_values)
+			if observation.last_updated_epoch is not None: self.__pressure_windows.append(observation.last_updated_epoch // 60, observation.pressure_mb)
+
+			#
+			for tier in self.__tiers:
+				tier.add(observation, raw_values)
+
+			#
+			count += 1
+			if self.__log is not None: self.__log.append(observation, raw_values)
+			if self.__shared_memory is not None: self.__shared_memory.append(observation, generation + count, raw_values)
+
+		#
+		if not count: return 0
+
+		#
+		self.__latest = (observation, json.dumps(observation.for_json(), allow_nan = False, separators = (',', ':')).encode('utf-8'), generation + count)
+
+		#
+		return count
+
+	# Derives and caches archived obs rows in bulk, with the same result as deriving and caching each in turn, except that subscribers aren't told. Rows must be in time order; any at or before the newest cached observation are skipped. Returns how many rows were cached.
+	# Rows are handled batch_size at a time, a column at a time: every field but the trends is derived for the whole batch (vectorized, if NumPy is installed), then the trends in one pass over the station's own sliding windows, then the batch is encoded once and stored column by column.
+	# Nothing is built per row: only the newest row becomes an Observation, and is encoded as JSON, once, at the end.
+	def ingest(self, obs_rows, batch_size = 4096):
+
+		#
+		newest_epoch = self.__latest[0].last_updated_epoch
+
+		#
+		def batches():
+
+			#
+			batch = []
+			batch_newest_epoch = newest_epoch
+
+			#
+			for obs in obs_rows:
+
+				#
+				if obs[0] is None or (batch_newest_epoch is not None and obs[0] <= batch_newest_epoch): continue
+
+				#
+				batch.append(obs)
+				batch_newest_epoch = obs[0]
+
+				#
+				if len(batch) == batch_size:
+					yield batch
+					batch = []
+
+			#
+			if batch: yield batch
+
+		#
+		generation = self.__latest[2]
+		count = 0
+
+		# The newest row, with its keys.
+		keys = None
+		last_row = None
+
+		#
+		for batch in batches():
+
+			#
+			columns = DerivedFieldEngine.derive_batch(batch, stored_only = True)
+			columns.update(self.__derive_trends_batch(columns, batch))
+
+			# Encoded once, for every store.
+			raw_columns = encode_columns(columns)
+
+			#
+			masks = integral_masks(columns)
+			self.__history.extend(raw_columns, masks)
+
+			#
+			for tier in self.__tiers:
+				tier.add_columns(raw_columns)
+
+			#
+			if self.__log is not None or self.__shared_memory is not None:
+
+				#
+				raw_rows = list(zip(*raw_columns))
+
+				#
+				if self.__log is not None: self.__log.extend(raw_rows, masks)
+				if self.__shared_memory is not None: self.__shared_memory.extend(raw_rows, masks, generation + count + 1)
+
+			#
+			count += len(batch)
+			keys = list(columns)
+			last_row = [column[-1] for column in columns.values()]
+
+		#
+		if not count: return 0
+
+		#
+		values = dict(zip(keys, last_row))
+		values['last_updated_iso_8601'] = iso_8601_from_epoch(values['last_updated_epoch'])
+		observation = Observation(**values)
+
+		#
+		self.__latest = (observation, json.dumps(observation.for_json(), allow_nan = False, separators = (',', ':')).encode('utf-8'), generation + count)
+
+		#
+		return count
+
+	# The pressure trend fields for a batch of obs rows, given with their columns (see DerivedFieldEngine.derive_batch()). Each row's trends are worked out as derive() would, and its pressure then added to the windows, as caching it would.
+	def __derive_trends_batch(self, columns, obs_rows):
+
+		#
+		windows = self.__pressure_windows
+		pressure_changes = self.__pressure_changes
+
+		#
+		one_hour_mb = []
+		three_hours_mb = []
+		advanced = []
+
+		#
+		for epoch, pressure_mb, obs in zip(columns['last_updated_epoch'], columns['pressure_mb'], obs_rows):
+
+			#
+			self.note_report_interval(obs)
+			one_hour, three_hours, trend = pressure_changes(pressure_mb, epoch)
+			one_hour_mb.append(one_hour)
+			three_hours_mb.append(three_hours)
+			advanced.append(trend)
+
+			#
+			if epoch is not None: windows.append(epoch // 60, pressure_mb)
+
+		#
+		return DerivedFieldEngine.derive_pressure_trends_batch(one_hour_mb, three_hours_mb, advanced)
+
+	# Restores the cache from the log at path (skipping anything older than the cache would hold), then logs every new observation to it. Returns how many observations were restored.
+	# The log holds as many observations as the cache unless given a capacity, e.g. for an archive built by ingest. With fresh_only False, the newest are restored however old they are.
+	# A station that has already cached observations keeps them: logged ones are merged in, in epoch order, as if they'd arrived late (see arrival_of()), and its own are added to the log. Raises ValueError if the file isn't a log with the expected layout; see ObservationLog.
+	def open_log(self, path, capacity = None, fresh_only = True):
+
+		#
+		log = ObservationLog(path, capacity if capacity is not None else self.__history.capacity)
+
+		#
+		observations = log.read(oldest_epoch = time.time() - self.__history.capacity * 60 if fresh_only else None, last = self.__history.capacity)
+
+		# Nothing cached yet: the log is the cache.
+		if not len(self.__history):
+
+			#
+			restored = self.cache_observations(observations)
+			self.__log = log
+
+		#
+		else:
+
+			#
+			cached = [self.__history.observation(index) for index in range(len(self.__history))]
+			logged_epochs = {observation.last_updated_epoch for observation in observations}
+
+			# Logged observations already cached are duplicates, and those older than a full cache are stale; cache_observation() skips both.
+			restored = sum(1 for observation in observations if self.cache_observation(observation))
+
+			# The log now gets what was cached before it was opened, and everything from here on.
+			self.__log = log
+			for observation in cached:
+				if observation.last_updated_epoch not in logged_epochs: log.append(observation)
+
+		# From here on the cache and the log number observations in step, so a restart carries on numbering from the log and cursors never mean two different things.
+		# What was restored needn't be exactly what was cached before (it's only the fresh observations, in epoch order, merged with any already cached), so every earlier cursor is answered with a resync, except one that had seen everything.
+		sequence = max(self.__history.sequence, log.sequence)
+		log.skip_to(sequence)
+		self.__history.sequence = sequence
+		self.__history.reordered_sequence = sequence
+
+		# Generations (and the ETags made from them) carry on from the log's numbering too, so they aren't reused after a restart.
+		if restored: self.__latest = (self.__latest[0], self.__latest[1], max(self.__latest[2], sequence))
+
+		#
+		return restored
+
+	#
+	def is_logging(self):
+		return self.__log is not None
+
+	# Publishes the cache (what's in it now, and every observation from here on) to a shared memory segment with the given name; see SharedObservationReader.
+	def open_shared_memory(self, name):
+
+		#
+		export = SharedObservationExport(name, self.__history.capacity)
+
+		#
+		first_sequence = self.__history.sequence - len(self.__history) + 1
+		for index in range(len(self.__history)):
+			export.append(self.__history.observation(index), first_sequence + index)
+
+		#
+		self.__shared_memory = export
+
+	#
+	def is_sharing_memory(self):
+		return self.__shared_memory is not None
+
+	#
+	def close_shared_memory(self):
+
+		#
+		if self.__shared_memory is None: return
+
+		#
+		self.__shared_memory.close()
+		self.__shared_memory = None
+
+	#
+	def close_log(self):
+
+		#
+		if self.__log is None: return
+
+		#
+		self.__log.close()
+		self.__log = None
+
+	# The latest observation as an immutable snapshot. Every field of it comes from the same packet.
+	def get_observation(self):
+		return self.__latest[0]
+
+	#
+	def get_for_json(self):
+		return self.__latest[0].for_json()
+
+	# The history as get_for_json() dicts, oldest first, decoded from the columns a column at a time. They aren't kept: they'd take more memory than the columns themselves.
+	def get_all_for_json(self):
+		return self.__history.consistent(self.__history.rows)
+
+	# Served from the coarsest rollup tier whose buckets divide bucket_seconds evenly, or from the one-minute cache if none do (or if no bucketing was asked for).
+	def get_range(self, start_epoch = None, end_epoch = None, fields = None, bucket_seconds = None):
+
+		#
+		if bucket_seconds is not None and bucket_seconds > 0:
+
+			#
+			for tier in reversed(self.__tiers):
+				if bucket_seconds % tier.bucket_seconds == 0: return tier.query(start_epoch, end_epoch, fields, bucket_seconds)
+
+		#
+		return self.__history.consistent(lambda: self.__history.query(start_epoch, end_epoch, fields, bucket_seconds))
+
+	# (bucket_seconds, capacity, buckets held, oldest bucket start) for each rollup tier, finest first.
+	def get_rollup_tiers(self):
+		return [(tier.bucket_seconds, tier.capacity, len(tier), tier.oldest_epoch()) for tier in self.__tiers]
+
+	#
+	def get_generation(self):
+		return self.__latest[2]
+
+	# The observations newer than cursor (from an earlier call, or 0), with the cursor for the next call; see TempestWeatherHelper.get_since().
+	# Cursors from before a restart, or from before a log was merged into the cache (see open_log()), are answered with a resync, unless they'd already seen everything.
+	def get_since(self, cursor):
+
+		#
+		sequence, observations = self.__history.consistent(lambda: (self.__history.sequence, self.__history.rows_since(cursor)))
+
+		# The client missed too much (or the cursor isn't ours): send everything, and tell it to start over.
+		if observations is None: return {'cursor': sequence, 'resync': True, 'observations': self.get_all_for_json()}
+
+		#
+		return {'cursor': sequence, 'resync': False, 'observations': observations}
+
+	#
+	def get_json(self):
+		return self.__latest[1]
+
+	#
+	def get_all_json(self):
+
+		#
+		generation, encoded = self.__json_history
+
+		#
+		if generation != self.__latest[2]:
+
+			# Encoded from get_all_for_json(). Snapshot the generation first; if another packet lands meanwhile, the next call simply rebuilds.
+			generation = self.__latest[2]
+			encoded = json.dumps(self.get_all_for_json(), allow_nan = False, separators = (',', ':')).encode('utf-8')
+			self.__json_history = (generation, encoded)
+
+		#
+		return encoded
+
+	# The largest change (rise positive, fall negative) from the pressure over the last minutes_ago minutes, or None if they reach back before the station's first reading, or less than minimum_coverage (by default the station's) of the readings expected in them have a pressure.
+	# With until_minute (epoch // 60), the window ends with that minute rather than the newest.
+	def get_pressure_change_mb_from(self, minutes_ago, pressure_mb = None, minimum_coverage = None, until_minute = None):
+
+		#
+		try:
+
+			#
+			if minimum_coverage is None: minimum_coverage = self.minimum_coverage
+
+			# Compare against the latest observation unless we're given the pressure of one that's still being derived.
+			if pressure_mb is None: pressure_mb = self.__latest[0].pressure_mb
+			if pressure_mb is None: return None
+
+			# The common spans are kept incrementally, so this is O(1).
+			if until_minute is None and self.__pressure_windows.has_change_span(minutes_ago):
+
+				#
+				extremes = self.__pressure_windows.extremes(minutes_ago, minimum_coverage, self.report_interval_minutes)
+				if extremes is None: return None
+
+				#
+				min_pressure_mb, max_pressure_mb = extremes
+
+			#
+			else:
+
+				#
+				if not self.__pressure_windows.is_full(minutes_ago, until_minute): return None
+
+				# The pressure for each of the minutes in the window, from the minute slots, so a dropped, doubled or late packet can't stretch or squeeze the window.
+				historical_pressure_mb = [value for value in self.__pressure_windows.values(minutes_ago, until_minute) if value is not None]
+
+				# Validate that enough of those minutes have a value.
+				if not is_covered(len(historical_pressure_mb), minutes_ago, minimum_coverage, self.report_interval_minutes): return None
+
+				# Using min/max lets us better handle cases where the pressure fell after slightly rising, or rose after slightly falling.
+				# In such cases, the change is potentially greater than if we merely used the initial starting point.
+				min_pressure_mb = min(historical_pressure_mb)
+				max_pressure_mb = max(historical_pressure_mb)
+
+			# Rise has a positive value; fall has a negative value.
+			change_from_min = pressure_mb - min_pressure_mb
+			change_from_max = pressure_mb - max_pressure_mb
+
+			# Return the largest magnitude of change.
+			if (max(abs(change_from_min), abs(change_from_max)) == abs(change_from_min)):
+				return change_from_min
+			else:
+				return change_from_max
+
+		#
+		except Exception as e:
+
+			#
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+	# Here we attempt to analyze curves with some very simplistic rules, and without importing big gun packages like NumPy and SciPy.
+	# It works because pressure curves generally fall into a finite number of patterns for the time range we're using. Zoom out and all bets are off!
+	# The window is the last minutes_ago minutes (ending with until_minute, if given). It mustn't reach back before the station's first reading, and it, and each of its first and last quarters, needs minimum_coverage (by default the station's) of the readings expected in it to have a pressure.
+	def get_pressure_trend_advanced_from(self, minutes_ago, pressure_mb = None, minimum_coverage = None, until_minute = None):
+
+		#
+		try:
+
+			#
+			if minimum_coverage is None: minimum_coverage = self.minimum_coverage
+
+			# Compare against the latest observation unless we're given the pressure of one that's still being derived.
+			if pressure_mb is None: pressure_mb = self.__latest[0].pressure_mb
+			if pressure_mb is None: return None
+
+			# The common spans are kept incrementally, so this is O(1).
+			if until_minute is None and self.__pressure_windows.has_advanced_span(minutes_ago):
+
+				#
+				pressure_statistics = self.__pressure_windows.statistics(minutes_ago, minimum_coverage, self.report_interval_minutes)
+				if pressure_statistics is None: return None
+
+			#
+			else:
+
+				# The quarters need at least a minute each.
+				if minutes_ago < 4 or not self.__pressure_windows.is_full(minutes_ago, until_minute): return None
+
+				# The pressure for each of the minutes in the window, from the minute slots, with None for missing minutes.
+				minute_pressure_mb = self.__pressure_windows.values(minutes_ago, until_minute)
+
+				# We also want to examine the first and last quarters of data to detect areas of flatness.
+				# Slice notation negative indexes allow us to take n-last elements from a list.
+				historical_pressure_mb = [value for value in minute_pressure_mb if value is not None]
+				first_quarter_historical_pressure_mb = [value for value in minute_pressure_mb[-minutes_ago:-((minutes_ago // 4) * 3)] if value is not None]
+				last_quarter_historical_pressure_mb = [value for value in minute_pressure_mb[-(minutes_ago // 4):] if value is not None]
+
+				# Validate that enough of the minutes in the window, and in each quarter of it, have a value.
+				if not is_covered(len(historical_pressure_mb), minutes_ago, minimum_coverage, self.report_interval_minutes): return None
+				if not is_covered(len(first_quarter_historical_pressure_mb), minutes_ago - (minutes_ago // 4) * 3, minimum_coverage, self.report_interval_minutes): return None
+				if not is_covered(len(last_quarter_historical_pressure_mb), minutes_ago // 4, minimum_coverage, self.report_interval_minutes): return None
+
+				#
+				pressure_statistics = (historical_pressure_mb[0], min(historical_pressure_mb), max(historical_pressure_mb), statistics.pstdev(historical_pressure_mb), statistics.pstdev(first_quarter_historical_pressure_mb), statistics.pstdev(last_quarter_historical_pressure_mb))
+
+			#
+			return self.classify_pressure_trend_advanced(pressure_mb, *pressure_statistics)
+
+		#
+		except Exception as e:
+
+			#
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+	# Characterizes the pressure curve from a handful of critical values: the oldest pressure in the window, the window's min/max, and the standard deviation of the whole window and of its first and last quarters.
+	@staticmethod
+	def classify_pressure_trend_advanced(pressure_mb, past_pressure_mb, min_pressure_mb, max_pressure_mb, variance_mb, variance_of_first_quarter_mb, variance_of_last_quarter_mb):
+
+		#
+		equals_tolerance_mb = (PressureTrend.STEADY.b_mb_change_per_three_hours - PressureTrend.STEADY.a_mb_change_per_three_hours) / 2
+
+		# Simplify booleans for clarity.
+		# Here we set our scale/sensitivity thresholds and make use of math.isclose() to add some fuzziness.
+		# Zoomed in, even a relatively flat curve may appear highly variable. But zoom out too much and everything looks flat.
+		# The scale we're interested in is approximately a 6-millibar range (based on the values we use in our PressureTrend enum)
+		all_steady = math.isclose(variance_mb, 0, abs_tol = equals_tolerance_mb / 4)
+		current_pressure_equals_max = math.isclose(pressure_mb, max_pressure_mb, abs_tol = equals_tolerance_mb)
+		current_pressure_equals_min = math.isclose(pressure_mb, min_pressure_mb, abs_tol = equals_tolerance_mb)
+		current_pressure_greater_than_min = pressure_mb > min_pressure_mb and math.isclose(pressure_mb, min_pressure_mb, abs_tol = equals_tolerance_mb) is False
+		current_pressure_less_than_max = pressure_mb < max_pressure_mb and math.isclose(pressure_mb, max_pressure_mb, abs_tol = equals_tolerance_mb) is False
+		ends_steady = math.isclose(variance_of_last_quarter_mb, 0, abs_tol = equals_tolerance_mb / 8)
+		ends_unsteady = ends_steady is False
+		past_pressure_equals_max = math.isclose(past_pressure_mb, max_pressure_mb, abs_tol = equals_tolerance_mb)
+		past_pressure_equals_min = math.isclose(past_pressure_mb, min_pressure_mb, abs_tol = equals_tolerance_mb)
+		past_pressure_greater_than_current = past_pressure_mb > pressure_mb and math.isclose(past_pressure_mb, pressure_mb, abs_tol = equals_tolerance_mb) is False
+		past_pressure_greater_than_min = past_pressure_mb > min_pressure_mb and math.isclose(past_pressure_mb, min_pressure_mb, abs_tol = equals_tolerance_mb) is False
+		past_pressure_less_than_current = past_pressure_mb < pressure_mb and math.isclose(past_pressure_mb, pressure_mb, abs_tol = equals_tolerance_mb) is False
+		past_pressure_less_than_max = past_pressure_mb < max_pressure_mb and math.isclose(past_pressure_mb, max_pressure_mb, abs_tol = equals_tolerance_mb) is False
+		starts_steady = math.isclose(variance_of_first_quarter_mb, 0, abs_tol = equals_tolerance_mb / 8)
+		starts_unsteady = starts_steady is False
+
+		# CONTINUOUSLY_FALLING
+		if starts_unsteady and past_pressure_greater_than_current and past_pressure_equals_max and current_pressure_equals_min and ends_unsteady:
+			return PressureTrendAdvanced.CONTINUOUSLY_FALLING
+
+		# CONTINUOUSLY_RISING
+		elif starts_unsteady and past_pressure_less_than_current and past_pressure_equals_min and current_pressure_equals_max and ends_unsteady:
+			return PressureTrendAdvanced.CONTINUOUSLY_RISING
+
+		# FALLING_THEN_SLIGHTLY_RISING
+		elif starts_unsteady and past_pressure_greater_than_current and current_pressure_greater_than_min and ends_unsteady:
+			return PressureTrendAdvanced.FALLING_THEN_SLIGHTLY_RISING
+
+		# FALLING_THEN_STEADY
+		elif starts_unsteady and past_pressure_greater_than_current and current_pressure_equals_min and ends_steady:
+			return PressureTrendAdvanced.FALLING_THEN_STEADY
+
+		# RISING_THEN_SLIGHTLY_FALLING
+		elif starts_unsteady and past_pressure_less_than_current and current_pressure_less_than_max and ends_unsteady:
+			return PressureTrendAdvanced.RISING_THEN_SLIGHTLY_FALLING
+
+		# RISING_THEN_STEADY
+		elif starts_unsteady and past_pressure_less_than_current and current_pressure_equals_max and ends_steady:
+			return PressureTrendAdvanced.RISING_THEN_STEADY
+
+		# SLIGHTLY_FALLING_THEN_RISING
+		elif starts_unsteady and past_pressure_greater_than_min and past_pressure_less_than_current and current_pressure_equals_max and ends_unsteady:
+			return PressureTrendAdvanced.SLIGHTLY_FALLING_THEN_RISING
+
+		# SLIGHTLY_RISING_THEN_FALLING
+		elif starts_unsteady and past_pressure_less_than_max and past_pressure_greater_than_current and current_pressure_equals_min and ends_unsteady:
+			return PressureTrendAdvanced.SLIGHTLY_RISING_THEN_FALLING
+
+		# STEADY
+		elif all_steady:
+			return PressureTrendAdvanced.STEADY
+
+		# STEADY_THEN_FALLING
+		elif starts_steady and past_pressure_greater_than_current and current_pressure_equals_min and ends_unsteady:
+			return PressureTrendAdvanced.STEADY_THEN_FALLING
+
+		# STEADY_THEN_RISING
+		elif starts_steady and past_pressure_less_than_current and current_pressure_equals_max and ends_unsteady:
+			return PressureTrendAdvanced.STEADY_THEN_RISING
+
+		# UNSTEADY_OR_INCONCLUSIVE
+		else: return PressureTrendAdvanced.UNSTEADY_OR_INCONCLUSIVE
+
+# The strict JSON of EMPTY_OBSERVATION, served before a station has reported.
+EMPTY_OBSERVATION_JSON = json.dumps(EMPTY_OBSERVATION.for_json(), separators = (',', ':')).encode('utf-8')
+
+# Stands in for "the station" before any station has reported, so reads return empty values rather than failing.
+EMPTY_STATION = Station(None, rollup_tiers = ())
+
+# Serves TempestWeatherHelper's per-field class attributes (TempestWeatherHelper.temperature_c and the rest), kept for backwards compatibility, from the default station's latest observation.
+# Every read goes to the one published Observation, so nothing is copied field by field as observations arrive, and no field is ever left over from the observation before.
+class DefaultStationAttributes(type):
+
+	#
+	FIELDS = frozenset(OBSERVATION_KEYS)
+
+	# Only called for names the class doesn't have.
+	def __getattr__(cls, name):
+
+		#
+		if name in DefaultStationAttributes.FIELDS: return getattr(cls.get_station().get_observation(), name)
+
+		#
+		raise AttributeError("type object '%s' has no attribute '%s'" % (cls.__name__, name))
+
+	# So dir() still lists them.
+	def __dir__(cls):
+		return sorted(set(type.__dir__(cls)) | DefaultStationAttributes.FIELDS)
+
+#
+class TempestWeatherHelper(threading.Thread, metaclass = DefaultStationAttributes):
+
+	# For singleton pattern.
+	__instance = None
+
+	# Per-station state, keyed by serial number. The default station (used when a read doesn't name one) is the first to report; whether one has been chosen is kept apart from which.
+	__stations = {}
+	__default_station = None
+	__default_station_chosen = False
+	__maximum_stations = 64
+	__ignored_stations = 0
+
+	# (bucket_seconds, capacity) of each new station's rollup tiers.
+	__rollup_tiers = DEFAULT_ROLLUP_TIERS
+
+	# The share of a window's minutes each new station needs a pressure for before it reports a trend over it.
+	__minimum_coverage = DEFAULT_MINIMUM_COVERAGE
+
+	# Counters and timings for the ingest path; see get_metrics().
+	__metrics = Metrics()
+
+	# Replaced (never mutated) on subscribe and unsubscribe, so publishing can iterate it without a lock.
+	__subscriptions = ()
+	__subscriptions_lock = threading.Lock()
+
+	# Routes raw datagrams to packet handlers by type, dropping any it has already seen. 'obs_st' is routed to handle_observation() once the class is defined.
+	__dispatcher = PacketDispatcher(__metrics, PacketDeduplicator())
+
+	# Optional directory for each station's on-disk copy of its cache, so it survives restarts.
+	__history_directory = None
+
+	# Optional prefix for each station's shared memory segment.
+	__shared_memory_prefix = None
+
+	# Optional PacketRecorder for every raw datagram received; see start_recording().
+	__recorder = None
+
+	# Fields derived on top of each observation; see register_derived_field().
+	__derived_fields = DerivedFieldGraph(STANDARD_DERIVED_FIELDS)
+
+	# Works out each station's forecast as its observations arrive; see get_forecast().
+	__forecaster = Forecaster()
+
+	# Whether rapid_wind packets are routed to handle_rapid_wind(); see track_wind().
+	__tracking_wind = False
+	__tracking_wind_lock = threading.Lock()
+
+	# The receiver stage hands raw datagrams to the processing stage through this queue.
+	__ingest_queue = IngestQueue()
+	__batch_size = 64
+	__receive_buffer_bytes = 1 << 20
+	__processed = 0
+	__processing_thread = None
+
+	#
+	def __new__(cls, *args, **kwargs):
+
+		#
+		if cls.__instance is None:
+
+			#
+			cls.__instance = threading.Thread.__new__(cls)
+
+		return cls.__instance
+
+	# The per-field attributes read the same from the instance as from the class; see DefaultStationAttributes.
+	def __getattr__(self, name):
+
+		#
+		if name in DefaultStationAttributes.FIELDS: return getattr(type(self), name)
+
+		#
+		raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
+	# queue_size and overflow_policy bound the backlog between receiving and processing, batch_size is how many datagrams are processed per wakeup, and receive_buffer_bytes sizes the kernel's socket buffer.
+	# If history_directory is given, each station's cache is logged to a file there and restored from it on start.
+	# maximum_stations bounds how many stations we keep state for; packets from any beyond that are ignored. timing turns the per-stage timings in get_metrics() on or off.
+	# rollup_tiers is a list of (bucket_seconds, capacity) for the long-range history each station keeps beyond its 12-hour cache. There are none by default; STANDARD_ROLLUP_TIERS keeps a week of 10-minute buckets and a year of hourly ones, at about 6.3 MB per station.
+	# If shared_memory_prefix is given, each station's cache is also published to shared memory for other processes; see open_shared_memory().
+	# If record_directory is given, every raw datagram received is recorded there, gzipped; see start_recording().
+	# minimum_coverage is the share of the readings expected in a pressure trend's window that must have a pressure before the trend is reported; see DEFAULT_MINIMUM_COVERAGE. A hub reporting every few minutes is expected to send a reading per report interval (obs[17]), not one a minute.
+	# duplicate_capacity is how many recent packets are remembered to catch duplicates; 0 turns the check off (duplicate obs_st packets are still never cached twice).
+	# southern_hemisphere flips the forecaster's reading of the wind direction, for stations south of the equator.
+	# If track_wind is True, rapid_wind packets feed each station's wind aggregates from the start; otherwise they do from the first get_wind(). See track_wind().
+	def __init__(self, queue_size = 1024, overflow_policy = OverflowPolicy.DROP_OLDEST, batch_size = 64, receive_buffer_bytes = 1 << 20, history_directory = None, maximum_stations = 64, timing = True, rollup_tiers = DEFAULT_ROLLUP_TIERS, shared_memory_prefix = None, record_directory = None, minimum_coverage = DEFAULT_MINIMUM_COVERAGE, duplicate_capacity = 4096, southern_hemisphere = False, track_wind = False):
+
+		# Super initialize.
+		super(TempestWeatherHelper, self).__init__()
+
+		# Whenever the parent thread dies, we want all child threads to die with it.
+		self.__instance.daemon = True
+
+		#
+		cls = type(self)
+		cls.__ingest_queue.capacity = queue_size
+		cls.__ingest_queue.overflow_policy = overflow_policy
+		cls.__batch_size = batch_size
+		cls.__receive_buffer_bytes = receive_buffer_bytes
+		cls.__maximum_stations = maximum_stations
+		cls.__metrics.timing = timing
+		cls.__rollup_tiers = tuple(rollup_tiers)
+		cls.__minimum_coverage = minimum_coverage
+		cls.__dispatcher.deduplicator = PacketDeduplicator(duplicate_capacity) if duplicate_capacity > 0 else None
+		cls.__forecaster = Forecaster(southern_hemisphere)
+
+		#
+		if history_directory is not None and cls.__history_directory is None: cls.open_history_log(history_directory)
+		if shared_memory_prefix is not None and cls.__shared_memory_prefix is None: cls.open_shared_memory(shared_memory_prefix)
+		if record_directory is not None and cls.__recorder is None: cls.start_recording(record_directory)
+		if track_wind: cls.track_wind()
+
+	# Restores every station's cache from its log in directory, then logs every new observation there, one file per station. Returns how many observations were restored.
+	# A file that isn't a log with the expected layout is left alone, and its station isn't logged.
+	@classmethod
+	def open_history_log(cls, directory):
+
+		#
+		os.makedirs(directory, exist_ok = True)
+		cls.__history_directory = directory
+
+		#
+		restored = 0
+
+		#
+		for name in sorted(os.listdir(directory)):
+
+			#
+			if not name.endswith('.twhlog'): continue
+
+			# New stations restore their own logs as they're added.
+			serial_number = name[:-len('.twhlog')]
+			if serial_number in cls.__stations: continue
+
+			#
+			station = cls.__add_station(serial_number, None)
+			if station is not None: restored += station.summary()['cached']
+
+		# Stations that reported before we had a directory start logging now, keeping what they've cached.
+		for serial_number, station in list(cls.__stations.items()):
+			if not station.is_logging(): restored += cls.__open_station_log(station)
+
+		#
+		return restored
+
+	#
+	@classmethod
+	def close_history_log(cls):
+
+		#
+		for station in list(cls.__stations.values()):
+			station.close_log()
+
+		#
+		cls.__history_directory = None
+
+	# Publishes every station's cache to shared memory, one segment per station named by shared_memory_name(serial_number, prefix), so other processes on this machine can read it with SharedObservationReader.
+	@classmethod
+	def open_shared_memory(cls, prefix = SHARED_MEMORY_PREFIX):
+
+		#
+		cls.__shared_memory_prefix = prefix
+
+		#
+		for serial_number, station in list(cls.__stations.items()):
+			if not station.is_sharing_memory(): station.open_shared_memory(shared_memory_name(serial_number, prefix))
+
+	# Stops publishing, and removes the segments.
+	@classmethod
+	def close_shared_memory(cls):
+
+		#
+		for station in list(cls.__stations.values()):
+			station.close_shared_memory()
+
+		#
+		cls.__shared_memory_prefix = None
+
+	# Records every raw datagram either receiver gets from now on, with when and where it came from, to segment files in directory; see PacketRecorder for the options, and read_packet_recording() to read them back.
+	# Returns the recorder. Recording is off the receive path: if the disk can't keep up, datagrams go unrecorded (and are counted) rather than delayed.
+	@classmethod
+	def start_recording(cls, directory, **options):
+
+		#
+		cls.stop_recording()
+		cls.__recorder = PacketRecorder(directory, **options)
+
+		#
+		return cls.__recorder
+
+	# Stops recording, after writing out whatever is still buffered.
+	@classmethod
+	def stop_recording(cls):
+
+		#
+		recorder = cls.__recorder
+		cls.__recorder = None
+
+		#
+		if recorder is not None: recorder.close()
+
+	# Hands (datagram, received epoch, address) tuples to the recorder, if we're recording.
+	@classmethod
+	def record_datagrams(cls, datagrams):
+
+		#
+		recorder = cls.__recorder
+		if recorder is not None: recorder.record_many(datagrams)
+
+	# The Station for a serial number, or the default station if serial_number is None. Raises KeyError for a station we haven't heard from.
+	@classmethod
+	def get_station(cls, serial_number = None):
+
+		#
+		if serial_number is None:
+			return cls.__stations[cls.__default_station] if cls.__default_station_chosen else EMPTY_STATION
+
+		#
+		return cls.__stations[serial_number]
+
+	# Every station we've heard from.
+	@classmethod
+	def get_stations(cls):
+		return [station.summary() for station in list(cls.__stations.values())]
+
+	# Where a station's log lives in the history directory.
+	@classmethod
+	def __history_path(cls, serial_number):
+		return os.path.join(cls.__history_directory, re.sub(r'[^A-Za-z0-9_.-]', '_', str(serial_number)) + '.twhlog')
+
+	# Opens a station's log in the history directory. Returns how many observations were restored; a log that can't be opened is reported, and the station carries on without one.
+	@classmethod
+	def __open_station_log(cls, station):
+
+		#
+		try:
+			return station.open_log(cls.__history_path(station.serial_number))
+
+		#
+		except Exception as e:
+
+			#
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+			return 0
+
+	# A packet (or ingested row) without a serial number could be from any station, so rather than being cached as a station of its own, it's counted and dropped.
+	@classmethod
+	def __identified(cls, serial_number):
+
+		#
+		if isinstance(serial_number, str) and serial_number: return True
+
+		#
+		cls.__metrics.unidentified_packets += 1
+		return False
+
+	# Registers a new station, or returns None if we're already tracking as many as we're allowed, or if serial_number isn't one (see get_metrics()'s suppressed counts).
+	@classmethod
+	def __add_station(cls, serial_number, hub_sn):
+
+		#
+		station = cls.__stations.get(serial_number)
+		if station is not None: return station
+
+		#
+		if not cls.__identified(serial_number): return None
+
+		#
+		if len(cls.__stations) >= cls.__maximum_stations:
+			cls.__ignored_stations += 1
+			return None
+
+		#
+		station = Station(serial_number, hub_sn, rollup_tiers = cls.__rollup_tiers, minimum_coverage = cls.__minimum_coverage)
+
+		#
+		if cls.__history_directory is not None: cls.__open_station_log(station)
+		if cls.__shared_memory_prefix is not None: station.open_shared_memory(shared_memory_name(serial_number, cls.__shared_memory_prefix))
+
+		#
+		cls.__stations[serial_number] = station
+
+		#
+		if not cls.__default_station_chosen:
+			cls.__default_station = serial_number
+			cls.__default_station_chosen = True
+
+		#
+		return station
+
+	# Counts for the ingest pipeline: datagrams received from the socket, processed, dropped because the queue was full, and still waiting, plus observations ignored because we were already tracking the maximum number of stations.
+	@classmethod
+	def get_ingest_statistics(cls):
+		return {'received': cls.__ingest_queue.received, 'processed': cls.__processed, 'dropped': cls.__ingest_queue.dropped, 'queued': len(cls.__ingest_queue), 'ignored_stations': cls.__ignored_stations}
+
+	# Counted for every socket bound by either receiver, so rebinds show up in get_metrics().
+	@classmethod
+	def record_socket_bind(cls):
+		cls.__metrics.socket_binds += 1
+
+	# Per-stage timings are on by default. With them off, the ingest path only pays for a flag check.
+	@classmethod
+	def set_timing(cls, enabled):
+		cls.__metrics.timing = enabled
+
+	# Everything we count, as one dict: packets by type, errors (including derived fields whose function raised, by field), packets suppressed as duplicates, as too old or for having no serial number, and observations put back in order, socket (re)binds, seconds since the last obs_st, the ingest queue, the packet recorder (None unless recording), cache depth per station, and per-stage timing histograms (durations in seconds).
+	@classmethod
+	def get_metrics(cls):
+
+		#
+		metrics = cls.__metrics
+		recorder = cls.__recorder
+
+		#
+		return {
+			'packets': dict(metrics.packets),
+			'packets_skipped': cls.__dispatcher.skipped,
+			'decode_errors': metrics.decode_errors,
+			'handler_errors': metrics.handler_errors,
+			'derivation_errors': metrics.derivation_errors,
+			'derived_field_errors': dict(cls.__derived_fields.errors),
+			'suppressed': {'duplicate_packets': cls.__dispatcher.duplicates, 'duplicate_observations': metrics.duplicate_observations, 'stale_observations': metrics.stale_observations, 'unidentified_packets': metrics.unidentified_packets},
+			'reordered_observations': metrics.reordered_observations,
+			'socket_binds': metrics.socket_binds,
+			'socket_rebinds': max(metrics.socket_binds - 1, 0),
+			'seconds_since_last_observation': metrics.seconds_since_last_observation(),
+			'ingest': cls.get_ingest_statistics(),
+			'recorder': recorder.statistics() if recorder is not None else None,
+			'stations': cls.get_stations(),
+			'timing': metrics.timing,
+			'timings': {stage: {'count': histogram.count, 'sum': histogram.sum, 'buckets': histogram.buckets()} for stage, histogram in metrics.timings.items()},
+		}
+
+	# get_metrics() in the Prometheus text exposition format.
+	@classmethod
+	def get_metrics_prometheus(cls):
+
+		#
+		metrics = cls.get_metrics()
+		lines = []
+
+		#
+		def escape(value):
+			return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+		#
+		def family(name, kind, help_text, samples):
+
+			#
+			lines.append('# HELP tempest_weather_helper_%s %s' % (name, help_text))
+			lines.append('# TYPE tempest_weather_helper_%s %s' % (name, kind))
+
+			#
+			for suffix, labels, value in samples:
+				label_text = '{' + ','.join('%s="%s"' % (key, escape(label)) for key, label in labels) + '}' if labels else ''
+				lines.append('tempest_weather_helper_%s%s%s %s' % (name, suffix, label_text, 'NaN' if value is None else repr(float(value)) if isinstance(value, float) else value))
+
+		#
+		family('packets_total', 'counter', 'Datagrams by packet type.', [('', [('type', packet_type if packet_type is not None else 'unknown')], count) for packet_type, count in sorted(metrics['packets'].items(), key = lambda item: str(item[0]))])
+		family('packets_skipped_total', 'counter', 'Datagrams dropped without decoding because nothing handles their type.', [('', [], metrics['packets_skipped'])])
+		family('decode_errors_total', 'counter', 'Datagrams that were not valid JSON.', [('', [], metrics['decode_errors'])])
+		family('handler_errors_total', 'counter', 'Packet handlers that raised.', [('', [], metrics['handler_errors'])])
+		family('derivation_errors_total', 'counter', 'obs_st packets that could not be derived and cached.', [('', [], metrics['derivation_errors'])])
+		family('derived_field_errors_total', 'counter', 'Derived fields whose function raised, by field.', [('', [('field', name)], count) for name, count in sorted(metrics['derived_field_errors'].items())])
+		family('suppressed_total', 'counter', 'Datagrams dropped as duplicates, obs_st packets already cached or too old for the cache, and packets without a serial number.', [('', [('reason', reason)], count) for reason, count in metrics['suppressed'].items()])
+		family('reordered_observations_total', 'counter', 'obs_st packets that arrived late and were cached in their place.', [('', [], metrics['reordered_observations'])])
+		family('socket_binds_total', 'counter', 'Times the UDP socket was bound.', [('', [], metrics['socket_binds'])])
+		family('socket_rebinds_total', 'counter', 'Times the UDP socket was bound again after being lost.', [('', [], metrics['socket_rebinds'])])
+		family('seconds_since_last_observation', 'gauge', 'Seconds since the last obs_st was cached.', [('', [], metrics['seconds_since_last_observation'])])
+		family('ingest_received_total', 'counter', 'Datagrams read from the socket.', [('', [], metrics['ingest']['received'])])
+		family('ingest_processed_total', 'counter', 'Datagrams taken off the ingest queue and processed.', [('', [], metrics['ingest']['processed'])])
+		family('ingest_dropped_total', 'counter', 'Datagrams dropped because the ingest queue was full.', [('', [], metrics['ingest']['dropped'])])
+		family('ingest_queued', 'gauge', 'Datagrams waiting on the ingest queue.', [('', [], metrics['ingest']['queued'])])
+		family('ignored_stations_total', 'counter', 'Observations ignored because the station limit was reached.', [('', [], metrics['ingest']['ignored_stations'])])
+		#
+		if metrics['recorder'] is not None:
+			family('recorder_recorded_total', 'counter', 'Datagrams written to the packet recording.', [('', [], metrics['recorder']['recorded'])])
+			family('recorder_dropped_total', 'counter', 'Datagrams left unrecorded because the recorder fell behind.', [('', [], metrics['recorder']['dropped'])])
+			family('recorder_bytes_written_total', 'counter', 'Bytes of records written to the packet recording, before compression.', [('', [], metrics['recorder']['bytes_written'])])
+			family('recorder_errors_total', 'counter', 'Packet recording write failures.', [('', [], metrics['recorder']['errors'])])
+
+		#
+		family('cached_observations', 'gauge', 'Observations cached per station.', [('', [('station', summary['serial_number'])], summary['cached']) for summary in metrics['stations']])
+		family('observation_generation', 'counter', 'Observations cached per station since start.', [('', [('station', summary['serial_number'])], summary['generation']) for summary in metrics['stations']])
+
+		#
+		samples = []
+
+		#
+		for stage, timings in metrics['timings'].items():
+
+			#
+			samples.extend(('_bucket', [('stage', stage), ('le', '+Inf' if bound == math.inf else repr(bound))], count) for bound, count in timings['buckets'])
+			samples.append(('_sum', [('stage', stage)], timings['sum']))
+			samples.append(('_count', [('stage', stage)], timings['count']))
+
+		#
+		family('stage_duration_seconds', 'histogram', 'Time spent per ingest stage.', samples)
+
+		#
+		return '\n'.join(lines) + '\n'
+
+	# Note it's get_for_json()—not get_json(). This isn't really JSON as we're using single quotes, None in lieu of null, True/False in lieu of true/false, etc. But it can easily be converted into strict JSON.
+	# Every read takes an optional station serial number; without one, it reads the default station.
+	@classmethod
+	def get_for_json(cls, station = None):
+		return cls.get_station(station).get_for_json()
+
+	# The latest observation as an immutable snapshot. Every field of it comes from the same packet.
+	@classmethod
+	def get_observation(cls, station = None):
+		return cls.get_station(station).get_observation()
+
+	# Note it's get_for_json()—not get_json(). This isn't really JSON as we're using single quotes, None in lieu of null, True/False in lieu of true/false, etc. But it can easily be converted into strict JSON.
+	@classmethod
+	def get_all_for_json(cls, station = None):
+		return cls.get_station(station).get_all_for_json()
+
+	# Observations between two epochs (inclusive), optionally only some fields, and optionally downsampled into buckets of bucket_seconds with the min, max, mean and last value of each field.
+	# For example, a 12-hour chart of three fields in 48 buckets: get_range(now - 43200, now, fields = ['pressure_mb', 'temperature_f', 'wind_gust_miles_per_hour'], bucket_seconds = 900).
+	# Bucketed queries are answered from the coarsest rollup tier that can, so they reach back as far as that tier does: with TempestWeatherHelper(rollup_tiers = STANDARD_ROLLUP_TIERS), get_range(now - 30 * 86400, now, bucket_seconds = 86400) charts a month in days from the hourly tier.
+	@classmethod
+	def get_range(cls, start_epoch = None, end_epoch = None, fields = None, bucket_seconds = None, station = None):
+		return cls.get_station(station).get_range(start_epoch, end_epoch, fields, bucket_seconds)
+
+	# Bumped every time an observation is cached. Useful to pollers (and HTTP ETags) for telling whether anything has changed.
+	@classmethod
+	def get_generation(cls, station = None):
+		return cls.get_station(station).get_generation()
+
+	# Adds a field derived from others without touching the core: function is called with the values of inputs, which can be Observation fields, raw obs_st values (obs_wind_avg, obs_air_temperature, etc.; see OBS_ST_INPUTS) or fields registered earlier.
+	# It's only called again when one of its inputs changes, and it isn't called at all while an input is None. A lazy field is only computed when it's read, so an expensive one costs nothing until someone asks for it.
+	#
+	#     TempestWeatherHelper.register_derived_field('vapor_pressure_hpa', ['temperature_c', 'relative_humidity'], lambda t, rh: round(rh / 100 * 6.112 * math.exp(17.62 * t / (243.12 + t)), 1))
+	#
+	# dew_point_c, dew_point_f, heat_index_f, wind_chill_f, feels_like_f and feels_like_c are registered (lazily) from the start.
+	@classmethod
+	def register_derived_field(cls, name, inputs, function, lazy = False):
+		cls.__derived_fields.register(name, inputs, function, lazy)
+
+	# Raises ValueError if another field takes this one as an input.
+	@classmethod
+	def unregister_derived_field(cls, name):
+		cls.__derived_fields.unregister(name)
+
+	# The registered derived fields (or only the named ones) for the latest observation, as a dict.
+	@classmethod
+	def get_derived_fields(cls, fields = None, station = None):
+		return cls.get_station(station).get_derived_fields(cls.__derived_fields, fields)
+
+	# A short-term forecast (the next 6 to 12 hours) from the latest observation: the pressure tendency read against the wind and any rain, as {'forecast': ..., 'pressure_tendency': ..., 'wind_direction': ..., ...}. See Forecaster and Forecast.
+	# It's worked out once per observation as it arrives, so this is a constant-time read. The wind it reads is the rapid_wind average if the wind is being tracked (see track_wind()), or else the obs row's.
+	@classmethod
+	def get_forecast(cls, station = None):
+		return cls.get_station(station).get_forecast(cls.__forecaster)
+
+	# Wind from the rapid_wind packets the hub sends every 3 seconds, which is fresher than the once-a-minute obs_st: the newest sample, plus the average speed, vector-averaged direction and peak gust (with its wind_gust_description) over the last 2 and 10 minutes.
+	# The first call starts tracking the wind (see track_wind()), so until samples arrive it has nothing to report.
+	@classmethod
+	def get_wind(cls, station = None):
+
+		#
+		cls.track_wind()
+
+		#
+		return cls.get_station(station).get_wind()
+
+	# Starts routing rapid_wind packets to handle_rapid_wind(), for get_wind() and the forecaster's wind. Until then they're dropped undecoded like any other packet nobody wants, since they're twenty times as many as obs_st and most users never look at them.
+	# Returns True if this call started it.
+	@classmethod
+	def track_wind(cls):
+
+		# Checked without the lock first, since get_wind() calls this every time.
+		if cls.__tracking_wind: return False
+
+		#
+		with cls.__tracking_wind_lock:
+
+			#
+			if cls.__tracking_wind: return False
+
+			#
+			cls.register_packet_handler('rapid_wind', cls.handle_rapid_wind)
+			cls.__tracking_wind = True
+
+		#
+		return True
+
+	# Only what's new since a cursor from an earlier call (or 0), so a poller keeping its own copy of the history does O(new data) work per poll rather than O(history).
+	# Returns {'cursor': ..., 'resync': ..., 'observations': [...]}: pass cursor to the next call. If resync is True, the cursor had fallen off the cache (or something was inserted behind it, or it's from before a restart), and observations is the whole cache, to replace the client's copy.
+	@classmethod
+	def get_since(cls, cursor, station = None):
+		return cls.get_station(station).get_since(cursor)
+
+	# Loads archived observations in bulk: records is an iterable of (serial_number, obs) pairs, such as read_packet_log() or read_csv_export() produce, in time order. With station, every row is filed under that serial number; otherwise rows without one are counted and dropped, as packets are.
+	# Each station's rows are derived in batches and cached with Station.ingest(), rather than a packet at a time; a year of minute data takes about half a minute, most of it the pressure trends. Returns how many rows were cached.
+	@classmethod
+	def ingest(cls, records, station = None, batch_size = 4096):
+
+		#
+		ingested = 0
+		pending = {}
+
+		#
+		def flush(serial_number):
+
+			#
+			target = cls.__add_station(serial_number, None)
+			rows = pending.pop(serial_number)
+
+			#
+			return target.ingest(rows, batch_size) if target is not None else 0
+
+		#
+		for serial_number, obs in records:
+
+			#
+			if station is not None: serial_number = station
+			if not cls.__identified(serial_number): continue
+
+			#
+			rows = pending.setdefault(serial_number, [])
+			rows.append(obs)
+
+			#
+			if len(rows) >= batch_size: ingested += flush(serial_number)
+
+		#
+		for serial_number in list(pending):
+			ingested += flush(serial_number)
+
+		#
+		return ingested
+
+	# Pushes each new observation as it's published, instead of waiting to be polled. Returns a Subscription: iterate it (for or async for) to receive (serial_number, observation) pairs, and close() it (or call unsubscribe()) when done.
+	# If callback is given, it's called as callback(serial_number, observation) from a thread of the subscription's own, so a slow callback never holds up ingest.
+	# fields limits delivery to observations in which one of those fields changed, e.g. subscribe(fields = ['pressure_trend_one_hour_description', 'lightning_detected']), and station limits it to one station.
+	@classmethod
+	def subscribe(cls, callback = None, fields = None, station = None):
+
+		#
+		subscription = Subscription(fields, station)
+
+		#
+		with cls.__subscriptions_lock:
+			cls.__subscriptions = cls.__subscriptions + (subscription,)
+
+		#
+		if callback is not None:
+
+			#
+			def deliver():
+
+				#
+				for serial_number, observation in subscription:
+
+					#
+					try:
+						callback(serial_number, observation)
+
+					#
+					except Exception as e:
+						print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+			#
+			threading.Thread(target = deliver, daemon = True).start()
+
+		#
+		return subscription
+
+	#
+	@classmethod
+	def unsubscribe(cls, subscription):
+
+		#
+		subscription.close()
+
+		#
+		with cls.__subscriptions_lock:
+			cls.__subscriptions = tuple(other for other in cls.__subscriptions if other is not subscription)
+
+	# Strict (RFC 8259) JSON bytes for the latest values. Encoded once when the observation arrives, so this costs nothing between packets.
+	@classmethod
+	def get_json(cls, station = None):
+		return cls.get_station(station).get_json()
+
+	# Strict (RFC 8259) JSON bytes for the last 12 hours of data: encoded from the columns, at most once per generation.
+	@classmethod
+	def get_all_json(cls, station = None):
+		return cls.get_station(station).get_all_json()
+
+	#
+	@classmethod
+	def get_pressure_change_mb_from(cls, minutes_ago, pressure_mb = None, station = None, minimum_coverage = None):
+		return cls.get_station(station).get_pressure_change_mb_from(minutes_ago, pressure_mb, minimum_coverage)
+
+	#
+	@classmethod
+	def get_pressure_trend_advanced_from(cls, minutes_ago, pressure_mb = None, station = None, minimum_coverage = None):
+		return cls.get_station(station).get_pressure_trend_advanced_from(minutes_ago, pressure_mb, minimum_coverage)
+
+	# The receiver stage. It only reads the socket, draining everything that's waiting before handing it to the processing stage, so a burst of packets never waits behind parsing and derivation.
+	@classmethod
+	def run(cls):
+
+		# The processing stage runs on its own thread.
+		if cls.__processing_thread is None:
+			cls.__processing_thread = threading.Thread(target = cls.process_queue, daemon = True)
+			cls.__processing_thread.start()
+
+		#
+		while True:
+
+			# Try to create and bind the socket.
+			try:
+
+				#
+				cls.__socket = bind_tempest_socket(receive_buffer_bytes = cls.__receive_buffer_bytes)
+				cls.__socket.setblocking(False)
+				cls.record_socket_bind()
+
+				# Start listening loop.
+				while True:
+
+					#
+					try:
+
+						# This blocks until something is received.
+						select.select([cls.__socket], [], [])
+
+						#
+						datagrams = drain_datagrams(cls.__socket)
+						cls.record_datagrams(datagrams)
+						cls.__ingest_queue.put_many(datagrams)
+
+					# 
+					except (socket.error, ValueError) as e:
+
+						# Break out to reinitialize the socket.
+						break
+
+			#
+			except Exception as e:
+
+				#
+				print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+			# Cleanup.
+			if cls.__socket:
+
+				# Try to close the socket before we dereference it.
+				try:
+
+					# 
+					cls.__socket.close()
+
+				#
+				except Exception:
+					pass
+
+				# Dereference from memory.
+				cls.__socket = None
+
+			# Pause a bit before attempting to regain the lost connection.
+			time.sleep(5)
+
+	# The processing stage. Takes datagrams off the ingest queue in batches and runs them through handle_data().
+	@classmethod
+	def process_queue(cls):
+
+		#
+		while True:
+
+			#
+			for bytes_from_tempest_hub, received_epoch, address in cls.__ingest_queue.get_batch(cls.__batch_size):
+
+				#
+				cls.handle_data(bytes_from_tempest_hub)
+				cls.__processed += 1
+
+	#
+	@classmethod
+	def handle_data(cls, bytes_from_tempest_hub):
+
+		#
+		try:
+
+			# Troubleshooting.
+			#print("received message from %s:%s — %s" % (address[0], address[1], bytes_from_tempest_hub))
+
+			# See: https://weatherflow.github.io/Tempest/api/udp/v143/
+			# By default we're only interested in general observation packets. Other packets report 'rapid_wind', 'hub_status', etc., and aren't even decoded unless someone has registered a handler for them.
+			cls.__dispatcher.dispatch(bytes_from_tempest_hub)
+
+		#
+		except Exception as e:
+
+			#
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+	# Routes packets of the given type ('rapid_wind', 'hub_status', 'evt_strike', etc.) to handler, which is called with the decoded packet.
+	@classmethod
+	def register_packet_handler(cls, packet_type, handler):
+		cls.__dispatcher.register(packet_type, handler)
+
+	#
+	@classmethod
+	def unregister_packet_handler(cls, packet_type, handler):
+		cls.__dispatcher.unregister(packet_type, handler)
+
+	# Handles a decoded 'obs_st' packet, caching it against the station that sent it.
+	@classmethod
+	def handle_observation(cls, data):
+
+		#
+		try:
+
+			#
+			station = cls.__add_station(data.get('serial_number'), data.get('hub_sn'))
+			if station is None: return
+
+			#
+			station.hub_sn = data.get('hub_sn', station.hub_sn)
+			metrics = cls.__metrics
+
+			# A duplicate the PacketDeduplicator has forgotten, or a packet too old for the cache, isn't worth deriving.
+			arrival, depth = station.arrival_of(data['obs'][0][0])
+
+			#
+			if arrival is Arrival.DUPLICATE:
+				metrics.duplicate_observations += 1
+				return
+
+			#
+			if arrival is Arrival.STALE:
+				metrics.stale_observations += 1
+				return
+
+			#
+			timing = metrics.timing
+			if timing: started = time.perf_counter()
+
+			# Everything is derived off to the side; nothing is visible to readers yet.
+			values = DerivedFieldEngine.derive(data['obs'][0])
+			if timing: derived = time.perf_counter()
+
+			#
+			station.note_report_interval(data['obs'][0])
+			station.derive_trends(values)
+			if timing: trended = time.perf_counter()
+
+			#
+			previous = station.get_observation() if station.get_generation() else None
+			observation = Observation(**values)
+			station.cache_observation(observation)
+			if timing: cached = time.perf_counter()
+
+			# A late observation only fills its place in the history; the latest, and everything published from it, stays as it was.
+			latest = arrival is Arrival.NEWEST
+			if latest: station.update_derived_fields(cls.__derived_fields, data['obs'][0])
+			if timing: evaluated = time.perf_counter()
+
+			# The forecast is worked out once per observation, so get_forecast() is only a read.
+			if latest: station.update_forecast(cls.__forecaster, data['obs'][0])
+
+			#
+			if timing:
+				metrics.observe('derive', derived - started)
+				metrics.observe('trend', trended - derived)
+				metrics.observe('cache_append', cached - trended)
+				metrics.observe('derived_fields', evaluated - cached)
+				metrics.observe('forecast', time.perf_counter() - evaluated)
+
+			#
+			if arrival is Arrival.LATE:
+				metrics.reordered_observations += 1
+				return
+
+			#
+			metrics.last_observation_monotonic = time.monotonic()
+
+			#
+			for subscription in cls.__subscriptions:
+				subscription.offer(station.serial_number, previous, observation)
+
+		#
+		except Exception as e:
+
+			#
+			cls.__metrics.derivation_errors += 1
+
+			#
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+	# Handles a decoded 'rapid_wind' packet, adding its sample to the wind aggregates of the station that sent it.
+	@classmethod
+	def handle_rapid_wind(cls, data):
+
+		#
+		try:
+
+			#
+			station = cls.__add_station(data.get('serial_number'), data.get('hub_sn'))
+			if station is None: return
+
+			#
+			station.add_wind_sample(data['ob'])
+
+		#
+		except Exception as e:
+
+			#
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+# Observation packets are what we cache. rapid_wind packets are only decoded once someone wants the wind; see TempestWeatherHelper.track_wind().
+TempestWeatherHelper.register_packet_handler('obs_st', TempestWeatherHelper.handle_observation)
+
+# Feeds datagrams from an asyncio transport into TempestWeatherHelper.handle_data(), so the asyncio receiver shares all of the parsing and derivation code with the threaded one.
+class TempestWeatherProtocol(asyncio.DatagramProtocol):
+
+	#
+	def __init__(self, on_connection_lost):
+		self.__on_connection_lost = on_connection_lost
+
+	#
+	def datagram_received(self, bytes_from_tempest_hub, address):
+		TempestWeatherHelper.record_datagrams(((bytes_from_tempest_hub, time.time(), address),))
+		TempestWeatherHelper.handle_data(bytes_from_tempest_hub)
+
+	#
+	def error_received(self, exc):
+		print(''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)), file = sys.stderr, flush = True)
+
+	#
+	def connection_lost(self, exc):
+		self.__on_connection_lost(exc)
+
+# An asyncio alternative to running TempestWeatherHelper as a thread. It listens on the hub's port from an existing event loop, with no extra thread.
+# If the socket can't be bound, or is lost, we rebind with exponential backoff.
+#
+#     asyncTempestWeatherHelper = AsyncTempestWeatherHelper()
+#     await asyncTempestWeatherHelper.start()
+#     ...
+#     await asyncTempestWeatherHelper.stop()
+#
+# The cached data is read through TempestWeatherHelper as usual.
+class AsyncTempestWeatherHelper:
+
+	#
+	def __init__(self, host = '0.0.0.0', port = TEMPEST_UDP_PORT, initial_backoff_seconds = 1, maximum_backoff_seconds = 60):
+		self.host = host
+		self.port = port
+		self.initial_backoff_seconds = initial_backoff_seconds
+		self.maximum_backoff_seconds = maximum_backoff_seconds
+		self.__task = None
+		self.__transport = None
+
+	#
+	def is_running(self):
+		return self.__task is not None and not self.__task.done()
+
+	#
+	async def start(self):
+
+		#
+		if self.is_running(): return
+
+		#
+		self.__task = asyncio.get_running_loop().create_task(self.__listen())
+
+	#
+	async def stop(self):
+
+		#
+		if self.__task is None: return
+
+		#
+		self.__task.cancel()
+
+		#
+		try:
+			await self.__task
+		except asyncio.CancelledError:
+			pass
+
+		#
+		self.__task = None
+
+	#
+	async def __listen(self):
+
+		#
+		loop = asyncio.get_running_loop()
+		backoff_seconds = self.initial_backoff_seconds
+
+		#
+		while True:
+
+			#
+			try:
+
+				#
+				lost = loop.create_future()
+
+				#
+				def on_connection_lost(exc):
+					if not lost.done(): lost.set_result(exc)
+
+				#
+				self.__transport, protocol = await loop.create_datagram_endpoint(lambda: TempestWeatherProtocol(on_connection_lost), sock = bind_tempest_socket(self.host, self.port))
+				TempestWeatherHelper.record_socket_bind()
+
+				# We're bound, so the next failure starts over with a short pause.
+				backoff_seconds = self.initial_backoff_seconds
+
+				# Wait until the transport goes away.
+				await lost
+
+			#
+			except asyncio.CancelledError:
+
+				#
+				if self.__transport: self.__transport.close()
+				self.__transport = None
+				raise
+
+			#
+			except Exception as e:
+
+				#
+				print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+			# Cleanup.
+			if self.__transport:
+				self.__transport.close()
+				self.__transport = None
+
+			# Pause before attempting to regain the lost connection, backing off a bit more each time.
+			await asyncio.sleep(backoff_seconds)
+			backoff_seconds = min(backoff_seconds * 2, self.maximum_backoff_seconds)
+
+# Serves the cache over HTTP, so LAN clients can poll it without each wrapping get_for_json() in their own handler.
+#
+#     GET /latest[?station=ST-...]     The latest values, as get_json().
+#     GET /history[?station=ST-...]    The last 12 hours of data, as get_all_json().
+#     GET /history?since=N[&station=]  Only what's new since cursor N, as get_since().
+#     GET /stations                    Every station heard from, as get_stations().
+#     GET /metrics                     Counters and timings in Prometheus text format, as get_metrics_prometheus().
+#     GET /metrics.json                The same, as get_metrics().
+#
+# Responses carry an ETag made from the observation generation and boot_id, so a poll with a matching If-None-Match is answered with a bodiless 304.
+# Bodies are encoded (and gzipped, for clients that accept it) at most once per generation, and HTTP/1.1 keep-alive lets pollers reuse one connection.
+class TempestHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
+
+	#
+	protocol_version = 'HTTP/1.1'
+	server_version = 'TempestWeatherHelper'
+
+	# Headers and body go out in separate writes, so without this a keep-alive client can stall on a delayed ACK.
+	disable_nagle_algorithm = True
+
+	# Idle keep-alive connections are closed after this many seconds.
+	timeout = 60
+
+	# Bodies smaller than this aren't worth gzipping.
+	minimum_gzip_bytes = 256
+
+	# Different for every process, and part of every ETag. Without a log, generations start over at 0 after a restart, so a poller's old tag could otherwise match different data.
+	boot_id = os.urandom(4).hex()
+
+	# Everything else is JSON.
+	content_types = {'metrics': 'text/plain; version=0.0.4; charset=utf-8'}
+
+	# (path, station serial number) → (generation, body, gzipped body or None), replaced as a whole whenever the generation moves on.
+	__representations = {}
+
+	#
+	def do_GET(self):
+		self.__respond(True)
+
+	#
+	def do_HEAD(self):
+		self.__respond(False)
+
+	# Polls are frequent; don't log each one to stderr.
+	def log_message(self, format, *args):
+		pass
+
+	#
+	def __respond(self, include_body):
+
+		#
+		try:
+
+			#
+			url = urllib.parse.urlsplit(self.path)
+			query = urllib.parse.parse_qs(url.query)
+			station = query.get('station', [None])[0]
+
+			#
+			try:
+				representation = self.__representation(url.path, station, query.get('since', [None])[0])
+			except KeyError:
+				return self.__send(404, b'{"error":"unknown station"}', None, False, include_body)
+			except ValueError:
+				return self.__send(400, b'{"error":"since must be an integer"}', None, False, include_body)
+
+			#
+			if representation is None: return self.__send(404, b'{"error":"not found"}', None, False, include_body)
+
+			#
+			tag, generation, body, gzipped_body = representation
+
+			# A distinct tag per encoding, since the bytes differ.
+			compressed = gzipped_body is not None and self.__accepts_gzip()
+			etag = None if generation is None else '"%s-%s-%d%s"' % (tag, self.boot_id, generation, '-gzip' if compressed else '')
+
+			# A 304 has no body, so nothing to say the encoding of; the ETag still tells the two apart.
+			if etag is not None and self.__matches(etag): return self.__send(304, b'', etag, False, False)
+
+			#
+			self.__send(200, gzipped_body if compressed else body, etag, compressed, include_body, self.content_types.get(tag, 'application/json'))
+
+		#
+		except Exception as e:
+
+			#
+			print(traceback.format_exc(), file = sys.stderr, flush = True)
+
+			# We can't know how much of a response went out, so don't reuse the connection.
+			self.close_connection = True
+
+	# (tag, generation, body, gzipped body or None) for a path, or None if there's no such path. Raises KeyError for an unknown station, and ValueError for a bad cursor.
+	def __representation(self, path, station, since):
+
+		#
+		if path == '/metrics':
+			return ('metrics', None, TempestWeatherHelper.get_metrics_prometheus().encode('utf-8'), None)
+
+		#
+		if path == '/metrics.json':
+			return ('metrics.json', None, json.dumps(TempestWeatherHelper.get_metrics(), separators = (',', ':')).encode('utf-8'), None)
+
+		#
+		if path == '/stations':
+
+			# Every new observation bumps some station's generation, so their sum only ever grows.
+			stations = TempestWeatherHelper.get_stations()
+			generation = sum(summary['generation'] for summary in stations) + len(stations)
+
+			#
+			return self.__cached(('/stations', None), 'stations', generation, lambda: json.dumps(stations, separators = (',', ':')).encode('utf-8'))
+
+		#
+		if path not in ('/latest', '/history'): return None
+
+		#
+		station = TempestWeatherHelper.get_station(station)
+
+		# Small and different for every cursor, so not worth caching.
+		if path == '/history' and since is not None:
+			return ('since', None, json.dumps(station.get_since(int(since)), allow_nan = False, separators = (',', ':')).encode('utf-8'), None)
+
+		# Read the generation before the body: if a packet lands in between, the body is newer than its tag and the next poll just fetches it again.
+		generation = station.get_generation()
+
+		#
+		return self.__cached((path, station.serial_number), '%s-%s' % (path[1:], station.serial_number), generation, station.get_json if path == '/latest' else station.get_all_json)
+
+	#
+	def __cached(self, key, tag, generation, encode):
+
+		#
+		cls = type(self)
+		cached = cls.__representations.get(key)
+
+		#
+		if cached is None or cached[0] != generation:
+
+			#
+			body = encode()
+			gzipped_body = gzip.compress(body, mtime = 0) if len(body) >= self.minimum_gzip_bytes else None
+
+			#
+			cached = (generation, body, gzipped_body)
+			cls.__representations[key] = cached
+
+		#
+		return (tag, cached[0], cached[1], cached[2])
+
+	#
+	def __accepts_gzip(self):
+
+		#
+		for coding in self.headers.get('Accept-Encoding', '').split(','):
+
+			#
+			name, _, parameters = coding.strip().partition(';')
+			if name.strip().lower() not in ('gzip', '*'): continue
+
+			# gzip;q=0 means "anything but gzip".
+			if parameters.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'): continue
+
+			#
+			return True
+
+		#
+		return False
+
+	#
+	def __matches(self, etag):
+
+		#
+		if_none_match = self.headers.get('If-None-Match')
+		if if_none_match is None: return False
+
+		# If-None-Match uses weak comparison.
+		for candidate in if_none_match.split(','):
+
+			#
+			candidate = candidate.strip()
+			if candidate == '*' or candidate == etag or candidate == 'W/' + etag: return True
+
+		#
+		return False
+
+	#
+	def __send(self, status, body, etag, compressed, include_body, content_type = 'application/json'):
+
+		#
+		self.send_response(status)
+
+		#
+		if status != 304:
+			self.send_header('Content-Type', content_type)
+			self.send_header('Content-Length', str(len(body)))
+
+		#
+		if compressed: self.send_header('Content-Encoding', 'gzip')
+		if etag is not None: self.send_header('ETag', etag)
+
+		#
+		self.send_header('Cache-Control', 'no-cache')
+		self.send_header('Vary', 'Accept-Encoding')
+		self.end_headers()
+
+		#
+		if include_body and body: self.wfile.write(body)
+
+# Starts serving the cache over HTTP on a background thread, with a thread per connection. Call shutdown() and server_close() on the returned server to stop.
+def start_http_server(host = '0.0.0.0', port = 8080):
+
+	#
+	server = http.server.ThreadingHTTPServer((host, port), TempestHTTPRequestHandler)
+	server.daemon_threads = True
+
+	#
+	thread = threading.Thread(target = server.serve_forever, daemon = True)
+	thread.start()
+
+	#
+	return server
+
+# Bulk-loads archives into compact observation logs, one per station, that can be read with ObservationLog(path, None).read() or restored with Station.open_log().
+#
+#     python3 tempest_weather_helper.py ingest --output-directory archive packets-2024-*.jsonl.gz export.csv
+#
+# Running it again with newer files appends to the same logs.
+def ingest_main(arguments):
+
+	#
+	parser = argparse.ArgumentParser(prog = 'tempest_weather_helper.py ingest', description = 'Bulk-load obs_st packet logs (.jsonl) and CSV exports (.csv), optionally gzipped.')
+	parser.add_argument('paths', nargs = '+')
+	parser.add_argument('--output-directory', required = True, help = 'where to write <serial number>.twharchive')
+	parser.add_argument('--capacity', type = int, help = 'observations each new archive holds before wrapping around (default: a year of minutes); an existing archive keeps its own, and one with a different capacity is refused rather than overwritten')
+	parser.add_argument('--serial-number', help = 'file everything under this station, e.g. for CSV exports without a serial_number column')
+	arguments = parser.parse_args(arguments)
+
+	#
+	os.makedirs(arguments.output_directory, exist_ok = True)
+
+	#
+	stations = {}
+	started = time.perf_counter()
+	ingested = 0
+
+	#
+	for path in arguments.paths:
+
+		#
+		records = read_csv_export(path) if path.endswith(('.csv', '.csv.gz')) else read_packet_log(path)
+
+		# Rows stream straight through, a run of one station's rows at a time.
+		for serial_number, run in itertools.groupby(records, key = lambda record: arguments.serial_number or record[0]):
+
+			# The archive's newest observations are restored first, so rows it already has are skipped.
+			if serial_number not in stations:
+
+				#
+				archive_path = os.path.join(arguments.output_directory, re.sub(r'[^A-Za-z0-9_.-]', '_', str(serial_number)) + '.twharchive')
+				station = Station(serial_number)
+
+				#
+				try:
+
+					# An existing archive keeps its own capacity unless one is asked for.
+					capacity = arguments.capacity
+					if capacity is None: capacity = ObservationLog.capacity_of(archive_path) if os.path.exists(archive_path) and os.path.getsize(archive_path) else 366 * 24 * 60
+
+					#
+					station.open_log(archive_path, capacity, fresh_only = False)
+
+				# Refuse, rather than start the archive over.
+				except ValueError as e:
+
+					#
+					for opened in stations.values():
+						opened.close_log()
+
+					#
+					parser.error(str(e))
+
+				#
+				stations[serial_number] = station
+
+			#
+			ingested += stations[serial_number].ingest(obs for record_serial_number, obs in run)
+
+	#
+	for station in stations.values():
+		station.close_log()
+
+	#
+	elapsed = time.perf_counter() - started
+	print('ingested %d observations for %d station(s) in %.1f s (%.0f per second)' % (ingested, len(stations), elapsed, ingested / elapsed if elapsed else 0), file = sys.stdout, flush = True)
+
+# Main function is executed only when run as a Python program, not when imported as a module.
+def main():
+
+	#
+	if sys.argv[1:2] == ['ingest']: return ingest_main(sys.argv[2:])
+
+	#
+	tempestWeatherHelper = TempestWeatherHelper()
+	tempestWeatherHelper.start()
+
+	# Print each observation as soon as it arrives.
+	for serial_number, observation in tempestWeatherHelper.subscribe():
+		print(observation.for_json(), file = sys.stdout, flush = True)
 
 if __name__ == '__main__':
 
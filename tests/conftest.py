@@ -0,0 +1,24 @@
+#
+# Shared helpers for the tests. The module lives in src/ and isn't installed, so it's put on the path here, as the benchmarks do.
+import json
+import os
+import sys
+
+#
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# The forecast tests replay benchmarks/synthetic.py's pressure curves.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+#
+SERIAL_NUMBER = 'ST-00000512'
+HUB_SN = 'HB-00013030'
+START_EPOCH = 1700000000
+
+# An obs row for an 'obs_st' packet at the given epoch. Whole numbers stay ints, as the hub sends them.
+def obs_row(epoch, pressure_mb = 1013.25, temperature_c = 22, uv_index = 3, report_interval_minutes = 1):
+	return [epoch, 0.1, 1.2, 2, 180, 3, pressure_mb, temperature_c, 55.5, 30000, uv_index, 300, 0, 0, 0, 0, 2.7, report_interval_minutes]
+
+# The bytes of an 'obs_st' packet carrying the given obs row.
+def obs_st_packet(obs, serial_number = SERIAL_NUMBER):
+	return json.dumps({'serial_number': serial_number, 'type': 'obs_st', 'hub_sn': HUB_SN, 'obs': [obs], 'firmware_revision': 129}).encode('utf-8')
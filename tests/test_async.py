@@ -0,0 +1,118 @@
+#
+import asyncio
+import socket
+import time
+
+#
+import tempest_weather_helper
+
+#
+from conftest import START_EPOCH, obs_row, obs_st_packet
+from tempest_weather_helper import AsyncTempestWeatherHelper, TempestWeatherHelper, TempestWeatherProtocol
+
+# A UDP port nothing is listening on.
+def free_port():
+
+	#
+	with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+		probe.bind(('127.0.0.1', 0))
+		return probe.getsockname()[1]
+
+#
+async def until(condition, timeout = 2):
+
+	#
+	deadline = time.monotonic() + timeout
+	while not condition():
+		assert time.monotonic() < deadline
+		await asyncio.sleep(0.005)
+
+#
+def send(port, serial_number, minute):
+	with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender: sender.sendto(obs_st_packet(obs_row(START_EPOCH + minute * 60), serial_number = serial_number), ('127.0.0.1', port))
+
+#
+def cached(serial_number):
+	return any(summary['serial_number'] == serial_number for summary in TempestWeatherHelper.get_stations())
+
+# start() binds and ingests from the running loop, a second start() is a no-op, and stop() lets go of the port.
+def test_start_ingest_stop():
+
+	#
+	port = free_port()
+	helper = AsyncTempestWeatherHelper('127.0.0.1', port)
+
+	#
+	async def run():
+
+		#
+		binds = TempestWeatherHelper.get_metrics()['socket_binds']
+		await helper.start()
+		await helper.start()
+		await until(lambda: TempestWeatherHelper.get_metrics()['socket_binds'] == binds + 1)
+		assert helper.is_running()
+
+		#
+		send(port, 'ST-00001301', 0)
+		await until(lambda: cached('ST-00001301'))
+		assert TempestWeatherHelper.get_observation('ST-00001301').last_updated_epoch == START_EPOCH
+
+		#
+		await helper.stop()
+		await helper.stop()
+		assert not helper.is_running()
+
+		# Nothing is listening any more.
+		send(port, 'ST-00001302', 0)
+		await asyncio.sleep(0.05)
+		assert not cached('ST-00001302')
+		assert TempestWeatherHelper.get_metrics()['socket_binds'] == binds + 1
+
+	#
+	asyncio.run(run())
+
+# A port that can't be bound is retried, backing off, until it can be; each failure is logged.
+def test_retry_after_bind_failure(monkeypatch, capsys):
+
+	#
+	port = free_port()
+	attempts = []
+	bind_tempest_socket = tempest_weather_helper.bind_tempest_socket
+
+	#
+	def failing_bind(host, port):
+		attempts.append(time.monotonic())
+		if len(attempts) < 3: raise OSError('Address already in use')
+		return bind_tempest_socket(host, port)
+
+	#
+	monkeypatch.setattr(tempest_weather_helper, 'bind_tempest_socket', failing_bind)
+	helper = AsyncTempestWeatherHelper('127.0.0.1', port, initial_backoff_seconds = 0.02, maximum_backoff_seconds = 0.05)
+
+	#
+	async def run():
+
+		#
+		binds = TempestWeatherHelper.get_metrics()['socket_binds']
+		await helper.start()
+		await until(lambda: TempestWeatherHelper.get_metrics()['socket_binds'] == binds + 1)
+		assert len(attempts) == 3
+
+		#
+		send(port, 'ST-00001303', 0)
+		await until(lambda: cached('ST-00001303'))
+		await helper.stop()
+
+	#
+	asyncio.run(run())
+
+	# The second pause is twice the first.
+	assert attempts[1] - attempts[0] >= 0.02 and attempts[2] - attempts[1] >= 0.04
+	assert capsys.readouterr().err.count('OSError: Address already in use') == 2
+
+# Errors the transport reports are logged, with their type and message.
+def test_error_received_is_logged(capsys):
+
+	#
+	TempestWeatherProtocol(lambda exc: None).error_received(ConnectionRefusedError('refused'))
+	assert 'ConnectionRefusedError: refused' in capsys.readouterr().err
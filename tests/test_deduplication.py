@@ -0,0 +1,56 @@
+#
+import json
+
+#
+from conftest import HUB_SN, START_EPOCH, obs_row
+from tempest_weather_helper import PacketDeduplicator, TempestWeatherHelper
+
+#
+SERIAL_NUMBER = 'ST-00000999'
+
+#
+def obs_st_packet(obs, **spacing):
+	return json.dumps({'serial_number': SERIAL_NUMBER, 'type': 'obs_st', 'hub_sn': HUB_SN, 'obs': [obs], 'firmware_revision': 129}, **spacing).encode('utf-8')
+
+# Keys come from the bytes for the hub's compact JSON, and from the decoded packet otherwise; both agree.
+def test_keys_from_bytes_and_from_data_agree():
+
+	#
+	deduplicator = PacketDeduplicator()
+	packet = obs_st_packet(obs_row(START_EPOCH), separators = (',', ':'))
+
+	#
+	assert deduplicator.key_of_bytes('obs_st', packet) == deduplicator.key_of_data('obs_st', json.loads(packet)) == ('obs_st', SERIAL_NUMBER.encode('utf-8'), START_EPOCH)
+	assert deduplicator.key_of_bytes('hub_status', packet) is None
+
+# Only the last capacity keys are remembered.
+def test_seen_forgets_the_oldest_keys():
+
+	#
+	deduplicator = PacketDeduplicator(2)
+	assert not deduplicator.seen('a')
+	assert not deduplicator.seen('b')
+	assert deduplicator.seen('a')
+
+	#
+	assert not deduplicator.seen('c')
+	assert not deduplicator.seen('a')
+
+# Through the helper: a rebroadcast packet is dropped before it's decoded, and a late one is cached in its place and counted.
+def test_duplicate_and_late_packets():
+
+	#
+	metrics = TempestWeatherHelper.get_metrics()
+	duplicates, reordered = metrics['suppressed']['duplicate_packets'], metrics['reordered_observations']
+
+	#
+	for minute in (0, 1, 3, 3, 2): TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH + minute * 60), separators = (',', ':')))
+
+	#
+	metrics = TempestWeatherHelper.get_metrics()
+	assert metrics['suppressed']['duplicate_packets'] == duplicates + 1
+	assert metrics['reordered_observations'] == reordered + 1
+
+	#
+	assert [row['last_updated_epoch'] for row in TempestWeatherHelper.get_all_for_json(SERIAL_NUMBER)] == [START_EPOCH + minute * 60 for minute in range(4)]
+	assert TempestWeatherHelper.get_observation(SERIAL_NUMBER).last_updated_epoch == START_EPOCH + 3 * 60
@@ -0,0 +1,66 @@
+#
+import random
+
+#
+import pytest
+
+#
+import tempest_weather_helper
+
+#
+from conftest import START_EPOCH
+from tempest_weather_helper import DerivedFieldEngine, RainfallIntensity, UltravioletExposureCategory, WindGust
+
+# Rows as a hub might send them: whole numbers as ints, two-decimal floats (plenty of them ties once converted), missing values, and values sitting on every threshold the descriptions are classified by.
+def rows():
+
+	#
+	random_generator = random.Random(50222)
+	rain = [member.b_mm_per_minute for member in RainfallIntensity if member.b_mm_per_minute is not None]
+	uv = [member.b_index for member in UltravioletExposureCategory if member.b_index is not None]
+	gusts = [member.b_mph / DerivedFieldEngine.MPH_PER_METERS_PER_SECOND for member in WindGust if member.b_mph is not None]
+
+	#
+	def value(choices):
+		pick = random_generator.random()
+		return None if pick < 0.05 else random_generator.choice(choices) if pick < 0.3 else random_generator.randrange(40) if pick < 0.5 else round(random_generator.uniform(0, 40), 2)
+
+	#
+	result = []
+	for minute in range(2000):
+		result.append([START_EPOCH + minute * 60, value([0, 0.5]), value([1, 2.25]), value(gusts + [0]), random_generator.randrange(360), 3, value([1013, 1013.25, 987.65]), value([-4, 0, 21.5]), value([55, 55.5]), value([0, 30000]), value(uv + [0]), value([0, 300]), value(rain + [0]), random_generator.choice([0, 1, 2, None]), value([0, 12]), value([0, 1, 3]), 2.7, 1])
+
+	#
+	return result
+
+# The same columns, value for value and type for type.
+def assert_identical(a, b):
+
+	#
+	assert list(a) == list(b)
+
+	#
+	for key in a:
+		assert a[key] == b[key], key
+		assert [type(value) for value in a[key]] == [type(value) for value in b[key]], key
+
+# With NumPy, derive_batch() vectorizes; without it, it works a column at a time in plain Python. Both give exactly what derive() gives a row at a time, ints included.
+def test_numpy_and_python_paths_agree(monkeypatch):
+
+	#
+	pytest.importorskip('numpy')
+
+	#
+	obs_rows = rows()
+	vectorized = DerivedFieldEngine.derive_batch(obs_rows)
+
+	#
+	monkeypatch.setattr(tempest_weather_helper, 'numpy', None)
+	plain = DerivedFieldEngine.derive_batch(obs_rows)
+
+	#
+	assert_identical(vectorized, plain)
+
+	# And both match derive(), row by row.
+	single = [DerivedFieldEngine.derive(obs) for obs in obs_rows]
+	assert_identical(vectorized, {key: [values[key] for values in single] for key in vectorized})
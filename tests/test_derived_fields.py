@@ -0,0 +1,109 @@
+#
+from conftest import START_EPOCH, obs_row, obs_st_packet
+from tempest_weather_helper import DerivedFieldGraph, Forecaster, Station, TempestWeatherHelper
+
+# A graph whose stages count their calls: an eager stage on top of a lazy one, and a lazy one of its own.
+def counting_graph(calls):
+
+	#
+	def counted(name, function):
+
+		#
+		def stage(*inputs):
+			calls[name] = calls.get(name, 0) + 1
+			return function(*inputs)
+
+		#
+		return stage
+
+	#
+	return DerivedFieldGraph([
+		('temperature_k', ('temperature_c',), counted('temperature_k', lambda temperature_c: temperature_c + 273.15), True),
+		('above_freezing', ('temperature_k',), counted('above_freezing', lambda temperature_k: temperature_k > 273.15), False),
+		('wind_lull_mph', ('obs_wind_lull',), counted('wind_lull_mph', lambda wind_lull: round(wind_lull * 2.23694, 1)), True),
+	])
+
+#
+def observe(station, graph, minute, temperature_c = 22):
+
+	#
+	obs = obs_row(START_EPOCH + minute * 60, temperature_c = temperature_c)
+	station.cache_observation(station.derive(obs))
+	station.update_derived_fields(graph, obs)
+
+	#
+	return obs
+
+# Lazy stages only run when they're read, or when an eager stage needs them; each runs at most once per observation, and again only once its inputs change.
+def test_lazy_stages_and_memoization():
+
+	#
+	calls = {}
+	graph = counting_graph(calls)
+	station = Station('ST-00000512', rollup_tiers = ())
+
+	# The eager stage pulls in the lazy one it needs, but not the other.
+	observe(station, graph, 0)
+	assert calls == {'temperature_k': 1, 'above_freezing': 1}
+
+	#
+	assert station.get_derived_fields(graph) == {'temperature_k': 295.15, 'above_freezing': True, 'wind_lull_mph': 0.2}
+	assert station.get_derived_fields(graph, ['wind_lull_mph']) == {'wind_lull_mph': 0.2}
+	assert calls == {'temperature_k': 1, 'above_freezing': 1, 'wind_lull_mph': 1}
+
+	# A new observation with the same inputs runs nothing.
+	observe(station, graph, 1)
+	station.get_derived_fields(graph)
+	assert calls == {'temperature_k': 1, 'above_freezing': 1, 'wind_lull_mph': 1}
+
+	# A changed input reruns only what depends on it.
+	observe(station, graph, 2, temperature_c = -5)
+	assert station.get_derived_fields(graph) == {'temperature_k': 268.15, 'above_freezing': False, 'wind_lull_mph': 0.2}
+	assert calls == {'temperature_k': 2, 'above_freezing': 2, 'wind_lull_mph': 1}
+
+# A stage that raises is None for that observation, and counted each time it's called and raises.
+def test_failures_are_counted():
+
+	#
+	graph = DerivedFieldGraph([('ratio', ('temperature_c', 'uv_index'), lambda temperature_c, uv_index: temperature_c / uv_index, False)])
+	station = Station('ST-00000512', rollup_tiers = ())
+
+	#
+	for minute, uv_index in enumerate((0, 0, 2, 0)):
+		obs = obs_row(START_EPOCH + minute * 60, uv_index = uv_index)
+		station.cache_observation(station.derive(obs))
+		station.update_derived_fields(graph, obs)
+
+	# The second zero had the same inputs, so the stage wasn't called again.
+	assert graph.errors == {'ratio': 2}
+	assert station.get_derived_fields(graph) == {'ratio': None}
+
+	# Registered on the helper, failures show up in get_metrics().
+	before = TempestWeatherHelper.get_metrics()['derived_field_errors'].get('always_fails', 0)
+	TempestWeatherHelper.register_derived_field('always_fails', ('obs_wind_lull',), lambda wind_lull: 1 / 0)
+
+	#
+	try:
+		TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH), serial_number = 'ST-00001101'))
+		assert TempestWeatherHelper.get_metrics()['derived_field_errors']['always_fails'] == before + 1
+		assert 'tempest_weather_helper_derived_field_errors_total{field="always_fails"}' in TempestWeatherHelper.get_metrics_prometheus()
+	finally:
+		TempestWeatherHelper.unregister_derived_field('always_fails')
+
+# Observations ingested in bulk have no obs row and weren't evaluated as they were cached; the first read works out their fields, and forecast, from the observation alone.
+def test_bulk_ingested_observations():
+
+	#
+	graph = DerivedFieldGraph([('temperature_k', ('temperature_c',), lambda temperature_c: temperature_c + 273.15, False), ('wind_lull', ('obs_wind_lull',), lambda wind_lull: wind_lull, True)])
+	forecaster = Forecaster()
+	station = Station('ST-00000512', rollup_tiers = ())
+
+	#
+	obs = observe(station, graph, 0)
+	station.update_forecast(forecaster, obs)
+	assert station.get_derived_fields(graph) == {'temperature_k': 295.15, 'wind_lull': 0.1}
+
+	#
+	station.ingest([obs_row(START_EPOCH + minute * 60, temperature_c = 5) for minute in range(1, 5)])
+	assert station.get_derived_fields(graph) == {'temperature_k': 278.15, 'wind_lull': None}
+	assert station.get_forecast(forecaster)['last_updated_epoch'] == START_EPOCH + 4 * 60
@@ -0,0 +1,76 @@
+#
+import json
+import random
+
+#
+import pytest
+
+#
+from conftest import START_EPOCH
+from synthetic import BASE_PRESSURE_MB, CURVE_MINUTES, obs_st, pressure_at
+from tempest_weather_helper import Forecast, Forecaster, PressureTrend, PressureTrendAdvanced, Station
+
+# Three-hour scenarios, as (pressure curve, how many times taller than in synthetic.py, wind direction in degrees, average wind speed in m/s, raining, southern hemisphere), with the forecast each ends on, as (forecast, pressure tendency, wind direction, strong wind).
+# The curves in synthetic.py change by 4 mb over three hours, which is falling (or rising) slowly; doubled, it's rapidly. A curve that has turned moves the tendency a step that way.
+SCENARIOS = (
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 1, 90, 4, False, False), (Forecast.PRECIPITATION_LIKELY, PressureTrend.FALLING_SLOWLY, 'E', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 1, 225, 4, False, False), (Forecast.UNSETTLED, PressureTrend.FALLING_SLOWLY, 'SW', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 1, 270, 4, False, False), (Forecast.BECOMING_UNSETTLED, PressureTrend.FALLING_SLOWLY, 'W', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 1, 90, 4, True, False), (Forecast.PRECIPITATION_CONTINUING, PressureTrend.FALLING_SLOWLY, 'E', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 1, 270, 10, False, False), (Forecast.STORMY, PressureTrend.FALLING_SLOWLY, 'W', True)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 2, 135, 4, False, False), (Forecast.STORMY, PressureTrend.FALLING_RAPIDLY, 'SE', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 2, 315, 4, False, False), (Forecast.PRECIPITATION_LIKELY, PressureTrend.FALLING_RAPIDLY, 'NW', False)),
+	((PressureTrendAdvanced.STEADY, 1, 315, 4, False, False), (Forecast.SETTLED, PressureTrend.STEADY, 'NW', False)),
+	((PressureTrendAdvanced.STEADY, 1, 90, 4, False, False), (Forecast.BECOMING_UNSETTLED, PressureTrend.STEADY, 'E', False)),
+	((PressureTrendAdvanced.STEADY, 1, 180, 4, False, False), (Forecast.FAIR, PressureTrend.STEADY, 'S', False)),
+	((PressureTrendAdvanced.STEADY, 1, 90, 0.2, False, False), (Forecast.SETTLED, PressureTrend.STEADY, 'CALM', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_RISING, 1, 315, 4, False, False), (Forecast.FAIR, PressureTrend.RISING_SLOWLY, 'NW', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_RISING, 1, 225, 4, True, False), (Forecast.CLEARING, PressureTrend.RISING_SLOWLY, 'SW', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_RISING, 2, 270, 4, False, False), (Forecast.CLEARING_AND_WINDY, PressureTrend.RISING_RAPIDLY, 'W', False)),
+	((PressureTrendAdvanced.RISING_THEN_STEADY, 1, 90, 4, False, False), (Forecast.BECOMING_UNSETTLED, PressureTrend.STEADY, 'E', False)),
+	((PressureTrendAdvanced.FALLING_THEN_STEADY, 1, 225, 4, False, False), (Forecast.FAIR, PressureTrend.STEADY, 'SW', False)),
+	((PressureTrendAdvanced.STEADY_THEN_FALLING, 1, 0, 4, False, False), (Forecast.BECOMING_UNSETTLED, PressureTrend.FALLING_SLOWLY, 'N', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 1, 180, 4, False, True), (Forecast.BECOMING_UNSETTLED, PressureTrend.FALLING_SLOWLY, 'S', False)),
+	((PressureTrendAdvanced.CONTINUOUSLY_FALLING, 1, 0, 4, False, True), (Forecast.UNSETTLED, PressureTrend.FALLING_SLOWLY, 'N', False)),
+)
+
+# Feeds one scenario through a fresh Station a minute at a time, forecasting after every observation as handle_observation() does, and returns the last forecast.
+def replay(curve, scale, wind_direction_degrees, wind_average_meters_per_second, raining, southern_hemisphere, seed):
+
+	#
+	random_generator = random.Random(seed)
+	station = Station('ST-00000512', rollup_tiers = ())
+	forecaster = Forecaster(southern_hemisphere)
+	forecast = None
+
+	#
+	for minute in range(CURVE_MINUTES + 1):
+
+		#
+		pressure_mb = round(BASE_PRESSURE_MB + scale * (pressure_at(curve, minute) - BASE_PRESSURE_MB), 2)
+		obs = json.loads(obs_st(START_EPOCH + minute * 60, pressure_mb, random_generator, wind_average_meters_per_second = wind_average_meters_per_second, wind_direction_degrees = wind_direction_degrees, raining = raining))['obs'][0]
+
+		#
+		station.cache_observation(station.derive(obs))
+		forecast = station.update_forecast(forecaster, obs)
+
+	#
+	return forecast
+
+# Every scenario is seeded by its place in the corpus, so each replay is deterministic.
+@pytest.mark.parametrize('seed', range(len(SCENARIOS)))
+def test_scenario(seed):
+
+	#
+	(curve, scale, wind_direction_degrees, wind_average_meters_per_second, raining, southern_hemisphere), (forecast, tendency, wind_direction, strong_wind) = SCENARIOS[seed]
+
+	#
+	assert replay(curve, scale, wind_direction_degrees, wind_average_meters_per_second, raining, southern_hemisphere, seed) == {
+		'last_updated_epoch': START_EPOCH + CURVE_MINUTES * 60,
+		'forecast': forecast.name.replace('_', ' '),
+		'pressure_tendency': tendency.name.replace('_', ' '),
+		'wind_direction': wind_direction,
+		'wind_average_miles_per_hour': round(wind_average_meters_per_second * 2.23694, 1),
+		'precipitation_detected': raining,
+		'strong_wind': strong_wind,
+	}
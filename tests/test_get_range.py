@@ -0,0 +1,100 @@
+#
+import pytest
+
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import Station
+
+# Ten minutes a minute apart, with the temperature going up a degree a minute, alternating between an int and a float.
+def station_with_ten_minutes(capacity = 720):
+
+	#
+	station = Station('ST-00000512', capacity = capacity, rollup_tiers = ())
+	for minute in range(10):
+		station.cache_observation(station.derive(obs_row(START_EPOCH + minute * 60, temperature_c = 20 + minute if minute % 2 == 0 else 20.5 + minute)))
+
+	#
+	return station
+
+#
+def epochs_of(rows):
+	return [row['last_updated_epoch'] for row in rows]
+
+# Both ends are inclusive, either may be left open, and every row is what get_all_for_json() has for it.
+def test_bounds():
+
+	#
+	station = station_with_ten_minutes()
+
+	#
+	assert station.get_range() == station.get_all_for_json()
+	assert epochs_of(station.get_range(START_EPOCH + 120, START_EPOCH + 300)) == [START_EPOCH + minute * 60 for minute in range(2, 6)]
+	assert epochs_of(station.get_range(START_EPOCH + 121, START_EPOCH + 299)) == [START_EPOCH + minute * 60 for minute in range(3, 5)]
+	assert epochs_of(station.get_range(start_epoch = START_EPOCH + 480)) == [START_EPOCH + 480, START_EPOCH + 540]
+	assert epochs_of(station.get_range(end_epoch = START_EPOCH + 60)) == [START_EPOCH, START_EPOCH + 60]
+	assert station.get_range(START_EPOCH + 120, START_EPOCH + 120, ['temperature_c', 'uv_index']) == [{'temperature_c': 22, 'uv_index': 3}]
+
+# A window with nothing in it, before, between or after the cache, is empty, bucketed or not.
+@pytest.mark.parametrize('bucket_seconds', [None, 60, 3600])
+def test_empty_windows(bucket_seconds):
+
+	#
+	station = station_with_ten_minutes()
+
+	#
+	assert station.get_range(START_EPOCH - 600, START_EPOCH - 1, bucket_seconds = bucket_seconds) == []
+	assert station.get_range(START_EPOCH + 61, START_EPOCH + 119, bucket_seconds = bucket_seconds) == []
+	assert station.get_range(start_epoch = START_EPOCH + 541, bucket_seconds = bucket_seconds) == []
+	assert Station('ST-00000512', rollup_tiers = ()).get_range(bucket_seconds = bucket_seconds) == []
+
+# Buckets are aligned to multiples of bucket_seconds, numbers are reduced to min, max, mean and last (keeping the hub's ints), and everything else reports its last value.
+def test_buckets():
+
+	#
+	station = station_with_ten_minutes()
+	aligned = START_EPOCH // 300 * 300
+
+	#
+	buckets = station.get_range(fields = ['temperature_c', 'pressure_trend_one_hour_description', 'last_updated_iso_8601'], bucket_seconds = 300)
+	rows = station.get_all_for_json()
+
+	#
+	assert [bucket['bucket_start_epoch'] for bucket in buckets] == sorted({row['last_updated_epoch'] // 300 * 300 for row in rows})
+	assert buckets[0]['bucket_start_epoch'] == aligned
+	assert sum(bucket['count'] for bucket in buckets) == 10
+
+	#
+	for bucket in buckets:
+
+		#
+		members = [row for row in rows if bucket['bucket_start_epoch'] <= row['last_updated_epoch'] < bucket['bucket_start_epoch'] + 300]
+		temperatures = [row['temperature_c'] for row in members]
+
+		#
+		assert bucket['count'] == len(members)
+		assert bucket['temperature_c'] == {'min': temperatures[0], 'max': temperatures[-1], 'mean': pytest.approx(sum(temperatures) / len(temperatures)), 'last': temperatures[-1]}
+		assert type(bucket['temperature_c']['min']) is type(temperatures[0]) and type(bucket['temperature_c']['last']) is type(temperatures[-1])
+		assert bucket['pressure_trend_one_hour_description'] == {'last': members[-1]['pressure_trend_one_hour_description']}
+		assert bucket['last_updated_iso_8601'] == {'last': members[-1]['last_updated_iso_8601']}
+
+# Once the ring has wrapped, ranges still come back oldest first, across the wrap.
+def test_range_across_the_wrap():
+
+	#
+	station = station_with_ten_minutes(capacity = 7)
+
+	#
+	assert epochs_of(station.get_range()) == [START_EPOCH + minute * 60 for minute in range(3, 10)]
+	assert epochs_of(station.get_range(START_EPOCH + 300, START_EPOCH + 480)) == [START_EPOCH + minute * 60 for minute in range(5, 9)]
+	assert [bucket['count'] for bucket in station.get_range(bucket_seconds = 120)] == [len([minute for minute in range(3, 10) if (START_EPOCH + minute * 60) // 120 == epoch]) for epoch in sorted({(START_EPOCH + minute * 60) // 120 for minute in range(3, 10)})]
+
+# Missing values are left out of the reductions, and a bucket with none at all reports None throughout.
+def test_buckets_skip_missing_values():
+
+	#
+	station = Station('ST-00000512', rollup_tiers = ())
+	for minute, temperature_c in enumerate([None, 21, None, 23.5]): station.cache_observation(station.derive(obs_row(START_EPOCH // 3600 * 3600 + minute * 60, temperature_c = temperature_c)))
+
+	#
+	assert station.get_range(fields = ['temperature_c'], bucket_seconds = 3600)[0]['temperature_c'] == {'min': 21, 'max': 23.5, 'mean': 22.25, 'last': 23.5}
+	assert station.get_range(end_epoch = START_EPOCH // 3600 * 3600, fields = ['temperature_c'], bucket_seconds = 60)[0]['temperature_c'] == {'min': None, 'max': None, 'mean': None, 'last': None}
@@ -0,0 +1,92 @@
+#
+import time
+
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import Station
+
+#
+def cache(station, epoch):
+	return station.cache_observation(station.derive(obs_row(epoch)))
+
+#
+def epochs_of(response):
+	return [row['last_updated_epoch'] for row in response['observations']]
+
+# Each call returns only what's new since the cursor from the call before.
+def test_only_new_observations():
+
+	#
+	station = Station('ST-00000512', capacity = 10, rollup_tiers = ())
+	for minute in range(3): cache(station, START_EPOCH + minute * 60)
+
+	#
+	response = station.get_since(0)
+	assert not response['resync'] and len(response['observations']) == 3
+
+	#
+	cache(station, START_EPOCH + 180)
+	response = station.get_since(response['cursor'])
+	assert not response['resync'] and epochs_of(response) == [START_EPOCH + 180]
+
+	#
+	assert station.get_since(response['cursor'])['observations'] == []
+
+# A cursor that has fallen off the cache, one from the future, and one from before a late observation was put in its place all get the whole cache back.
+def test_resync():
+
+	#
+	station = Station('ST-00000512', capacity = 5, rollup_tiers = ())
+	for minute in (0, 1, 2, 4): cache(station, START_EPOCH + minute * 60)
+	cursor = station.get_since(0)['cursor']
+
+	#
+	for minute in range(5, 12): cache(station, START_EPOCH + minute * 60)
+	assert station.get_since(cursor)['resync']
+	assert station.get_since(10 ** 9)['resync']
+
+	#
+	station = Station('ST-00000512', capacity = 10, rollup_tiers = ())
+	for minute in (0, 1, 2, 4): cache(station, START_EPOCH + minute * 60)
+	cursor = station.get_since(0)['cursor']
+
+	#
+	assert cache(station, START_EPOCH + 3 * 60)
+	response = station.get_since(cursor)
+	assert response['resync'] and epochs_of(response) == [START_EPOCH + minute * 60 for minute in range(5)]
+
+	# The cursor that came back with the resync is current.
+	assert station.get_since(response['cursor']) == {'cursor': response['cursor'], 'resync': False, 'observations': []}
+
+# After a restart, a cursor that had seen everything carries on; any other gets a resync rather than the wrong observations.
+def test_cursors_across_a_restart(tmp_path):
+
+	#
+	path = str(tmp_path / 'station.twhlog')
+	newest_epoch = int(time.time()) // 60 * 60
+	epochs = [newest_epoch - (19 - index) * 60 for index in range(20)]
+
+	#
+	station = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+	station.open_log(path)
+	for epoch in epochs[:10]: cache(station, epoch)
+	behind = station.get_since(0)['cursor']
+	for epoch in epochs[10:19]: cache(station, epoch)
+	current = station.get_since(behind)['cursor']
+	station.close_log()
+
+	#
+	restarted = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+	assert restarted.open_log(path) == 19
+
+	#
+	assert restarted.get_since(current) == {'cursor': current, 'resync': False, 'observations': []}
+
+	#
+	response = restarted.get_since(behind)
+	assert response['resync'] and epochs_of(response) == epochs[:19]
+
+	# New observations carry on from the same numbering.
+	cache(restarted, epochs[19])
+	assert epochs_of(restarted.get_since(current)) == [epochs[19]]
+	restarted.close_log()
@@ -0,0 +1,121 @@
+#
+import gzip
+import http.client
+import json
+
+#
+import pytest
+
+#
+from conftest import START_EPOCH, obs_row, obs_st_packet
+from tempest_weather_helper import TempestHTTPRequestHandler, TempestWeatherHelper, start_http_server
+
+#
+@pytest.fixture
+def connection():
+
+	#
+	server = start_http_server('127.0.0.1', 0)
+	connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout = 5)
+
+	#
+	yield connection
+
+	#
+	connection.close()
+	server.shutdown()
+	server.server_close()
+
+#
+def get(connection, path, **headers):
+
+	#
+	connection.request('GET', path, headers = headers)
+	response = connection.getresponse()
+
+	#
+	return response, response.read()
+
+# Each test has a station of its own, so other tests' packets don't move its generation.
+def cache(serial_number, minute):
+	TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH + minute * 60), serial_number = serial_number))
+
+# A plain GET gets the body as get_json() or get_all_json() would, with an ETag carrying this process's boot id.
+def test_ok(connection):
+
+	#
+	serial_number = 'ST-00000801'
+
+	#
+	cache(serial_number, 0)
+	cache(serial_number, 1)
+
+	#
+	response, body = get(connection, '/latest?station=' + serial_number)
+	assert response.status == 200 and body == TempestWeatherHelper.get_json(serial_number)
+	assert response.getheader('Content-Type') == 'application/json' and response.getheader('Content-Encoding') is None
+	assert TempestHTTPRequestHandler.boot_id in response.getheader('ETag')
+
+	#
+	response, body = get(connection, '/history?station=' + serial_number)
+	assert response.status == 200 and json.loads(body) == TempestWeatherHelper.get_all_for_json(serial_number)
+
+	#
+	response, body = get(connection, '/latest?station=ST-00000000')
+	assert response.status == 404
+
+# Polling with the ETag gets a bodiless 304 until there's a new observation, and one from another process's boot never matches.
+def test_not_modified(connection):
+
+	#
+	serial_number = 'ST-00000802'
+
+	#
+	cache(serial_number, 0)
+	response, body = get(connection, '/history?station=' + serial_number)
+	etag = response.getheader('ETag')
+
+	#
+	response, body = get(connection, '/history?station=' + serial_number, **{'If-None-Match': etag})
+	assert response.status == 304 and body == b'' and response.getheader('ETag') == etag
+	assert response.getheader('Content-Encoding') is None and response.getheader('Content-Length') is None
+
+	#
+	response, body = get(connection, '/history?station=' + serial_number, **{'If-None-Match': 'W/' + etag})
+	assert response.status == 304
+
+	#
+	response, body = get(connection, '/history?station=' + serial_number, **{'If-None-Match': etag.replace(TempestHTTPRequestHandler.boot_id, 'restarted')})
+	assert response.status == 200
+
+	#
+	cache(serial_number, 1)
+	response, body = get(connection, '/history?station=' + serial_number, **{'If-None-Match': etag})
+	assert response.status == 200 and response.getheader('ETag') != etag
+
+# Clients that accept gzip get it, under an ETag of its own; gzip;q=0 is a refusal.
+def test_gzip(connection):
+
+	#
+	serial_number = 'ST-00000803'
+
+	#
+	for minute in range(10): cache(serial_number, minute)
+	path = '/history?station=' + serial_number
+
+	#
+	response, body = get(connection, path, **{'Accept-Encoding': 'gzip, deflate'})
+	gzip_etag = response.getheader('ETag')
+	assert response.status == 200 and response.getheader('Content-Encoding') == 'gzip' and response.getheader('Vary') == 'Accept-Encoding'
+	assert gzip.decompress(body) == TempestWeatherHelper.get_all_json(serial_number)
+
+	#
+	response, body = get(connection, path, **{'Accept-Encoding': 'gzip;q=0'})
+	assert response.getheader('Content-Encoding') is None and body == TempestWeatherHelper.get_all_json(serial_number)
+	assert response.getheader('ETag') != gzip_etag
+
+	# The gzipped tag revalidates the gzipped body only.
+	response, body = get(connection, path, **{'Accept-Encoding': 'gzip', 'If-None-Match': gzip_etag})
+	assert response.status == 304 and response.getheader('Content-Encoding') is None
+	response, body = get(connection, path, **{'If-None-Match': gzip_etag})
+	assert response.status == 200
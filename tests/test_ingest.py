@@ -0,0 +1,42 @@
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import STANDARD_ROLLUP_TIERS, Station
+
+# Rows with a falling pressure, a gap, a missing pressure and an off-minute epoch, so the batch path sees what live ingest does.
+def rows(count):
+
+	#
+	result = []
+	for minute in range(count):
+		if 1000 <= minute < 1030: continue
+		result.append(obs_row(START_EPOCH + minute * 60 + (7 if minute == 500 else 0), pressure_mb = None if minute % 97 == 0 else round(1013.0 - minute * 0.003, 2), temperature_c = minute % 30))
+	return result
+
+# Bulk ingest, split across batches, caches exactly what a packet at a time would, down to the JSON, the generation and the rollups.
+def test_ingest_matches_live():
+
+	#
+	live = Station('ST-00000512', rollup_tiers = STANDARD_ROLLUP_TIERS)
+	for obs in rows(1500):
+		live.cache_observation(live.derive(obs))
+
+	#
+	bulk = Station('ST-00000512', rollup_tiers = STANDARD_ROLLUP_TIERS)
+	assert bulk.ingest(rows(1500), batch_size = 333) == len(rows(1500))
+
+	#
+	assert bulk.get_all_json() == live.get_all_json()
+	assert bulk.get_json() == live.get_json()
+	assert bulk.get_generation() == live.get_generation()
+	assert bulk.get_range(bucket_seconds = 600) == live.get_range(bucket_seconds = 600)
+	assert bulk.get_range(bucket_seconds = 3600) == live.get_range(bucket_seconds = 3600)
+
+# Rows the station already has are skipped.
+def test_ingest_skips_cached_rows():
+
+	#
+	station = Station('ST-00000512')
+	station.ingest(rows(100))
+
+	#
+	assert station.ingest(rows(100)[-10:]) == 0
@@ -0,0 +1,77 @@
+#
+import threading
+import time
+
+#
+from tempest_weather_helper import IngestQueue, OverflowPolicy
+
+#
+def fill(queue, items):
+
+	#
+	queue.put_many(items[:-1])
+	queue.put(items[-1])
+
+# A full queue drops the oldest it holds to make room, and counts it.
+def test_drop_oldest():
+
+	#
+	queue = IngestQueue(3, OverflowPolicy.DROP_OLDEST)
+	fill(queue, list(range(5)))
+
+	#
+	assert (queue.received, queue.dropped, len(queue)) == (5, 2, 3)
+	assert queue.get_batch(10) == [2, 3, 4]
+
+# A full queue drops what's arriving, and counts it.
+def test_drop_newest():
+
+	#
+	queue = IngestQueue(3, OverflowPolicy.DROP_NEWEST)
+	fill(queue, list(range(5)))
+
+	#
+	assert (queue.received, queue.dropped, len(queue)) == (5, 2, 3)
+	assert queue.get_batch(10) == [0, 1, 2]
+
+# A full queue holds up the receiver until the processing stage makes room, and drops nothing.
+def test_block():
+
+	#
+	queue = IngestQueue(3, OverflowPolicy.BLOCK)
+	queue.put_many([0, 1, 2])
+
+	#
+	receiver = threading.Thread(target = queue.put_many, args = ([3, 4, 5, 6],))
+	receiver.start()
+
+	# Still waiting for room.
+	time.sleep(0.05)
+	assert receiver.is_alive() and len(queue) == 3
+
+	#
+	processed = []
+	while len(processed) < 7: processed.extend(queue.get_batch(2, timeout = 1))
+
+	#
+	receiver.join(1)
+	assert not receiver.is_alive()
+	assert processed == list(range(7))
+	assert (queue.received, queue.dropped, len(queue)) == (7, 0, 0)
+
+# Batches are taken oldest first, at most maximum at a time, and an empty queue gives an empty batch after the timeout.
+def test_get_batch():
+
+	#
+	queue = IngestQueue(10)
+	queue.put_many(range(5))
+
+	#
+	assert queue.get_batch(2) == [0, 1]
+	assert queue.get_batch(10) == [2, 3, 4]
+	assert queue.get_batch(10, timeout = 0.01) == []
+
+	# A waiting get_batch() wakes for a put from another thread.
+	threading.Timer(0.02, queue.put, args = ('late',)).start()
+	assert queue.get_batch(10, timeout = 1) == ['late']
+	assert (queue.received, queue.dropped) == (6, 0)
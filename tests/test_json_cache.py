@@ -0,0 +1,125 @@
+#
+import json
+
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import Station
+
+# An obs row with some rain, and a temperature that's a whole number every other minute.
+def rainy_row(minute):
+
+	#
+	obs = obs_row(START_EPOCH + minute * 60, pressure_mb = 1013.25 - minute * 0.05, temperature_c = 22 if minute % 2 else 21.5)
+	obs[12] = 0.03 * (minute % 3)
+
+	#
+	return obs
+
+#
+def encoded(values):
+	return json.dumps(values, allow_nan = False, separators = (',', ':')).encode('utf-8')
+
+# The history and the latest observation, as served, match what the cached Observations would give.
+def assert_matches(station, observations):
+
+	#
+	expected = [observation.for_json() for observation in observations]
+
+	#
+	assert station.get_all_for_json() == expected
+	assert station.get_all_json() == encoded(expected)
+	assert station.get_json() == encoded(expected[-1])
+	assert station.get_since(0)['observations'] == expected
+
+	# Including every int that came in as one.
+	for row, observation in zip(station.get_all_for_json(), expected):
+		assert [type(value) for value in row.values()] == [type(value) for value in observation.values()]
+
+# Live observations, including once the cache has wrapped.
+def test_live():
+
+	#
+	station = Station('ST-00000512', capacity = 8, rollup_tiers = ())
+	observations = []
+
+	#
+	for minute in range(12):
+
+		#
+		observation = station.derive(rainy_row(minute))
+		station.cache_observation(observation)
+		observations.append(observation)
+
+		#
+		assert_matches(station, observations[-8:])
+
+# A late observation is put in its place, and the history response is rebuilt.
+def test_late_insert():
+
+	#
+	station = Station('ST-00000512', capacity = 10, rollup_tiers = ())
+	observations = {}
+
+	#
+	for minute in (0, 1, 2, 4, 5):
+		observations[minute] = station.derive(rainy_row(minute))
+		station.cache_observation(observations[minute])
+
+	#
+	before = station.get_all_json()
+	observations[3] = station.derive(rainy_row(3))
+	assert station.cache_observation(observations[3])
+
+	#
+	assert station.get_all_json() != before
+	assert_matches(station, [observations[minute] for minute in sorted(observations)])
+
+	# The latest is still the newest, not the late one.
+	assert station.get_json() == encoded(observations[5].for_json())
+
+# Ingested rows, in more than one batch, match the same rows cached one at a time.
+def test_ingest():
+
+	#
+	live = Station('ST-00000512', capacity = 20, rollup_tiers = ())
+	observations = []
+
+	#
+	for minute in range(30):
+		observations.append(live.derive(rainy_row(minute)))
+		live.cache_observation(observations[-1])
+
+	#
+	bulk = Station('ST-00000512', capacity = 20, rollup_tiers = ())
+	assert bulk.ingest([rainy_row(minute) for minute in range(30)], batch_size = 7) == 30
+
+	#
+	assert_matches(bulk, observations[-20:])
+	assert bulk.get_all_json() == live.get_all_json()
+
+# Observations cached in bulk match too.
+def test_cache_observations():
+
+	#
+	source = Station('ST-00000512', capacity = 20, rollup_tiers = ())
+	observations = [source.derive(rainy_row(minute)) for minute in range(6)]
+
+	#
+	station = Station('ST-00000512', capacity = 4, rollup_tiers = ())
+	assert station.cache_observations(observations) == 6
+	assert_matches(station, observations[-4:])
+
+# The history response is only built again once there's something new.
+def test_built_once_per_generation():
+
+	#
+	station = Station('ST-00000512', capacity = 10, rollup_tiers = ())
+	for minute in range(3): station.cache_observation(station.derive(rainy_row(minute)))
+
+	#
+	response = station.get_all_json()
+	assert station.get_all_json() is response
+
+	#
+	station.cache_observation(station.derive(rainy_row(3)))
+	assert station.get_all_json() is not response
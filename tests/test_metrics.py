@@ -0,0 +1,90 @@
+#
+import re
+
+#
+from conftest import START_EPOCH, obs_row, obs_st_packet
+from tempest_weather_helper import TempestWeatherHelper
+
+# The Prometheus text format: a sample line, and one label in it (a value is quoted, with backslash, double quote and newline escaped).
+SAMPLE = re.compile(r'^(tempest_weather_helper_[a-z_]+)(?:\{((?:[a-z_]+="(?:[^"\\\n]|\\[\\"n])*",?)*)\})? (\S+)$')
+LABEL = re.compile(r'([a-z_]+)="((?:[^"\\\n]|\\[\\"n])*)"')
+
+#
+def unescape(value):
+	return re.sub(r'\\([\\"n])', lambda match: '\n' if match.group(1) == 'n' else match.group(1), value)
+
+# Parses the exposition into {family: (type, help, [(name, labels, value)])}, checking the layout as it goes.
+def parse(text):
+
+	#
+	assert text.endswith('\n')
+	families = {}
+	family = None
+
+	#
+	for line in text[:-1].split('\n'):
+
+		# Each family opens with its HELP and then its TYPE, once.
+		if line.startswith('# HELP '):
+			family, help_text = line[len('# HELP '):].split(' ', 1)
+			assert family not in families
+			families[family] = [None, help_text, []]
+			continue
+
+		#
+		if line.startswith('# TYPE '):
+			name, kind = line[len('# TYPE '):].split(' ')
+			assert name == family and families[family][0] is None and families[family][2] == []
+			assert kind in ('counter', 'gauge', 'histogram')
+			families[family][0] = kind
+			continue
+
+		# Samples belong to the family above them; a histogram's are its buckets, sum and count.
+		match = SAMPLE.match(line)
+		assert match, line
+		name, label_text, value = match.groups()
+		assert name == family or families[family][0] == 'histogram' and name in (family + '_bucket', family + '_sum', family + '_count'), line
+
+		#
+		float(value)
+		families[family][2].append((name, {key: unescape(label) for key, label in LABEL.findall(label_text or '')}, value))
+
+	#
+	return families
+
+# Every line parses, each family is declared once with HELP and TYPE before its samples, and counters are named _total.
+def test_exposition_format():
+
+	#
+	TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH), serial_number = 'ST-00001201'))
+	families = parse(TempestWeatherHelper.get_metrics_prometheus())
+
+	#
+	for name, (kind, help_text, samples) in families.items():
+		assert help_text
+		assert kind != 'counter' or name.endswith('_total') or name == 'tempest_weather_helper_observation_generation', name
+
+	#
+	assert families['tempest_weather_helper_packets_total'][0] == 'counter'
+	assert families['tempest_weather_helper_seconds_since_last_observation'][0] == 'gauge'
+	assert ('tempest_weather_helper_cached_observations', {'station': 'ST-00001201'}, '1') in families['tempest_weather_helper_cached_observations'][2]
+
+	# Each stage's buckets run up to +Inf, which holds the count.
+	kind, help_text, samples = families['tempest_weather_helper_stage_duration_seconds']
+	assert kind == 'histogram'
+	for stage in {labels['stage'] for name, labels, value in samples}:
+		buckets = [(labels['le'], int(value)) for name, labels, value in samples if name.endswith('_bucket') and labels['stage'] == stage]
+		assert buckets[-1][0] == '+Inf' and [count for le, count in buckets] == sorted(count for le, count in buckets)
+		assert buckets[-1][1] == next(int(value) for name, labels, value in samples if name.endswith('_count') and labels['stage'] == stage)
+
+# A serial number is whatever the packet said it was; quotes, backslashes and newlines in it are escaped, so the exposition still parses and the label reads back as sent.
+def test_station_label_escaping():
+
+	#
+	serial_number = 'ST-00001202 "quoted" back\\slash\nnewline'
+	TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH), serial_number = serial_number))
+	text = TempestWeatherHelper.get_metrics_prometheus()
+
+	#
+	assert 'tempest_weather_helper_cached_observations{station="ST-00001202 \\"quoted\\" back\\\\slash\\nnewline"} 1\n' in text
+	assert {'station': serial_number} in [labels for name, labels, value in parse(text)['tempest_weather_helper_observation_generation'][2]]
@@ -0,0 +1,134 @@
+#
+import time
+
+#
+import pytest
+
+#
+from conftest import obs_row
+from tempest_weather_helper import ObservationLog, Station
+
+# Epochs recent enough to be restored (open_log() skips anything older than the cache would hold), a minute apart.
+def recent_epochs(count, minutes_ago = 0):
+
+	#
+	newest_epoch = (int(time.time()) // 60 - minutes_ago) * 60
+
+	#
+	return [newest_epoch - (count - 1 - index) * 60 for index in range(count)]
+
+# Caches an observation per epoch, in the order given.
+def cache_epochs(station, epochs):
+
+	#
+	for epoch in epochs:
+		station.cache_observation(station.derive(obs_row(epoch, pressure_mb = 1000 + epoch % 7200 / 100)))
+
+# What comes back is byte for byte what was cached, down to the ints the hub sent staying ints.
+def test_round_trip(tmp_path):
+
+	#
+	path = str(tmp_path / 'station.twhlog')
+	station = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+	station.open_log(path)
+	cache_epochs(station, recent_epochs(40))
+	station.close_log()
+
+	#
+	restored = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+
+	#
+	assert restored.open_log(path) == 30
+	assert restored.get_all_json() == station.get_all_json()
+	assert restored.get_json() == station.get_json()
+
+	# Reading it directly, with its own capacity.
+	log = ObservationLog(path, None)
+	assert log.capacity == 30
+	assert [observation.last_updated_epoch for observation in log.read()] == recent_epochs(40)[-30:]
+	log.close()
+
+# Opening a log with a different capacity is refused, and the file is left as it was.
+def test_layout_mismatch_is_refused(tmp_path):
+
+	#
+	path = tmp_path / 'station.twharchive'
+	log = ObservationLog(str(path), 30)
+	for observation in [Station('ST-00000512').derive(obs_row(epoch)) for epoch in recent_epochs(5)]: log.append(observation)
+	log.close()
+
+	#
+	before = path.read_bytes()
+
+	#
+	with pytest.raises(ValueError):
+		ObservationLog(str(path), 60)
+
+	#
+	assert path.read_bytes() == before
+	assert ObservationLog.capacity_of(str(path)) == 30
+
+	# A file that isn't a log at all is refused too.
+	other = tmp_path / 'notes.txt'
+	other.write_bytes(b'not a log')
+	with pytest.raises(ValueError):
+		ObservationLog(str(other), 30)
+	assert other.read_bytes() == b'not a log'
+
+	# An empty file is a new log.
+	empty = tmp_path / 'empty.twhlog'
+	empty.write_bytes(b'')
+	ObservationLog(str(empty), 30).close()
+	assert ObservationLog.capacity_of(str(empty)) == 30
+
+# A station that's already caching live observations when its log is opened keeps them, and the older logged ones are merged in behind them.
+def test_open_log_on_a_station_with_observations(tmp_path):
+
+	#
+	path = str(tmp_path / 'station.twhlog')
+	epochs = recent_epochs(20)
+
+	# The first 15 minutes were logged before a restart...
+	before = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+	before.open_log(path)
+	cache_epochs(before, epochs[:15])
+	before.close_log()
+
+	# ...and the last 5 arrived after it, before the log was opened.
+	station = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+	cache_epochs(station, epochs[15:])
+	latest = station.get_observation()
+
+	#
+	assert station.open_log(path) == 15
+
+	#
+	assert [row['last_updated_epoch'] for row in station.get_all_for_json()] == epochs
+	assert station.get_observation() is latest
+
+	# The live observations have been added to the log.
+	station.close_log()
+	log = ObservationLog(path, None)
+	assert [observation.last_updated_epoch for observation in log.read()] == epochs
+	log.close()
+
+	# Opening it again merges nothing new.
+	assert station.open_log(path) == 0
+	assert [row['last_updated_epoch'] for row in station.get_all_for_json()] == epochs
+	station.close_log()
+
+# Logging in bulk keeps the ints too.
+def test_ingest_round_trip(tmp_path):
+
+	#
+	path = str(tmp_path / 'station.twhlog')
+	station = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+	station.open_log(path)
+	station.ingest([obs_row(epoch, temperature_c = 22 if epoch % 120 else 21.5) for epoch in recent_epochs(40)], batch_size = 16)
+	station.close_log()
+
+	#
+	restored = Station('ST-00000512', capacity = 30, rollup_tiers = ())
+	restored.open_log(path)
+	assert restored.get_all_json() == station.get_all_json()
+	assert b'"temperature_c":22,' in restored.get_all_json()
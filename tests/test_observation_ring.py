@@ -0,0 +1,61 @@
+#
+import json
+
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import ObservationRing, Station
+
+# Numbers the hub sent as ints come back as ints from every way of reading the history, as they did before the history was columnar.
+def test_history_keeps_the_types_the_hub_sent():
+
+	#
+	station = Station('ST-00000512', capacity = 10, rollup_tiers = ())
+	observations = [station.derive(obs_row(START_EPOCH + minute * 60, temperature_c = 22 if minute % 2 else 21.5)) for minute in range(4)]
+	for observation in observations: station.cache_observation(observation)
+
+	#
+	expected = [observation.for_json() for observation in observations]
+
+	#
+	assert json.dumps(station.get_all_for_json()) == json.dumps(expected)
+	assert json.dumps(station.get_since(0)['observations']) == json.dumps(expected)
+	assert [row['temperature_c'] for row in station.get_range(fields = ['temperature_c'])] == [21.5, 22, 21.5, 22]
+	assert type(station.get_range(fields = ['uv_index'])[0]['uv_index']) is int
+
+#
+def epochs_of(ring):
+	return [ring.epoch(index) for index in range(len(ring))]
+
+# A late observation goes into its place, even once the ring has wrapped, and the oldest is still the one dropped when it's full.
+def test_insert_keeps_epoch_order():
+
+	#
+	station = Station('ST-00000512', rollup_tiers = ())
+	observations = {minute: station.derive(obs_row(START_EPOCH + minute * 60)) for minute in range(8)}
+
+	#
+	ring = ObservationRing(4)
+	for minute in (0, 1, 2, 3, 4, 6, 7): ring.append(observations[minute])
+	assert epochs_of(ring) == [START_EPOCH + minute * 60 for minute in (3, 4, 6, 7)]
+
+	#
+	ring.insert(observations[5], 2)
+	assert epochs_of(ring) == [START_EPOCH + minute * 60 for minute in (4, 5, 6, 7)]
+	assert ring.observation(1) == observations[5]
+	assert ring.bisect_epoch(START_EPOCH + 5 * 60) == 1
+
+# Through a station: a duplicate and one older than a full cache are refused, and a late one is cached in its place without becoming the latest.
+def test_station_caches_late_observations_in_order():
+
+	#
+	station = Station('ST-00000512', capacity = 4, rollup_tiers = ())
+	for minute in (0, 1, 3, 4): assert station.cache_observation(station.derive(obs_row(START_EPOCH + minute * 60)))
+
+	#
+	assert not station.cache_observation(station.derive(obs_row(START_EPOCH + 3 * 60)))
+	assert station.cache_observation(station.derive(obs_row(START_EPOCH + 2 * 60)))
+	assert not station.cache_observation(station.derive(obs_row(START_EPOCH)))
+
+	#
+	assert [row['last_updated_epoch'] for row in station.get_all_for_json()] == [START_EPOCH + minute * 60 for minute in (1, 2, 3, 4)]
+	assert station.get_observation().last_updated_epoch == START_EPOCH + 4 * 60
@@ -0,0 +1,89 @@
+#
+import json
+
+#
+import pytest
+
+#
+from tempest_weather_helper import Metrics, PacketDispatcher
+
+#
+def packet(packet_type, **spacing):
+	return json.dumps({'serial_number': 'ST-00001401', 'type': packet_type, 'hub_sn': 'HB-00001401'}, **spacing).encode('utf-8')
+
+# A dispatcher with handlers that note what they were given, and its rapid_wind handler.
+def dispatcher(received, metrics = None):
+
+	#
+	def wind(data):
+		received.append(('wind', data['type']))
+
+	#
+	packet_dispatcher = PacketDispatcher(metrics)
+	packet_dispatcher.register('obs_st', lambda data: received.append(('first', data['type'])))
+	packet_dispatcher.register('obs_st', lambda data: received.append(('second', data['type'])))
+	packet_dispatcher.register('rapid_wind', wind)
+
+	#
+	return packet_dispatcher, wind
+
+# Each packet goes to the handlers of its type, in the order they were registered, whether its type was found by the scan or only once decoded.
+def test_routing_by_type():
+
+	#
+	received = []
+	packet_dispatcher, wind = dispatcher(received)
+
+	#
+	assert packet_dispatcher.dispatch(packet('obs_st', separators = (',', ':')))
+	assert packet_dispatcher.dispatch(packet('rapid_wind', separators = (',', ':')))
+	assert packet_dispatcher.dispatch(packet('obs_st', indent = 2))
+	assert packet_dispatcher.dispatch(b'{"serial_number": "ST-00001401", "type": "rapid\\u005fwind"}')
+
+	#
+	assert received == [('first', 'obs_st'), ('second', 'obs_st'), ('wind', 'rapid_wind'), ('first', 'obs_st'), ('second', 'obs_st'), ('wind', 'rapid_wind')]
+	assert packet_dispatcher.skipped == 0
+
+	# Once unregistered, a handler gets nothing more.
+	packet_dispatcher.unregister('rapid_wind', wind)
+	assert not packet_dispatcher.is_registered('rapid_wind')
+	assert not packet_dispatcher.dispatch(packet('rapid_wind', separators = (',', ':')))
+	assert len(received) == 6
+
+# Packets of a type nobody handles, or with no type at all, are counted by type and dropped; the scan finds the type, so they aren't even decoded.
+def test_unknown_types_are_counted_and_dropped():
+
+	#
+	received = []
+	metrics = Metrics(timing = False)
+	packet_dispatcher, wind = dispatcher(received, metrics)
+
+	#
+	assert not packet_dispatcher.dispatch(packet('hub_status', separators = (',', ':')))
+	assert not packet_dispatcher.dispatch(packet('device_status', indent = 2))
+	assert not packet_dispatcher.dispatch(b'{"serial_number": "ST-00001401"}')
+	assert not packet_dispatcher.dispatch(b'[]')
+
+	# Not JSON past the type, which would raise if it were decoded.
+	assert not packet_dispatcher.dispatch(b'{"type":"evt_strike", not json')
+
+	#
+	assert received == []
+	assert packet_dispatcher.skipped == 5
+	assert metrics.packets == {'hub_status': 1, 'device_status': 1, None: 2, 'evt_strike': 1}
+	assert metrics.decode_errors == 0
+
+# A packet that isn't JSON, and a handler that raises, are counted and raised.
+def test_errors_are_counted_and_raised():
+
+	#
+	metrics = Metrics(timing = False)
+	packet_dispatcher = PacketDispatcher(metrics)
+	packet_dispatcher.register('obs_st', lambda data: data['obs'])
+
+	#
+	with pytest.raises(ValueError): packet_dispatcher.dispatch(b'{"type":"obs_st", not json')
+	with pytest.raises(KeyError): packet_dispatcher.dispatch(packet('obs_st', separators = (',', ':')))
+
+	#
+	assert (metrics.decode_errors, metrics.handler_errors) == (1, 1)
@@ -0,0 +1,89 @@
+#
+import os
+
+#
+import pytest
+
+#
+from conftest import START_EPOCH, obs_row, obs_st_packet
+from tempest_weather_helper import PacketRecorder, read_packet_recording, zstandard
+
+# Datagrams as drain_datagrams() returns them, with sub-second receive times, and one without a source address.
+def datagrams(count):
+	return [(obs_st_packet(obs_row(START_EPOCH + index * 60)), START_EPOCH + index * 60 + 0.123456, ('192.168.1.%d' % (index % 4 + 10), 50222) if index != 3 else None) for index in range(count)]
+
+#
+def record(directory, items, **kwargs):
+
+	#
+	recorder = PacketRecorder(str(directory), **kwargs)
+	recorder.record_many(items[:-1])
+	recorder.record(*items[-1])
+	recorder.close()
+
+	#
+	return recorder
+
+# What was recorded reads back in order, with exact receive times and source addresses, whatever the compression.
+@pytest.mark.parametrize('compression', [None, 'gzip', pytest.param('zstd', marks = pytest.mark.skipif(zstandard is None, reason = 'needs zstandard'))])
+def test_round_trip(tmp_path, compression):
+
+	#
+	items = datagrams(20)
+	recorder = record(tmp_path, items, compression = compression)
+
+	#
+	assert recorder.statistics()['recorded'] == 20 and recorder.statistics()['dropped'] == 0
+	assert list(read_packet_recording(str(tmp_path))) == [(received_epoch, address or ('', 0), datagram) for datagram, received_epoch, address in items]
+
+# Segments rotate by size, and a directory reads back oldest segment first.
+def test_segments_read_in_order(tmp_path):
+
+	#
+	items = datagrams(50)
+	recorder = record(tmp_path, items, compression = None, segment_bytes = 1000)
+
+	#
+	assert recorder.segments > 5 and len(os.listdir(str(tmp_path))) == recorder.segments
+	assert [received_epoch for received_epoch, address, datagram in read_packet_recording(str(tmp_path))] == [received_epoch for datagram, received_epoch, address in items]
+
+# A segment cut off part way through a record (the one still being written, or one cut off by a crash) reads up to the last whole record.
+@pytest.mark.parametrize('cut', [1, PacketRecorder.RECORD.size - 1, PacketRecorder.RECORD.size + 5])
+def test_truncated_trailing_record(tmp_path, cut):
+
+	#
+	items = datagrams(5)
+	record(tmp_path, items, compression = None)
+	path = os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0])
+
+	# Cut into the last record, by cut bytes from its start.
+	last_record_size = PacketRecorder.RECORD.size + len(items[-1][2][0]) + len(items[-1][0])
+	with open(path, 'r+b') as file: file.truncate(os.path.getsize(path) - last_record_size + cut)
+
+	#
+	assert [datagram for received_epoch, address, datagram in read_packet_recording(path)] == [datagram for datagram, received_epoch, address in items[:-1]]
+
+# A gzipped segment that was never closed reads as far as it goes.
+def test_truncated_gzip_segment(tmp_path):
+
+	#
+	items = datagrams(200)
+	record(tmp_path, items, compression = 'gzip')
+	path = os.path.join(str(tmp_path), os.listdir(str(tmp_path))[0])
+
+	#
+	with open(path, 'r+b') as file: file.truncate(os.path.getsize(path) // 2)
+
+	#
+	read = [datagram for received_epoch, address, datagram in read_packet_recording(path)]
+	assert read == [datagram for datagram, received_epoch, address in items[:len(read)]]
+
+# Anything else is refused.
+def test_not_a_recording(tmp_path):
+
+	#
+	path = str(tmp_path / 'packets-x.twhpackets')
+	with open(path, 'wb') as file: file.write(b'not a recording')
+
+	#
+	with pytest.raises(ValueError): list(read_packet_recording(path))
@@ -0,0 +1,52 @@
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import Station
+
+# A packet without a pressure gets no trends, rather than trends worked out from the pressure of the observation before it.
+def test_packet_without_pressure_has_no_trends():
+
+	#
+	station = Station('ST-00000512', rollup_tiers = ())
+	for minute in range(200):
+		station.cache_observation(station.derive(obs_row(START_EPOCH + minute * 60, pressure_mb = 1013.0 - minute * 0.02)))
+
+	#
+	assert station.get_observation().pressure_trend_one_hour_mb is not None
+
+	#
+	observation = station.derive(obs_row(START_EPOCH + 200 * 60, pressure_mb = None))
+
+	#
+	assert observation.pressure_trend_one_hour_mb is None
+	assert observation.pressure_trend_three_hours_mb is None
+	assert observation.pressure_trend_one_hour_description is None
+	assert observation.pressure_trend_advanced_three_hours_description is None
+
+# The minute each trend first appears, for a station reporting every minute from START_EPOCH but for the skipped minutes, cached live or ingested.
+def first_minutes(skipped = (), ingest = False):
+
+	#
+	station = Station('ST-00000512', rollup_tiers = ())
+	rows = [obs_row(START_EPOCH + minute * 60, pressure_mb = round(1013.0 - minute * 0.02, 2)) for minute in range(200) if minute not in skipped]
+
+	#
+	if ingest:
+		station.ingest(rows)
+	else:
+		for obs in rows: station.cache_observation(station.derive(obs))
+
+	#
+	history = station.get_all_for_json()
+
+	#
+	return [min((row['last_updated_epoch'] - START_EPOCH) // 60 for row in history if row[key] is not None) for key in ('pressure_trend_one_hour_mb', 'pressure_trend_three_hours_mb', 'pressure_trend_advanced_three_hours_description')]
+
+# Trends wait for their whole window after a station's first reading, rather than appearing once enough of it is covered; coverage only forgives the gaps after that.
+def test_trends_wait_for_their_whole_window_at_startup():
+
+	#
+	assert first_minutes() == [60, 180, 180]
+	assert first_minutes(ingest = True) == [60, 180, 180]
+
+	#
+	assert first_minutes(skipped = (1, 2, 3, 61, 62)) == [60, 180, 180]
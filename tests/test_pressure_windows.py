@@ -0,0 +1,92 @@
+#
+import random
+import statistics
+
+#
+import pytest
+
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import PressureWindows, Station
+
+# What PressureWindows should answer, worked out from scratch from every minute's pressure.
+def reference(pressures, newest_minute, span, minimum_coverage):
+
+	#
+	window = [pressures.get(minute) for minute in range(newest_minute - span + 1, newest_minute + 1)]
+	present = [value for value in window if value is not None]
+	first_quarter = [value for value in window[:span - (span // 4) * 3] if value is not None]
+	last_quarter = [value for value in window[-(span // 4):] if value is not None]
+
+	#
+	extremes = (min(present), max(present)) if present and len(present) / span >= minimum_coverage else None
+
+	#
+	if all(part and len(part) / length >= minimum_coverage for part, length in ((present, span), (first_quarter, span - (span // 4) * 3), (last_quarter, span // 4))):
+		return extremes, (present[0], min(present), max(present), statistics.pstdev(present), statistics.pstdev(first_quarter), statistics.pstdev(last_quarter))
+
+	#
+	return extremes, None
+
+# Minutes arrive with gaps, doubles and the odd late one; after each, the incremental windows agree with a brute-force pass over the minutes.
+@pytest.mark.parametrize('seed', range(4))
+def test_windows_match_brute_force(seed):
+
+	#
+	random_generator = random.Random(seed)
+	windows = PressureWindows(change_spans = (12,), advanced_spans = (12,), capacity = 64)
+	pressures = {}
+	minute = 1000
+	checked = 0
+
+	#
+	for _ in range(400):
+
+		#
+		minute += random_generator.choice((1,) * 30 + (2, 3, 20))
+		arriving = minute - random_generator.choice((0,) * 10 + (2, 5)) if minute - 5 > 1000 else minute
+		pressure_mb = None if random_generator.random() < 0.05 else round(1013 + random_generator.uniform(-3, 3), 2)
+
+		#
+		if windows.append(arriving, pressure_mb) and arriving not in pressures: pressures[arriving] = pressure_mb
+		minute = max(minute, arriving)
+
+		#
+		minimum_coverage = random_generator.choice((0.5, 0.9, 1.0))
+		extremes, pressure_statistics = reference(pressures, windows.minute, 12, minimum_coverage)
+
+		#
+		assert windows.extremes(12, minimum_coverage) == extremes
+
+		#
+		if pressure_statistics is None:
+			assert windows.statistics(12, minimum_coverage) is None
+		else:
+			assert windows.statistics(12, minimum_coverage) == pytest.approx(pressure_statistics)
+			checked += 1
+
+	# Plenty of those windows had enough readings to check the statistics too.
+	assert checked > 50
+
+# A hub reporting every 3 minutes sends a third of the readings a minute-by-minute one does, and still gets trends.
+def test_coverage_scales_with_report_interval():
+
+	#
+	station = Station('ST-00000512', rollup_tiers = ())
+	for minute in range(0, 190, 3):
+		observation = station.derive(obs_row(START_EPOCH + minute * 60, pressure_mb = 1013.0 - minute * 0.01, report_interval_minutes = 3))
+		station.cache_observation(observation)
+
+	#
+	assert observation.pressure_trend_one_hour_mb is not None
+	assert observation.pressure_trend_three_hours_mb is not None
+	assert observation.pressure_trend_advanced_three_hours_description is not None
+
+	# The same readings, claiming to be a minute apart, are mostly gaps.
+	station = Station('ST-00000512', rollup_tiers = ())
+	for minute in range(0, 190, 3):
+		observation = station.derive(obs_row(START_EPOCH + minute * 60, pressure_mb = 1013.0 - minute * 0.01))
+		station.cache_observation(observation)
+
+	#
+	assert observation.pressure_trend_one_hour_mb is None
@@ -0,0 +1,57 @@
+#
+import random
+import statistics
+
+#
+from tempest_weather_helper import RollingWindow
+
+# Values as pressures arrive: two-decimal floats, repeats, whole numbers, and missing minutes.
+def values(count):
+
+	#
+	random_generator = random.Random(1013)
+	result = []
+
+	#
+	for index in range(count):
+		pick = random_generator.random()
+		result.append(None if pick < 0.1 else result[-1] if pick < 0.2 and result else random_generator.randrange(980, 1040) if pick < 0.3 else round(random_generator.uniform(980, 1040), 2))
+
+	#
+	return result
+
+# After every push, the window agrees with the same statistics worked out from scratch over its last span values, pstdev() to the bit.
+def test_matches_recomputation():
+
+	#
+	span = 60
+	window = RollingWindow(span, track_deviation = True)
+	pushed = []
+
+	#
+	for value in values(1000):
+
+		#
+		window.push(value)
+		pushed.append(value)
+		present = [value for value in pushed[-span:] if value is not None]
+
+		#
+		assert len(window) == min(len(pushed), span) and window.is_full() == (len(pushed) >= span)
+		assert window.present() == len(present)
+		assert window.oldest() == (present[0] if present else None)
+		assert window.minimum() == (min(present) if present else None)
+		assert window.maximum() == (max(present) if present else None)
+		assert window.pstdev() == (statistics.pstdev(present) if present else None)
+
+# Without track_deviation, there's no standard deviation; and a window of only missing slots has no statistics.
+def test_untracked_and_empty():
+
+	#
+	window = RollingWindow(3)
+	for value in (1013.25, 1013.5): window.push(value)
+	assert (window.minimum(), window.maximum(), window.pstdev()) == (1013.25, 1013.5, None)
+
+	#
+	for value in (None, None, None): window.push(value)
+	assert (window.present(), window.oldest(), window.minimum(), window.maximum()) == (0, None, None, None)
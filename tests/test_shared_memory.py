@@ -0,0 +1,86 @@
+#
+import json
+import os
+import threading
+
+#
+from conftest import START_EPOCH, obs_row
+from tempest_weather_helper import SharedObservationReader, Station
+
+#
+def compact(rows):
+	return json.dumps(rows, separators = (',', ':')).encode('utf-8')
+
+#
+def segment_name(tmp_path):
+	return 'twh-test-%d-%s' % (os.getpid(), tmp_path.name)
+
+# A reader sees exactly the station's JSON, ints and all, whether observations arrive one at a time, late, or in bulk.
+def test_reader_matches_station(tmp_path):
+
+	#
+	station = Station('ST-00000512', capacity = 20, rollup_tiers = ())
+	for minute in range(5): station.cache_observation(station.derive(obs_row(START_EPOCH + minute * 60)))
+
+	#
+	station.open_shared_memory(segment_name(tmp_path))
+	reader = SharedObservationReader(name = segment_name(tmp_path))
+
+	#
+	try:
+
+		#
+		assert compact(reader.get_all_for_json()) == station.get_all_json()
+
+		#
+		for minute in (6, 7, 5): station.cache_observation(station.derive(obs_row(START_EPOCH + minute * 60, temperature_c = 21.5)))
+		station.ingest([obs_row(START_EPOCH + minute * 60, pressure_mb = 1013) for minute in range(8, 40)], batch_size = 7)
+
+		#
+		assert compact(reader.get_all_for_json()) == station.get_all_json()
+		assert compact(reader.get_for_json()) == station.get_json()
+		assert reader.get_generation() == station.get_generation()
+		assert reader.get_for_json()['pressure_mb'] == 1013 and type(reader.get_for_json()['pressure_mb']) is int
+
+	#
+	finally:
+		reader.close()
+		station.close_shared_memory()
+
+# Reads taken while the writer is busy are never torn: every one is a run of consecutive observations, whole.
+def test_reads_are_consistent_while_writing(tmp_path):
+
+	#
+	station = Station('ST-00000512', capacity = 10, rollup_tiers = ())
+	station.open_shared_memory(segment_name(tmp_path))
+	reader = SharedObservationReader(name = segment_name(tmp_path))
+	observations = [station.derive(obs_row(START_EPOCH + minute * 60, pressure_mb = 1000 + minute, temperature_c = minute)) for minute in range(2000)]
+
+	#
+	def write():
+		for observation in observations: station.cache_observation(observation)
+
+	#
+	writer = threading.Thread(target = write)
+	writer.start()
+
+	#
+	try:
+
+		#
+		while writer.is_alive():
+
+			#
+			rows = reader.get_all_for_json()
+			minutes = [(row['last_updated_epoch'] - START_EPOCH) // 60 for row in rows]
+			if not minutes: continue
+
+			#
+			assert minutes == list(range(minutes[0], minutes[0] + len(minutes)))
+			assert all(row['pressure_mb'] == 1000 + minute and row['temperature_c'] == minute for row, minute in zip(rows, minutes))
+
+	#
+	finally:
+		writer.join()
+		reader.close()
+		station.close_shared_memory()
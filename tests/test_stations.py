@@ -0,0 +1,81 @@
+#
+import json
+
+#
+from conftest import HUB_SN, START_EPOCH, obs_row, obs_st_packet
+from tempest_weather_helper import TempestWeatherHelper
+
+#
+def unidentified_packets():
+	return TempestWeatherHelper.get_metrics()['suppressed']['unidentified_packets']
+
+# Packets and ingested rows without a serial number are counted and dropped, rather than cached as a station of their own.
+def test_packets_without_a_serial_number():
+
+	#
+	before = unidentified_packets()
+
+	#
+	TempestWeatherHelper.handle_data(json.dumps({'type': 'obs_st', 'hub_sn': HUB_SN, 'obs': [obs_row(START_EPOCH)]}).encode('utf-8'))
+	TempestWeatherHelper.handle_data(json.dumps({'serial_number': None, 'type': 'obs_st', 'hub_sn': HUB_SN, 'obs': [obs_row(START_EPOCH + 60)]}).encode('utf-8'))
+	assert TempestWeatherHelper.ingest([(None, obs_row(START_EPOCH + 120)), ('', obs_row(START_EPOCH + 180))]) == 0
+
+	#
+	assert unidentified_packets() == before + 4
+	assert all(summary['serial_number'] for summary in TempestWeatherHelper.get_stations())
+
+# Stations reporting side by side each keep their own latest observation, history and trends.
+def test_stations_are_kept_apart():
+
+	#
+	falling, rising = 'ST-00000901', 'ST-00000902'
+
+	#
+	for minute in range(70):
+		TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH + minute * 60, pressure_mb = round(1013 - minute * 0.05, 2), temperature_c = 10), serial_number = falling))
+		TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH + minute * 60 + 30, pressure_mb = round(1013 + minute * 0.05, 2), temperature_c = 30), serial_number = rising))
+
+	#
+	assert TempestWeatherHelper.get_observation(falling).last_updated_epoch == START_EPOCH + 69 * 60
+	assert TempestWeatherHelper.get_observation(rising).last_updated_epoch == START_EPOCH + 69 * 60 + 30
+
+	#
+	for serial_number, offset, temperature_c in ((falling, 0, 10), (rising, 30, 30)):
+
+		#
+		history = TempestWeatherHelper.get_all_for_json(serial_number)
+		assert [row['last_updated_epoch'] for row in history] == [START_EPOCH + minute * 60 + offset for minute in range(70)]
+		assert {row['temperature_c'] for row in history} == {temperature_c}
+
+	#
+	assert TempestWeatherHelper.get_observation(falling).pressure_trend_one_hour_mb < 0
+	assert TempestWeatherHelper.get_observation(rising).pressure_trend_one_hour_mb > 0
+	assert TempestWeatherHelper.get_observation(falling).pressure_trend_one_hour_mb == -TempestWeatherHelper.get_observation(rising).pressure_trend_one_hour_mb
+
+	# Reads that don't name a station get the first to report.
+	assert TempestWeatherHelper.get_station().serial_number == TempestWeatherHelper.get_stations()[0]['serial_number']
+
+# The per-field class attributes read the default station's latest observation, whichever way it arrived.
+def test_class_attributes_follow_the_default_station():
+
+	#
+	serial_number = TempestWeatherHelper.get_station().serial_number or 'ST-00000903'
+	epoch = (TempestWeatherHelper.get_observation().last_updated_epoch or START_EPOCH) + 3600
+
+	#
+	TempestWeatherHelper.handle_data(obs_st_packet(obs_row(epoch, temperature_c = 17.5), serial_number = serial_number))
+	observation = TempestWeatherHelper.get_observation()
+	assert TempestWeatherHelper.temperature_c == 17.5 and TempestWeatherHelper.last_updated_epoch == epoch
+	assert all(getattr(TempestWeatherHelper, key) == getattr(observation, key) for key in observation.__slots__)
+
+	# A late packet doesn't change the latest observation.
+	TempestWeatherHelper.handle_data(obs_st_packet(obs_row(epoch - 60, temperature_c = 5), serial_number = serial_number))
+	assert TempestWeatherHelper.temperature_c == 17.5
+
+	#
+	assert TempestWeatherHelper.ingest([(serial_number, obs_row(epoch + 60, temperature_c = 18))]) == 1
+	assert TempestWeatherHelper.temperature_c == 18 and TempestWeatherHelper.last_updated_epoch == epoch + 60
+
+	#
+	assert 'temperature_c' in dir(TempestWeatherHelper)
+	assert not hasattr(TempestWeatherHelper, 'temperature_k')
@@ -0,0 +1,116 @@
+#
+import asyncio
+import sys
+import threading
+import time
+
+#
+import tempest_weather_helper
+
+#
+from conftest import START_EPOCH, obs_row, obs_st_packet
+from tempest_weather_helper import TempestWeatherHelper
+
+#
+def cache(serial_number, minute, temperature_c = 22):
+	TempestWeatherHelper.handle_data(obs_st_packet(obs_row(START_EPOCH + minute * 60, temperature_c = temperature_c), serial_number = serial_number))
+
+# A subscriber gets each new observation of the stations it asked for, and nothing once it has unsubscribed.
+def test_subscribe_and_unsubscribe():
+
+	#
+	subscription = TempestWeatherHelper.subscribe(station = 'ST-00001001')
+
+	#
+	cache('ST-00001001', 0)
+	cache('ST-00001002', 0)
+	serial_number, observation = subscription.get(timeout = 1)
+	assert serial_number == 'ST-00001001' and observation == TempestWeatherHelper.get_observation('ST-00001001')
+	assert subscription.get(timeout = 0.01) is None
+
+	#
+	TempestWeatherHelper.unsubscribe(subscription)
+	cache('ST-00001001', 1)
+	assert subscription.get(timeout = 0.01) is None
+	assert list(subscription) == []
+
+# A subscriber that falls behind holds only the newest observation per station, oldest station first, and counts the ones it missed.
+def test_slow_subscriber_is_coalesced():
+
+	#
+	subscription = TempestWeatherHelper.subscribe()
+
+	#
+	for minute in range(5): cache('ST-00001003', minute)
+	for minute in range(3): cache('ST-00001004', minute)
+	cache('ST-00001003', 5)
+
+	#
+	TempestWeatherHelper.unsubscribe(subscription)
+	delivered = [(serial_number, observation.last_updated_epoch) for serial_number, observation in subscription if serial_number in ('ST-00001003', 'ST-00001004')]
+
+	#
+	assert delivered == [('ST-00001003', START_EPOCH + 5 * 60), ('ST-00001004', START_EPOCH + 2 * 60)]
+	assert subscription.coalesced == 7
+
+# With fields, only observations in which one of them changed are delivered; callbacks and async for get the same.
+def test_fields_callback_and_async():
+
+	#
+	received = []
+	called = threading.Event()
+	subscription = TempestWeatherHelper.subscribe(callback = lambda serial_number, observation: (received.append(observation.temperature_c), called.set()), fields = ['temperature_c'], station = 'ST-00001005')
+
+	#
+	for minute, temperature_c in enumerate((20, 20, 21)):
+		cache('ST-00001005', minute, temperature_c)
+		if minute != 1: assert called.wait(1)
+		called.clear()
+
+	#
+	TempestWeatherHelper.unsubscribe(subscription)
+	assert received == [20, 21]
+
+	#
+	async def first():
+		async for item in subscription: return item
+
+	#
+	subscription = TempestWeatherHelper.subscribe(station = 'ST-00001005')
+	threading.Timer(0.02, cache, args = ('ST-00001005', 3)).start()
+	assert asyncio.run(asyncio.wait_for(first(), 1))[1].last_updated_epoch == START_EPOCH + 3 * 60
+	TempestWeatherHelper.unsubscribe(subscription)
+
+# main() prints each observation it's sent through subscribe(), as it arrives.
+def test_main_prints_from_subscribe(monkeypatch, capsys):
+
+	#
+	subscriptions = []
+	subscribe = TempestWeatherHelper.subscribe
+
+	#
+	def recording_subscribe(*args, **kwargs):
+		subscriptions.append(subscribe(*args, **kwargs))
+		return subscriptions[-1]
+
+	# Don't bind the socket.
+	monkeypatch.setattr(TempestWeatherHelper, 'start', lambda self: None)
+	monkeypatch.setattr(TempestWeatherHelper, 'subscribe', staticmethod(recording_subscribe))
+	monkeypatch.setattr(sys, 'argv', ['tempest_weather_helper.py'])
+
+	#
+	thread = threading.Thread(target = tempest_weather_helper.main)
+	thread.start()
+
+	#
+	deadline = time.monotonic() + 1
+	while not subscriptions and time.monotonic() < deadline: time.sleep(0.001)
+
+	# What's pending when it's closed is still delivered.
+	cache('ST-00001006', 0)
+	TempestWeatherHelper.unsubscribe(subscriptions[0])
+	thread.join(1)
+	assert not thread.is_alive()
+
+	#
+	assert str(TempestWeatherHelper.get_observation('ST-00001006').for_json()) in capsys.readouterr().out
@@ -0,0 +1,35 @@
+#
+import json
+
+#
+from conftest import HUB_SN, START_EPOCH, obs_row
+from tempest_weather_helper import TempestWeatherHelper
+
+#
+SERIAL_NUMBER = 'ST-00000777'
+
+#
+def rapid_wind_packet(epoch, speed_meters_per_second, direction_degrees):
+	return json.dumps({'serial_number': SERIAL_NUMBER, 'type': 'rapid_wind', 'hub_sn': HUB_SN, 'ob': [epoch, speed_meters_per_second, direction_degrees]}).encode('utf-8')
+
+# rapid_wind packets are skipped undecoded until something asks for the wind, and tracked from then on.
+def test_wind_is_tracked_from_the_first_get_wind():
+
+	#
+	TempestWeatherHelper.handle_data(json.dumps({'serial_number': SERIAL_NUMBER, 'type': 'obs_st', 'hub_sn': HUB_SN, 'obs': [obs_row(START_EPOCH)]}).encode('utf-8'))
+
+	#
+	skipped = TempestWeatherHelper.get_metrics()['packets_skipped']
+	TempestWeatherHelper.handle_data(rapid_wind_packet(START_EPOCH + 3, 2.5, 90))
+	assert TempestWeatherHelper.get_metrics()['packets_skipped'] == skipped + 1
+
+	#
+	assert TempestWeatherHelper.get_wind(SERIAL_NUMBER)['last_updated_epoch'] is None
+
+	#
+	TempestWeatherHelper.handle_data(rapid_wind_packet(START_EPOCH + 6, 3.5, 180))
+	wind = TempestWeatherHelper.get_wind(SERIAL_NUMBER)
+	assert (wind['last_updated_epoch'], wind['wind_speed_meters_per_second'], wind['wind_direction_degrees']) == (START_EPOCH + 6, 3.5, 180)
+
+	#
+	assert not TempestWeatherHelper.track_wind()